@@ -0,0 +1,165 @@
+"""
+Cold start benchmark for gsc_server.py.
+
+Every run starts a fresh Python interpreter that imports gsc_server, builds the first
+service object and executes a first and a second tool call against the fake Search
+Console API (fake_gsc_server.py), so lazy imports and discovery document loading are
+measured the way an autoscaled container sees them. Results are saved as JSON and,
+when a baseline file is given, compared for regressions.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --baseline benchmarks/results/<previous>.json
+"""
+from datetime import datetime
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_backend import SyntheticDataset  # noqa: E402
+from fake_gsc_server import FakeGSCServer  # noqa: E402
+
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+METRICS = ("process_ms", "import_ms", "first_build_ms", "first_call_ms", "second_call_ms")
+
+# Runs inside the fresh interpreter; prints one JSON line with its timings
+CHILD_SCRIPT = """
+import time
+started = time.perf_counter()
+import asyncio, json, sys
+sys.path.insert(0, {repo_dir!r})
+import gsc_server
+imported = time.perf_counter()
+gsc_server.get_gsc_service()
+built = time.perf_counter()
+tool = gsc_server.mcp.tools["get_search_analytics"]
+output = asyncio.run(tool(site_url={site_url!r}, dimensions="query"))
+first = time.perf_counter()
+asyncio.run(tool(site_url={site_url!r}, dimensions="query"))
+second = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_build_ms": (built - imported) * 1000,
+    "first_call_ms": (first - built) * 1000,
+    "second_call_ms": (second - first) * 1000,
+    "ok": not output.startswith("Error"),
+    "modules": len(sys.modules),
+}}))
+"""
+
+
+def run_once(base_url: str, site_url: str) -> dict:
+    env = dict(
+        os.environ,
+        GSC_API_BASE_URL=base_url,
+        GSC_API_NO_AUTH="true",
+        GSC_SKIP_OAUTH="true",
+        GSC_INSPECTION_CACHE_DIR=tempfile.mkdtemp(prefix="gsc-startup-inspection-"),
+    )
+    script = CHILD_SCRIPT.format(repo_dir=REPO_DIR, site_url=site_url)
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True)
+    process_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise SystemExit(f"Startup run failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_ms"] = process_ms
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results, baseline, threshold):
+    """Returns (metric, old, new, change %) for medians that got worse than threshold %."""
+    regressions = []
+    for metric in METRICS:
+        old = baseline.get("results", {}).get(metric, {}).get("median")
+        new = results.get(metric, {}).get("median")
+        if old and new and (new - old) / old * 100 > threshold:
+            regressions.append((metric, old, new, (new - old) / old * 100))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure gsc_server.py import and first-call latency in fresh interpreters.")
+    parser.add_argument("--runs", type=int, default=10, help="Number of fresh interpreter runs")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_DIR, help="Directory for the JSON results")
+    parser.add_argument("--baseline", help="Previous startup results file to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    dataset = SyntheticDataset(queries=1000, pages=200, days=30)
+    server = FakeGSCServer(dataset)
+    base_url = server.start()
+
+    try:
+        # One untimed run warms the OS file cache and writes bytecode where allowed
+        run_once(base_url, dataset.site_url)
+        runs = [run_once(base_url, dataset.site_url) for _ in range(args.runs)]
+    finally:
+        server.stop()
+
+    results = {}
+    print(f"{'Metric':<16} {'Median ms':>10} {'Min ms':>10} {'Max ms':>10}")
+    print("-" * 50)
+    for metric in METRICS:
+        values = [run[metric] for run in runs]
+        results[metric] = {
+            "median": round(statistics.median(values), 3),
+            "min": round(min(values), 3),
+            "max": round(max(values), 3),
+        }
+        print(f"{metric:<16} {results[metric]['median']:>10.2f} {results[metric]['min']:>10.2f} {results[metric]['max']:>10.2f}")
+    results["modules_loaded"] = runs[-1]["modules"]
+    if not all(run["ok"] for run in runs):
+        print("\nWarning: some first tool calls returned an error", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "bytecode_cache": not sys.dont_write_bytecode,
+        },
+        "results": results,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"startup-{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['revision']}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (>{args.threshold:.0f}%):")
+            for metric, old, new, change in regressions:
+                print(f"- {metric}: {old} -> {new} ({change:+.1f}%)")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
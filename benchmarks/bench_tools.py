@@ -0,0 +1,252 @@
+"""
+Offline benchmark for every @mcp.tool() in gsc_server.py.
+
+Each tool runs against FakeSearchConsoleHttp (see fake_backend.py) fed with a synthetic
+dataset, so no Google credentials or network access are needed. For every tool the
+benchmark records median latency, peak Python memory and rows per second, saves the
+results as JSON and, when a baseline file is given, flags regressions.
+
+Usage:
+    python benchmarks/bench_tools.py --queries 5000 --pages 1000 --days 90 --repeat 5
+    python benchmarks/bench_tools.py --baseline benchmarks/results/<previous>.json
+"""
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# Never fall through to interactive OAuth or real credentials while benchmarking
+os.environ["GSC_SKIP_OAUTH"] = "true"
+os.environ.setdefault("GSC_INSPECTION_CACHE_DIR", tempfile.mkdtemp(prefix="gsc-bench-inspection-"))
+
+from fake_backend import FakeSearchConsoleHttp, SyntheticDataset  # noqa: E402
+
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def tool_arguments(dataset: SyntheticDataset, sitemap_base: str) -> dict:
+    """Arguments used for each tool. Tools missing here are benchmarked with their defaults."""
+    site = dataset.site_url
+    pages = dataset.pages
+    half = len(dataset.dates) // 2
+    return {
+        "list_properties": {},
+        "add_site": {"site_url": site},
+        "delete_site": {"site_url": site},
+        "get_site_details": {"site_url": site},
+        "get_search_analytics": {"site_url": site, "dimensions": "query,page"},
+        "get_performance_overview": {"site_url": site, "days": 28},
+        "get_performance_rollup": {"site_url": site, "granularity": "week", "compare": "previous"},
+        "get_advanced_search_analytics": {"site_url": site, "dimensions": "query,page", "row_limit": 25000},
+        "compare_search_periods": {
+            "site_url": site,
+            "period1_start": dataset.dates[0], "period1_end": dataset.dates[half - 1],
+            "period2_start": dataset.dates[half], "period2_end": dataset.dates[-1],
+            "dimensions": "query",
+        },
+        "compare_multiple_periods": {"site_url": site, "periods": "4 weeks", "row_limit": 25000},
+        "get_search_by_page_query": {"site_url": site, "page_url": pages[0]},
+        "detect_performance_anomalies": {"site_url": site, "dimension": "page", "days": 56, "min_baseline": 0},
+        "filter_search_analytics": {"site_url": site, "expression": 'shoes AND NOT (cheap OR "near me")'},
+        "cluster_queries": {"site_url": site},
+        "get_search_analytics_delta": {"site_url": site, "dimensions": "query,page", "row_limit": 25000, "reset": True},
+        "inspect_url_enhanced": {"site_url": site, "page_url": pages[0], "force_refresh": True},
+        "batch_url_inspection": {"site_url": site, "urls": "\n".join(pages[:10]), "force_refresh": True},
+        "check_indexing_issues": {"site_url": site, "urls": "\n".join(pages[:10]), "force_refresh": True},
+        "get_sitemaps": {"site_url": site},
+        "list_sitemaps_enhanced": {"site_url": site},
+        "get_sitemap_details": {"site_url": site, "sitemap_url": f"{site}sitemap.xml"},
+        "submit_sitemap": {"site_url": site, "sitemap_url": f"{site}sitemap.xml"},
+        "delete_sitemap": {"site_url": site, "sitemap_url": f"{site}sitemap.xml"},
+        "manage_sitemaps": {"site_url": site, "action": "list"},
+        "crawl_sitemap": {"sitemap_url": f"{sitemap_base}/sitemap_index.xml"},
+        "bulk_submit_sitemaps": {
+            "site_url": site,
+            "sitemaps": "\n".join(f"{site}sitemap-{i}.xml" for i in range(50)),
+            "resubmit_after_minutes": 0,
+        },
+    }
+
+
+def start_sitemap_server(dataset: SyntheticDataset, urls_per_sitemap: int = 10000) -> ThreadingHTTPServer:
+    """Serves a sitemap index plus child sitemaps listing the dataset's pages."""
+    chunks = [dataset.pages[i:i + urls_per_sitemap] for i in range(0, len(dataset.pages), urls_per_sitemap)]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            base = f"http://{self.headers['Host']}"
+            if self.path == "/sitemap_index.xml":
+                entries = "".join(f"<sitemap><loc>{base}/sitemap-{i}.xml</loc></sitemap>" for i in range(len(chunks)))
+                body = f'<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>'
+            elif self.path.startswith("/sitemap-"):
+                chunk = chunks[int(self.path[len("/sitemap-"):-len(".xml")])]
+                entries = "".join(f"<url><loc>{url}</loc></url>" for url in chunk)
+                body = f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def reset_state(gsc_server):
+    """Clears caches so every run measures the cold path."""
+    gsc_server.ANALYTICS_CACHE.clear()
+    gsc_server.DAILY_ROLLUPS.clear()
+    gsc_server.SITEMAP_SUBMISSIONS.clear()
+    gsc_server.SEARCH_INDEXES.clear()
+
+
+def run_tool(gsc_server, http, name, kwargs, repeat):
+    func = gsc_server.mcp.tools[name]
+    timings = []
+    rows = 0
+    output = ""
+    for _ in range(repeat):
+        reset_state(gsc_server)
+        http.reset_counters()
+        started = time.perf_counter()
+        output = asyncio.run(func(**kwargs))
+        timings.append(time.perf_counter() - started)
+        rows = http.rows_served
+
+    # Peak memory is measured on a separate run because tracemalloc slows execution
+    reset_state(gsc_server)
+    tracemalloc.start()
+    asyncio.run(func(**kwargs))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "ok": not str(output).startswith("Error"),
+        "median_ms": round(median * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "rows": rows,
+        "rows_per_sec": round(rows / median, 1) if median > 0 and rows else 0,
+        "api_requests": http.requests,
+        "error": None if not str(output).startswith("Error") else str(output)[:200],
+    }
+
+
+def compare(results, baseline, threshold):
+    """Returns (tool, metric, old, new, change %) for metrics that got worse than threshold %."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("median_ms", "peak_kb"):
+            old, new = previous.get(metric), current.get(metric)
+            if old and new and (new - old) / old * 100 > threshold:
+                regressions.append((name, metric, old, new, (new - old) / old * 100))
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every gsc_server tool against a local fake Search Console API.")
+    parser.add_argument("--queries", type=int, default=5000, help="Number of synthetic queries")
+    parser.add_argument("--pages", type=int, default=1000, help="Number of synthetic pages")
+    parser.add_argument("--days", type=int, default=90, help="Number of days of synthetic data")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per tool")
+    parser.add_argument("--tools", default="", help="Comma-separated tool names (default: all)")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_DIR, help="Directory for the JSON results")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    import gsc_server
+    from googleapiclient.discovery import build
+
+    dataset = SyntheticDataset(queries=args.queries, pages=args.pages, days=args.days)
+    http = FakeSearchConsoleHttp(dataset)
+    service = build("searchconsole", "v1", http=http)
+    gsc_server.get_gsc_service = lambda: service
+    # Quota pacing would measure the token buckets, not the code
+    gsc_server.QUOTA = gsc_server.QuotaScheduler({name: 10 ** 9 for name in gsc_server.QUOTA_LIMITS}, gsc_server.MAX_CONCURRENCY)
+
+    sitemap_server = start_sitemap_server(dataset)
+    presets = tool_arguments(dataset, f"http://127.0.0.1:{sitemap_server.server_address[1]}")
+
+    selected = [name.strip() for name in args.tools.split(",") if name.strip()] or list(gsc_server.mcp.tools)
+    results = {}
+    print(f"{'Tool':<32} {'Median ms':>10} {'Peak KB':>10} {'Rows':>8} {'Rows/s':>12}  Status")
+    print("-" * 90)
+    for name in selected:
+        if name not in gsc_server.mcp.tools:
+            print(f"{name:<32} unknown tool", file=sys.stderr)
+            continue
+        result = run_tool(gsc_server, http, name, presets.get(name, {}), args.repeat)
+        results[name] = result
+        status = "ok" if result["ok"] else f"ERROR: {result['error']}"
+        print(f"{name:<32} {result['median_ms']:>10.2f} {result['peak_kb']:>10.1f} {result['rows']:>8} {result['rows_per_sec']:>12.0f}  {status}")
+
+    sitemap_server.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {"queries": args.queries, "pages": args.pages, "days": args.days},
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"bench-{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['revision']}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (>{args.threshold:.0f}%):")
+            for name, metric, old, new, change in regressions:
+                print(f"- {name} {metric}: {old} -> {new} ({change:+.1f}%)")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
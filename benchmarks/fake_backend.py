@@ -0,0 +1,207 @@
+"""
+Synthetic Search Console data and an in-process stand-in for the searchconsole v1 API.
+
+FakeSearchConsoleHttp implements the small part of the httplib2.Http interface that
+googleapiclient uses, so a real service object can be built against it with
+build("searchconsole", "v1", http=FakeSearchConsoleHttp(dataset)). No network is needed.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+import json
+import random
+import re
+import threading
+import zlib
+
+import httplib2
+
+DEVICES = ["MOBILE", "DESKTOP", "TABLET"]
+COUNTRIES = ["usa", "gbr", "deu", "fra", "ind", "bra", "can", "aus"]
+WORDS = [
+    "buy", "best", "cheap", "red", "running", "shoes", "trail", "women", "men", "kids",
+    "sale", "review", "size", "guide", "near", "me", "waterproof", "leather", "boots", "sandals",
+]
+
+
+def matches_filter(value: str, spec: Dict[str, str]) -> bool:
+    """Evaluates one dimensionFilterGroups filter the way the API does."""
+    operator, expression = spec.get("operator", "equals"), spec["expression"]
+    if operator == "equals":
+        return value == expression
+    if operator == "notEquals":
+        return value != expression
+    if operator == "contains":
+        return expression.lower() in value.lower()
+    if operator == "notContains":
+        return expression.lower() not in value.lower()
+    if operator == "includingRegex":
+        return re.search(expression, value) is not None
+    if operator == "excludingRegex":
+        return re.search(expression, value) is None
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+class SyntheticDataset:
+    """
+    Deterministic synthetic property with configurable numbers of queries, pages and days.
+
+    Rows for any dimension combination are generated on demand from their index, so
+    even very large result sets cost no memory until a page of rows is requested.
+    """
+
+    def __init__(self, queries: int = 5000, pages: int = 1000, days: int = 90, seed: int = 42,
+                 end_date: Optional[date] = None, site_url: str = "https://www.example.com/"):
+        rng = random.Random(seed)
+        self.site_url = site_url
+        self.queries = [
+            " ".join(rng.sample(WORDS, rng.randint(2, 4))) + f" {i}" for i in range(queries)
+        ]
+        self.pages = [f"{site_url.rstrip('/')}/p/{i}" for i in range(pages)]
+        end_date = end_date or date.today()
+        self.dates = [(end_date - timedelta(days=days - 1 - i)).isoformat() for i in range(days)]
+        self.values = {
+            "query": self.queries,
+            "page": self.pages,
+            "date": self.dates,
+            "device": DEVICES,
+            "country": COUNTRIES,
+        }
+
+    def total_rows(self, dimensions: List[str], values: Optional[Dict[str, List[str]]] = None) -> int:
+        values = values or self.values
+        total = 1
+        for dimension in dimensions:
+            total *= len(values.get(dimension, ["unknown"]))
+        return total
+
+    def filtered_values(self, body: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Applies dimensionFilterGroups to the value lists of the requested dimensions."""
+        values = dict(self.values)
+        for group in body.get("dimensionFilterGroups", []):
+            for spec in group.get("filters", []):
+                dimension = spec["dimension"]
+                if dimension in values:
+                    values[dimension] = [value for value in values[dimension] if matches_filter(value, spec)]
+        return values
+
+    def row(self, dimensions: List[str], index: int, values: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+        values_by_dimension = values or self.values
+        keys = []
+        remainder = index
+        for dimension in reversed(dimensions):
+            values = values_by_dimension.get(dimension, ["unknown"])
+            remainder, offset = divmod(remainder, len(values))
+            keys.append(values[offset])
+        keys.reverse()
+
+        # Stable pseudo-random metrics per key combination
+        seed = zlib.crc32("\x1f".join(keys).encode("utf-8"))
+        impressions = 1 + seed % 5000
+        clicks = (seed >> 8) % (impressions // 10 + 1)
+        row = {
+            "clicks": clicks,
+            "impressions": impressions,
+            "ctr": clicks / impressions,
+            "position": 1 + (seed >> 16) % 500 / 10.0,
+        }
+        if dimensions:
+            row["keys"] = keys
+        return row
+
+    def query(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        dimensions = body.get("dimensions", [])
+        start_row = body.get("startRow", 0)
+        row_limit = body.get("rowLimit", 1000)
+        values = self.filtered_values(body)
+        end = min(start_row + row_limit, self.total_rows(dimensions, values))
+        rows = [self.row(dimensions, index, values) for index in range(start_row, end)]
+        return {"rows": rows, "responseAggregationType": "byProperty"} if rows else {}
+
+    def inspection(self, page_url: str) -> Dict[str, Any]:
+        seed = zlib.crc32(page_url.encode("utf-8"))
+        indexed = seed % 5 != 0
+        return {
+            "inspectionResult": {
+                "inspectionResultLink": f"https://search.google.com/search-console/inspect?id={seed}",
+                "indexStatusResult": {
+                    "verdict": "PASS" if indexed else "NEUTRAL",
+                    "coverageState": "Submitted and indexed" if indexed else "Crawled - currently not indexed",
+                    "robotsTxtState": "ALLOWED",
+                    "indexingState": "INDEXING_ALLOWED",
+                    "pageFetchState": "SUCCESSFUL",
+                    "lastCrawlTime": f"{self.dates[-1]}T08:00:00Z",
+                    "googleCanonical": page_url,
+                    "userCanonical": page_url,
+                    "crawledAs": "MOBILE",
+                },
+            }
+        }
+
+    def sitemap(self, path: str) -> Dict[str, Any]:
+        return {
+            "path": path,
+            "lastSubmitted": f"{self.dates[-1]}T08:00:00Z",
+            "lastDownloaded": f"{self.dates[-1]}T09:00:00Z",
+            "isPending": False,
+            "isSitemapsIndex": False,
+            "warnings": "0",
+            "errors": "0",
+            "contents": [{"type": "web", "submitted": str(len(self.pages)), "indexed": "0"}],
+        }
+
+
+def route(dataset: SyntheticDataset, method: str, uri: str, body: Optional[bytes]) -> Tuple[int, Dict[str, Any]]:
+    """
+    Maps one searchconsole v1 REST call to (status, JSON payload) using the dataset.
+    Shared by the in-process fake and the HTTP fake server.
+    """
+    path = urlparse(uri).path
+    payload = json.loads(body) if body else {}
+
+    if path.endswith("/searchAnalytics/query"):
+        return 200, dataset.query(payload)
+    if path.endswith("/urlInspection/index:inspect"):
+        return 200, dataset.inspection(payload.get("inspectionUrl", ""))
+    if "/sitemaps" in path:
+        parts = path.split("/sitemaps")
+        feedpath = unquote(parts[1].lstrip("/")) if len(parts) > 1 else ""
+        if not feedpath:
+            return 200, {"sitemap": [dataset.sitemap(f"{dataset.site_url}sitemap.xml")]}
+        if method in ("PUT", "DELETE"):
+            return 204, {}
+        return 200, dataset.sitemap(feedpath)
+    if path.rstrip("/").endswith("/sites"):
+        return 200, {"siteEntry": [{"siteUrl": dataset.site_url, "permissionLevel": "siteOwner"}]}
+    if "/sites/" in path:
+        if method in ("PUT", "DELETE"):
+            return 204, {}
+        return 200, {"siteUrl": unquote(path.split("/sites/")[1]), "permissionLevel": "siteOwner"}
+    return 404, {"error": {"code": 404, "message": f"Unknown path {path}"}}
+
+
+class FakeSearchConsoleHttp:
+    """
+    httplib2.Http stand-in that answers searchconsole v1 calls from a SyntheticDataset.
+
+    Counts requests and returned rows so benchmarks can report throughput.
+    """
+
+    def __init__(self, dataset: SyntheticDataset):
+        self.dataset = dataset
+        self.requests = 0
+        self.rows_served = 0
+        self._lock = threading.Lock()
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=1, connection_type=None):
+        status, payload = route(self.dataset, method, uri, body)
+        with self._lock:
+            self.requests += 1
+            self.rows_served += len(payload.get("rows", []))
+        content = json.dumps(payload).encode("utf-8") if status != 204 else b""
+        return httplib2.Response({"status": status, "content-type": "application/json"}), content
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.rows_served = 0
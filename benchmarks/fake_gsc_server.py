@@ -0,0 +1,256 @@
+"""
+Configurable fake Search Console API server for load and failure testing.
+
+Serves searchAnalytics.query, urlInspection.index.inspect, sitemaps.* and sites.*
+from a SyntheticDataset over real HTTP, with adjustable latency distributions,
+realistic row truncation and injected 429/5xx responses. Point gsc_server.py at it with:
+
+    python benchmarks/fake_gsc_server.py --port 8090 --latency lognormal:80:0.5 --error-rate 429=0.05
+    GSC_API_BASE_URL=http://127.0.0.1:8090/ GSC_API_NO_AUTH=true python gsc_server.py
+
+GET /_stats returns request, error and row counters per endpoint as JSON.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_backend import SyntheticDataset, route  # noqa: E402
+
+# The real API never returns more than this many rows per request
+API_MAX_ROW_LIMIT = 25000
+
+ENDPOINTS = ("searchanalytics", "inspection", "sitemaps", "sites")
+
+ERROR_DETAILS = {
+    429: ("RESOURCE_EXHAUSTED", "usageLimits", "rateLimitExceeded", "Quota exceeded for quota metric 'Queries'."),
+    500: ("INTERNAL", "global", "backendError", "Internal error encountered."),
+    502: ("UNAVAILABLE", "global", "backendError", "Bad gateway."),
+    503: ("UNAVAILABLE", "global", "backendError", "The service is currently unavailable."),
+}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parses a latency distribution in milliseconds and returns a sampler producing seconds.
+
+    Supported forms: fixed:MS, uniform:LO:HI, normal:MEAN:STD, lognormal:MEDIAN:SIGMA, exponential:MEAN
+    """
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1]) / 1000
+    if kind == "exponential" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) / 1000 if values[0] > 0 else 0.0
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+def classify(path: str) -> str:
+    if path.endswith("/searchAnalytics/query"):
+        return "searchanalytics"
+    if "urlInspection" in path:
+        return "inspection"
+    if "/sitemaps" in path:
+        return "sitemaps"
+    return "sites"
+
+
+class FakeGSCServer:
+    """
+    Threaded HTTP server answering searchconsole v1 REST calls from a SyntheticDataset.
+
+    Args:
+        dataset: Synthetic data to serve
+        latency: Default latency spec applied to every endpoint
+        endpoint_latency: Per-endpoint latency specs overriding the default
+        error_rates: Injected error probability per HTTP status, e.g. {429: 0.05, 500: 0.01}
+        max_total_rows: Rows available per query before the result is truncated, like the real API
+        seed: Seed for latency and error sampling
+    """
+
+    def __init__(self, dataset: SyntheticDataset, latency: str = "fixed:0",
+                 endpoint_latency: Optional[Dict[str, str]] = None,
+                 error_rates: Optional[Dict[int, float]] = None,
+                 max_total_rows: int = 50000, seed: int = 7,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.dataset = dataset
+        default = parse_latency(latency)
+        self.latency = {endpoint: default for endpoint in ENDPOINTS}
+        for endpoint, spec in (endpoint_latency or {}).items():
+            self.latency[endpoint] = parse_latency(spec)
+        self.error_rates = dict(error_rates or {})
+        self.max_total_rows = max_total_rows
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {endpoint: {"requests": 0, "errors": 0, "rows": 0} for endpoint in ENDPOINTS}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return json.loads(json.dumps(self.counters))
+
+    def _sample(self, endpoint: str) -> tuple:
+        """Returns (latency seconds, injected error status or None)."""
+        with self._lock:
+            delay = self.latency[endpoint](self._rng)
+            roll = self._rng.random()
+        threshold = 0.0
+        for status, rate in sorted(self.error_rates.items()):
+            threshold += rate
+            if roll < threshold:
+                return delay, status
+        return delay, None
+
+    def _truncate(self, body: bytes) -> Optional[bytes]:
+        """Clamps rowLimit/startRow to what the real API would return; None means no rows left."""
+        payload = json.loads(body) if body else {}
+        start_row = payload.get("startRow", 0)
+        row_limit = min(payload.get("rowLimit", 1000), API_MAX_ROW_LIMIT, self.max_total_rows - start_row)
+        if row_limit <= 0:
+            return None
+        payload["rowLimit"] = row_limit
+        return json.dumps(payload).encode("utf-8")
+
+    def handle(self, method: str, uri: str, body: bytes) -> tuple:
+        path = urlparse(uri).path
+        if path == "/_stats":
+            return 200, self.stats(), {}
+
+        endpoint = classify(path)
+        delay, error_status = self._sample(endpoint)
+        if delay:
+            time.sleep(delay)
+
+        with self._lock:
+            self.counters[endpoint]["requests"] += 1
+            if error_status:
+                self.counters[endpoint]["errors"] += 1
+
+        if error_status:
+            status_text, domain, reason, message = ERROR_DETAILS.get(error_status, ERROR_DETAILS[500])
+            payload = {"error": {
+                "code": error_status,
+                "message": message,
+                "errors": [{"message": message, "domain": domain, "reason": reason}],
+                "status": status_text,
+            }}
+            headers = {"Retry-After": "1"} if error_status == 429 else {}
+            return error_status, payload, headers
+
+        if endpoint == "searchanalytics":
+            body = self._truncate(body)
+            if body is None:
+                return 200, {"responseAggregationType": "byProperty"}, {}
+
+        status, payload = route(self.dataset, method, uri, body)
+        if endpoint == "searchanalytics":
+            with self._lock:
+                self.counters[endpoint]["rows"] += len(payload.get("rows", []))
+        return status, payload, {}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload, headers = server.handle(self.command, self.path, body)
+                content = json.dumps(payload).encode("utf-8") if status != 204 else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def parse_pairs(values, key_type, value_type) -> dict:
+    pairs = {}
+    for item in values or []:
+        key, _, value = item.partition("=")
+        pairs[key_type(key)] = value_type(value)
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Search Console API for load and failure testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--queries", type=int, default=5000, help="Number of synthetic queries")
+    parser.add_argument("--pages", type=int, default=1000, help="Number of synthetic pages")
+    parser.add_argument("--days", type=int, default=90, help="Number of days of synthetic data")
+    parser.add_argument("--site-url", default="https://www.example.com/", help="Property served by the fake API")
+    parser.add_argument("--latency", default="fixed:0", help="Default latency, e.g. fixed:50, uniform:20:80, lognormal:80:0.5")
+    parser.add_argument("--endpoint-latency", action="append", metavar="ENDPOINT=SPEC",
+                        help=f"Per-endpoint latency override ({', '.join(ENDPOINTS)}), repeatable")
+    parser.add_argument("--error-rate", action="append", metavar="STATUS=RATE",
+                        help="Inject an HTTP error status with the given probability, e.g. 429=0.05, repeatable")
+    parser.add_argument("--max-total-rows", type=int, default=50000, help="Rows available per query before truncation")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    dataset = SyntheticDataset(queries=args.queries, pages=args.pages, days=args.days, site_url=args.site_url)
+    server = FakeGSCServer(
+        dataset,
+        latency=args.latency,
+        endpoint_latency=parse_pairs(args.endpoint_latency, str, str),
+        error_rates=parse_pairs(args.error_rate, int, float),
+        max_total_rows=args.max_total_rows,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Fake Search Console API listening on {server.base_url}", file=sys.stderr)
+    print(f"Use: GSC_API_BASE_URL={server.base_url} GSC_API_NO_AUTH=true", file=sys.stderr)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Minimal in-process Redis-protocol (RESP2) server for testing the redis:// cache backend.
+
+Implements the commands gsc_server.py's RedisBackend uses (PING, AUTH, SELECT, GET,
+SET with EX/PX, DEL, SCAN, DBSIZE, FLUSHDB) with key expiry, and counts hits and misses.
+Run several gsc_server.py instances against it to see them share cache entries:
+
+    python benchmarks/fake_redis_server.py --port 6390
+    GSC_CACHE_BACKEND=redis://127.0.0.1:6390/0 GSC_CACHE_SECRET=change-me GSC_API_NO_AUTH=true python gsc_server.py
+"""
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+from typing import Dict, Optional
+import argparse
+import fnmatch
+import sys
+import threading
+import time
+
+
+class FakeRedisServer:
+    """
+    Threaded RESP2 server keeping keys in memory.
+
+    Args:
+        password: Require AUTH with this password when set
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: Optional[str] = None):
+        self.password = password
+        self.data: Dict[bytes, tuple] = {}
+        self.counters = {"commands": 0, "hits": 0, "misses": 0, "sets": 0}
+        self._lock = threading.Lock()
+        ThreadingTCPServer.allow_reuse_address = True
+        self.server = ThreadingTCPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, keys=len(self.data))
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args: list, session: dict):
+        """Returns the reply for one command: bytes, str (status), int, list, None or an Exception."""
+        name = args[0].upper().decode("ascii", "replace")
+        with self._lock:
+            self.counters["commands"] += 1
+            if name == "AUTH":
+                if self.password is None or args[-1].decode("utf-8") == self.password:
+                    session["authenticated"] = True
+                    return "OK"
+                return ValueError("WRONGPASS invalid username-password pair")
+            if self.password is not None and not session.get("authenticated"):
+                return ValueError("NOAUTH Authentication required.")
+            if name == "PING":
+                return "PONG"
+            if name == "SELECT":
+                return "OK"
+            if name == "GET":
+                value = self._live(args[1])
+                self.counters["hits" if value is not None else "misses"] += 1
+                return value
+            if name == "SET":
+                expires = None
+                options = [arg.upper() for arg in args[3::2]]
+                for option, amount in zip(options, args[4::2]):
+                    if option == b"PX":
+                        expires = time.monotonic() + int(amount) / 1000
+                    elif option == b"EX":
+                        expires = time.monotonic() + int(amount)
+                self.data[args[1]] = (args[2], expires)
+                self.counters["sets"] += 1
+                return "OK"
+            if name in ("DEL", "UNLINK"):
+                return sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+            if name == "SCAN":
+                pattern = "*"
+                for option, value in zip(args[2::2], args[3::2]):
+                    if option.upper() == b"MATCH":
+                        pattern = value.decode("utf-8")
+                keys = [key for key in list(self.data) if self._live(key) is not None
+                        and fnmatch.fnmatchcase(key.decode("utf-8", "replace"), pattern)]
+                return [b"0", keys]
+            if name == "DBSIZE":
+                return len(self.data)
+            if name == "FLUSHDB":
+                self.data.clear()
+                return "OK"
+            return ValueError(f"ERR unknown command '{name}'")
+
+    def _handler_class(self):
+        server = self
+
+        def encode(reply) -> bytes:
+            if reply is None:
+                return b"$-1\r\n"
+            if isinstance(reply, Exception):
+                return f"-{reply}\r\n".encode("utf-8")
+            if isinstance(reply, str):
+                return f"+{reply}\r\n".encode("utf-8")
+            if isinstance(reply, int):
+                return f":{reply}\r\n".encode("ascii")
+            if isinstance(reply, list):
+                return f"*{len(reply)}\r\n".encode("ascii") + b"".join(encode(item) for item in reply)
+            return f"${len(reply)}\r\n".encode("ascii") + reply + b"\r\n"
+
+        class Handler(StreamRequestHandler):
+            def handle(self):
+                session = {}
+                while True:
+                    line = self.rfile.readline()
+                    if not line.startswith(b"*"):
+                        return
+                    args = []
+                    for _ in range(int(line[1:])):
+                        length = int(self.rfile.readline()[1:])
+                        args.append(self.rfile.read(length + 2)[:-2])
+                    self.wfile.write(encode(server.execute(args, session)))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a minimal Redis-protocol server for cache backend testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--password", help="Require AUTH with this password")
+    args = parser.parse_args()
+
+    server = FakeRedisServer(args.host, args.port, args.password)
+    print(f"Fake Redis server listening on {server.url}", file=sys.stderr)
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+        print(f"Stats: {server.stats()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Load generator for the gsc_server.py HTTP JSON-RPC endpoint (USE_FLASK mode).
+
+Drives a weighted mix of tools/list, analytics and URL inspection calls at a given
+concurrency and (optionally) a target request rate, then reports p50/p95/p99 latency,
+error rates and throughput per operation as a JSON report.
+
+Against a running server:
+    python benchmarks/load_test.py --url http://127.0.0.1:3000/ --concurrency 16 --duration 60
+
+Self-contained run (starts the fake Search Console API and a gsc_server.py instance):
+    python benchmarks/load_test.py --spawn --concurrency 32 --rate 200 --api-latency lognormal:80:0.5
+"""
+from datetime import datetime
+import argparse
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_SITE = "https://www.example.com/"
+# Seconds a scheduled request may start behind its slot before it counts as late
+LATE_TOLERANCE = 0.01
+
+
+def build_operations(site_url: str, pages: int, force_refresh: bool) -> dict:
+    """Maps operation names to functions returning a JSON-RPC payload for a given request id."""
+    def analytics(request_id):
+        name, parameters = random.choice([
+            ("get_search_analytics", {"site_url": site_url, "dimensions": "query"}),
+            ("get_performance_overview", {"site_url": site_url, "days": 28}),
+            ("get_advanced_search_analytics", {"site_url": site_url, "dimensions": "query,page", "row_limit": 1000}),
+        ])
+        return {"jsonrpc": "2.0", "id": request_id, "method": "execute",
+                "params": {"name": name, "parameters": parameters}}
+
+    def inspection(request_id):
+        page_url = f"{site_url.rstrip('/')}/p/{random.randrange(pages)}"
+        return {"jsonrpc": "2.0", "id": request_id, "method": "execute",
+                "params": {"name": "inspect_url_enhanced",
+                           "parameters": {"site_url": site_url, "page_url": page_url, "force_refresh": force_refresh}}}
+
+    def tools_list(request_id):
+        return {"jsonrpc": "2.0", "id": request_id, "method": "tools/list"}
+
+    return {"tools_list": tools_list, "analytics": analytics, "inspection": inspection}
+
+
+def parse_mix(spec: str, operations: dict) -> list:
+    weights = []
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in operations:
+            raise SystemExit(f"Unknown operation in --mix: {name} (choose from {', '.join(operations)})")
+        weights.append((name, float(weight or 1)))
+    return weights
+
+
+def classify_response(response) -> str:
+    """Returns None for success or a short error category."""
+    if response.status_code != 200:
+        return f"http_{response.status_code}"
+    try:
+        data = response.json()
+    except ValueError:
+        return "invalid_json"
+    if "error" in data:
+        return f"rpc_{data['error'].get('code', 'unknown')}"
+    content = data.get("result", {}).get("content")
+    if isinstance(content, str) and content.startswith("Error"):
+        return "tool_error"
+    return None
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def latency_stats(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50": round(percentile(latencies, 50) * 1000, 2),
+        "p95": round(percentile(latencies, 95) * 1000, 2),
+        "p99": round(percentile(latencies, 99) * 1000, 2),
+        "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def summarize(samples: list, duration: float) -> dict:
+    """Latency is measured from the scheduled start when a rate is set; service latency from the actual send."""
+    errors = [s for s in samples if s["error"]]
+    late = sum(1 for s in samples if s["late"])
+    return {
+        "requests": len(samples),
+        "errors": len(errors),
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+        "late": late,
+        "late_rate": round(late / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / duration, 2) if duration else 0.0,
+        "latency_ms": latency_stats([s["latency"] for s in samples]),
+        "service_latency_ms": latency_stats([s["service_latency"] for s in samples]),
+    }
+
+
+def run_load(url: str, operations: dict, mix: list, concurrency: int, duration: float,
+             rate: float, timeout: float) -> tuple:
+    """
+    Runs `concurrency` closed-loop workers for `duration` seconds.
+
+    With a target `rate` (requests/second across all workers), request start times are
+    scheduled on a shared clock. A fixed number of workers cannot keep that rate once
+    responses are slow: a busy worker sends its next request late. To avoid coordinated
+    omission, latency is then measured from the scheduled start, so the time a request
+    spent waiting for a free worker counts, and every request sent more than
+    LATE_TOLERANCE after its slot is counted as late. `service_latency` is always
+    measured from the actual send.
+    """
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    samples = []
+    samples_lock = threading.Lock()
+    ids = itertools.count(1)
+    schedule_lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + duration
+    next_slot = [started]
+
+    def worker():
+        session = requests.Session()
+        while True:
+            slot = None
+            if rate:
+                with schedule_lock:
+                    slot = next_slot[0]
+                    next_slot[0] += 1 / rate
+                if slot >= deadline:
+                    break
+                delay = slot - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            elif time.monotonic() >= deadline:
+                break
+
+            name = random.choices(names, weights)[0]
+            payload = operations[name](next(ids))
+            request_started = time.monotonic()
+            try:
+                response = session.post(url, json=payload, timeout=timeout)
+                error = classify_response(response)
+            except requests.Timeout:
+                error = "timeout"
+            except requests.RequestException:
+                error = "connection_error"
+            finished = time.monotonic()
+            sample = {
+                "operation": name,
+                "latency": finished - (request_started if slot is None else min(slot, request_started)),
+                "service_latency": finished - request_started,
+                "late": slot is not None and request_started - slot > LATE_TOLERANCE,
+                "error": error,
+            }
+            with samples_lock:
+                samples.append(sample)
+        session.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.monotonic() - started
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30.0):
+    stop = time.monotonic() + timeout
+    while time.monotonic() < stop:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise SystemExit(f"Server at {url} did not come up within {timeout:.0f}s")
+
+
+def spawn_servers(args) -> tuple:
+    """Starts the fake Search Console API and a gsc_server.py instance pointed at it."""
+    api_port, server_port = free_port(), free_port()
+    api = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "fake_gsc_server.py"), "--port", str(api_port),
+         "--latency", args.api_latency, "--site-url", args.site_url]
+        + [flag for rate in args.api_error_rate or [] for flag in ("--error-rate", rate)],
+        stderr=subprocess.DEVNULL,
+    )
+    env = dict(
+        os.environ,
+        USE_FLASK="true",
+        PORT=str(server_port),
+        GSC_API_BASE_URL=f"http://127.0.0.1:{api_port}/",
+        GSC_API_NO_AUTH="true",
+        GSC_SKIP_OAUTH="true",
+        GSC_INSPECTION_CACHE_DIR=tempfile.mkdtemp(prefix="gsc-load-inspection-"),
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, "gsc_server.py")],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{server_port}/"
+    wait_for(f"http://127.0.0.1:{api_port}/_stats")
+    wait_for(url)
+    return url, [server, api]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the gsc_server.py HTTP JSON-RPC endpoint.")
+    parser.add_argument("--url", default="http://127.0.0.1:3000/", help="JSON-RPC endpoint of a running server")
+    parser.add_argument("--spawn", action="store_true", help="Start a fake API and a gsc_server.py instance for the run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent client sessions")
+    parser.add_argument("--rate", type=float, default=0, help="Target requests per second across all sessions (0 = as fast as possible)")
+    parser.add_argument("--duration", type=float, default=30, help="Test duration in seconds")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--mix", default="tools_list=1,analytics=3,inspection=1", help="Weighted operation mix")
+    parser.add_argument("--site-url", default=DEFAULT_SITE, help="Property used in tool calls")
+    parser.add_argument("--pages", type=int, default=1000, help="Number of distinct pages to inspect")
+    parser.add_argument("--force-refresh", action="store_true", help="Bypass the inspection cache on inspection calls")
+    parser.add_argument("--api-latency", default="lognormal:80:0.5", help="Fake API latency when using --spawn")
+    parser.add_argument("--api-error-rate", action="append", metavar="STATUS=RATE", help="Fake API error injection when using --spawn")
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--seed", type=int, help="Seed for the operation mix")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    processes = []
+    url = args.url
+    if args.spawn:
+        url, processes = spawn_servers(args)
+
+    try:
+        operations = build_operations(args.site_url, args.pages, args.force_refresh)
+        mix = parse_mix(args.mix, operations)
+        print(f"Running {args.duration:.0f}s load test against {url} with {args.concurrency} sessions"
+              + (f" at {args.rate:.0f} req/s" if args.rate else ""), file=sys.stderr)
+        samples, elapsed = run_load(url, operations, mix, args.concurrency, args.duration, args.rate, args.timeout)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    error_types = {}
+    for sample in samples:
+        if sample["error"]:
+            error_types[sample["error"]] = error_types.get(sample["error"], 0) + 1
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "url": url,
+            "spawned": args.spawn,
+            "concurrency": args.concurrency,
+            "target_rate": args.rate,
+            "duration_s": round(elapsed, 2),
+            "mix": dict(mix),
+        },
+        "overall": summarize(samples, elapsed),
+        "operations": {
+            name: summarize([s for s in samples if s["operation"] == name], elapsed)
+            for name, _ in mix
+        },
+        "error_types": error_types,
+    }
+
+    path = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    overall = report["overall"]
+    print(f"{'Operation':<12} {'Requests':>9} {'Errors':>8} {'Late':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    print("-" * 78)
+    for name, stats in list(report["operations"].items()) + [("overall", overall)]:
+        latency = stats["latency_ms"]
+        print(f"{name:<12} {stats['requests']:>9} {stats['errors']:>8} {stats['late']:>7} {latency['p50']:>9.1f} "
+              f"{latency['p95']:>9.1f} {latency['p99']:>9.1f} {stats['throughput_rps']:>8.1f}")
+    if args.rate and overall["late"]:
+        print(f"\n{overall['late']} requests started late because all {args.concurrency} sessions were busy; "
+              f"latencies include that wait. Raise --concurrency to offer the full rate.")
+    print(f"\nReport saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
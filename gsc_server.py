@@ -1,17 +1,35 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 import os
 import json
-from datetime import datetime, timedelta
+import gzip
+import pickle
+import sqlite3
+import hashlib
+import re
+import struct
+from datetime import date, datetime, timedelta, timezone
 import asyncio
+import contextvars
+import heapq
 import inspect
+import random
 import sys
+import threading
+import time
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import accumulate, islice
+from operator import mul
+from xml.etree import ElementTree
 
-import google.auth
-from google.auth.transport.requests import Request
-from google.oauth2 import service_account
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+# google.auth, google_auth_oauthlib, googleapiclient.discovery and requests are imported
+# where they are first needed; together they dominate the server's cold start time.
 from googleapiclient.errors import HttpError
 
 # Eigene einfache MCP-Implementierung
@@ -19,14 +37,47 @@ class MCP:
     def __init__(self, name):
         self.name = name
         self.tools = {}
+        # Request id -> RequestScope of tool calls in progress, for notifications/cancelled
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
     
     def tool(self):
         def decorator(func):
             self.tools[func.__name__] = func
             return func
         return decorator
-        
-    async def handle(self, data):
+
+    def cancel(self, request_id, reason: str = "Cancelled by client") -> str:
+        """
+        Cancels the tool call running for a request id and returns "cancelled".
+
+        With several workers, a call running elsewhere is cancelled through SHARED_STATE
+        ("forwarded"); otherwise "not running" is returned.
+        """
+        with self._inflight_lock:
+            scope = self._inflight.get(request_id)
+        if scope is not None:
+            scope.cancel(reason)
+            return "cancelled"
+        if WORKERS > 1 and SHARED_STATE is not None:
+            SHARED_STATE.request_cancel(request_id, reason)
+            return "forwarded"
+        return "not running"
+
+    @staticmethod
+    def _watch_shared_cancel(request_id, scope, since: float, finished: threading.Event):
+        """Cancels the scope once another worker records a cancellation for the request."""
+        while not finished.wait(SHARED_CANCEL_POLL):
+            try:
+                reason = SHARED_STATE.cancel_reason(request_id, since)
+            except sqlite3.Error as e:
+                print(f"Could not check for cancellation of request {request_id}: {str(e)}", file=sys.stderr)
+                continue
+            if reason is not None:
+                scope.cancel(reason)
+                return
+        
+    async def handle(self, data, scope=None):
         try:
             # Debug-Ausgabe für eingehende Anfragen
             print(f"Received MCP request: {json.dumps(data)}", file=sys.stderr)
@@ -69,6 +120,13 @@ class MCP:
                 
                 return tools_response
             
+            # Cancellation notification for an in-flight request; notifications get no response
+            if "method" in data and data["method"] == "notifications/cancelled":
+                params = data.get("params", {})
+                outcome = self.cancel(params.get("requestId"), params.get("reason") or "Cancelled by client")
+                print(f"Cancel request {params.get('requestId')}: {outcome}", file=sys.stderr)
+                return None
+
             # Handle 'resources/list' - Leere Liste zurückgeben
             if "method" in data and data["method"] == "resources/list":
                 return {
@@ -138,10 +196,79 @@ class MCP:
                 print(f"Sending getMetadata response with {len(tools)} tools", file=sys.stderr)
                 return response
             
+            # Background jobs: submit any tool, then poll, cancel or list
+            if "method" in data and data["method"] in ("jobs/submit", "jobs/status", "jobs/cancel", "jobs/list"):
+                params = data.get("params", {})
+                try:
+                    if data["method"] == "jobs/submit":
+                        try:
+                            profile_mode = resolve_profile_mode(params.get("profile"))
+                        except ValueError as e:
+                            return {
+                                "jsonrpc": "2.0",
+                                "id": data.get("id"),
+                                "error": {
+                                    "code": -32602,
+                                    "message": str(e)
+                                }
+                            }
+                        result = JOBS.submit(params.get("name"), params.get("parameters", {}), profile_mode)
+                    elif data["method"] == "jobs/status":
+                        try:
+                            since = int(params.get("since", 0))
+                        except (TypeError, ValueError):
+                            since = -1
+                        if since < 0:
+                            return {
+                                "jsonrpc": "2.0",
+                                "id": data.get("id"),
+                                "error": {
+                                    "code": -32602,
+                                    "message": f"Invalid since: {params.get('since')!r}, expected a non-negative integer"
+                                }
+                            }
+                        result = JOBS.get(params.get("jobId"), since)
+                    elif data["method"] == "jobs/cancel":
+                        result = JOBS.cancel(params.get("jobId"))
+                    else:
+                        result = {"jobs": JOBS.list()}
+                except KeyError:
+                    return {
+                        "jsonrpc": "2.0",
+                        "id": data.get("id"),
+                        "error": {
+                            "code": -32602,
+                            "message": f"Job '{params.get('jobId')}' not found"
+                        }
+                    }
+                except ValueError as e:
+                    return {
+                        "jsonrpc": "2.0",
+                        "id": data.get("id"),
+                        "error": {
+                            "code": -32601,
+                            "message": str(e)
+                        }
+                    }
+                return {
+                    "jsonrpc": "2.0",
+                    "id": data.get("id"),
+                    "result": result
+                }
+
             if "method" in data and data["method"] == "execute":
                 params = data.get("params", {})
                 tool_name = params.get("name")
                 tool_params = params.get("parameters", {})
+
+                # "background": true turns the call into a job and returns its id right away
+                if params.get("background"):
+                    return await self.handle({
+                        "jsonrpc": "2.0",
+                        "id": data.get("id"),
+                        "method": "jobs/submit",
+                        "params": {"name": tool_name, "parameters": tool_params, "profile": params.get("profile")}
+                    })
                 
                 print(f"Executing tool: {tool_name} with params: {json.dumps(tool_params)}", file=sys.stderr)
                 
@@ -158,7 +285,77 @@ class MCP:
                     return error_response
                 
                 tool_func = self.tools[tool_name]
-                result = await tool_func(**tool_params)
+
+                # "profile": "cprofile" | "sample" | true | false overrides GSC_PROFILE for this call
+                try:
+                    profile_mode = resolve_profile_mode(params.get("profile"))
+                except ValueError as e:
+                    return {
+                        "jsonrpc": "2.0",
+                        "id": data.get("id"),
+                        "error": {
+                            "code": -32602,
+                            "message": str(e)
+                        }
+                    }
+                profiler = ToolProfiler(profile_mode, tool_name) if profile_mode else None
+                profile = None
+                error = None
+
+                # The deadline covers quota waits, retries and every API call the tool makes
+                scope = scope or RequestScope()
+                scope.start(float(params.get("timeout", REQUEST_TIMEOUT)))
+                request_id = data.get("id")
+                with self._inflight_lock:
+                    self._inflight[request_id] = scope
+                # Cancellations may reach another worker; they are relayed through SHARED_STATE
+                finished = threading.Event()
+                if WORKERS > 1 and SHARED_STATE is not None:
+                    threading.Thread(target=self._watch_shared_cancel, args=(request_id, scope, time.time(), finished),
+                                     name="gsc-cancel-watch", daemon=True).start()
+                scope_token = REQUEST_SCOPE.set(scope)
+                try:
+                    if profiler is not None:
+                        profiler.start()
+                    task = asyncio.ensure_future(tool_func(**tool_params))
+                    scope.attach(task)
+                    result = await asyncio.wait_for(task, scope.remaining())
+                except (asyncio.TimeoutError, DeadlineExceeded):
+                    print(f"Tool timed out: {tool_name}", file=sys.stderr)
+                    error = {
+                        "code": -32001,
+                        "message": f"Tool '{tool_name}' exceeded its deadline of {scope.timeout:g}s"
+                    }
+                except asyncio.CancelledError:
+                    if not scope.cancelled.is_set():
+                        raise
+                    print(f"Tool cancelled: {tool_name} ({scope.reason})", file=sys.stderr)
+                    error = {
+                        "code": -32800,
+                        "message": f"Tool '{tool_name}' cancelled: {scope.reason}"
+                    }
+                finally:
+                    finished.set()
+                    REQUEST_SCOPE.reset(scope_token)
+                    with self._inflight_lock:
+                        if self._inflight.get(request_id) is scope:
+                            del self._inflight[request_id]
+                    if profiler is not None and profiler.started is not None:
+                        try:
+                            profile = profiler.stop()
+                            print(f"Profile of {tool_name} written to {profile['path']}", file=sys.stderr)
+                        except Exception as e:
+                            print(f"Writing profile of {tool_name} failed: {str(e)}", file=sys.stderr)
+
+                if error is not None:
+                    # A profile of a slow or cancelled call is often the one worth reading
+                    if profile is not None:
+                        error["data"] = {"profile": profile}
+                    return {
+                        "jsonrpc": "2.0",
+                        "id": request_id,
+                        "error": error
+                    }
                 
                 response = {
                     "jsonrpc": "2.0",
@@ -167,6 +364,8 @@ class MCP:
                         "content": result
                     }
                 }
+                if profile is not None:
+                    response["result"]["profile"] = profile
                 print(f"Tool execution completed: {tool_name}", file=sys.stderr)
                 return response
             
@@ -208,23 +407,6 @@ POSSIBLE_CREDENTIAL_PATHS = [
     # Add any other potential paths here
 ]
 
-# Füge diesen Code nach der Definition von POSSIBLE_CREDENTIAL_PATHS hinzu
-# Nach der Definition von POSSIBLE_CREDENTIAL_PATHS
-service_account_content = os.environ.get("GSC_CREDENTIALS_CONTENT")
-if service_account_content:
-    # Temporäre Datei für Service-Account-Credentials erstellen
-    import tempfile
-    service_account_file = tempfile.NamedTemporaryFile(delete=False, mode='w')
-    service_account_file.write(service_account_content)
-    service_account_file.close()
-    
-    # Setze die Umgebungsvariable GSC_CREDENTIALS_PATH
-    os.environ["GSC_CREDENTIALS_PATH"] = service_account_file.name
-    # Aktualisiere auch die Variable im Code
-    GSC_CREDENTIALS_PATH = service_account_file.name
-    # Füge den Pfad zur temporären Datei zu POSSIBLE_CREDENTIAL_PATHS hinzu
-    POSSIBLE_CREDENTIAL_PATHS.insert(0, service_account_file.name)
-
 # OAuth client secrets file path
 OAUTH_CLIENT_SECRETS_FILE = os.environ.get("GSC_OAUTH_CLIENT_SECRETS_FILE")
 if not OAUTH_CLIENT_SECRETS_FILE:
@@ -243,40 +425,326 @@ if client_secrets_content and OAUTH_CLIENT_SECRETS_FILE:
     with open(OAUTH_CLIENT_SECRETS_FILE, 'w') as f:
         f.write(client_secrets_content)
 
-def get_gsc_service():
+# Alternative API host, e.g. the fake server in benchmarks/fake_gsc_server.py for load tests
+API_BASE_URL = os.environ.get("GSC_API_BASE_URL")
+
+# Send unauthenticated requests; only useful together with GSC_API_BASE_URL
+API_NO_AUTH = os.environ.get("GSC_API_NO_AUTH", "").lower() in ("true", "1", "yes")
+
+# Local copy of the searchconsole v1 discovery document; defaults to the one bundled with google-api-python-client
+DISCOVERY_DOCUMENT_PATH = os.environ.get("GSC_DISCOVERY_DOCUMENT")
+
+_discovery_document = None
+_discovery_lock = threading.Lock()
+
+def load_discovery_document() -> Optional[str]:
     """
-    Returns an authorized Search Console service object.
-    First tries OAuth authentication, then falls back to service account.
+    Returns the searchconsole v1 discovery document as JSON text, read once per process.
+
+    GSC_DISCOVERY_DOCUMENT takes precedence over the copy bundled with google-api-python-client.
+    Returns None if neither is available, in which case build() fetches it over the network.
+    """
+    global _discovery_document
+    if _discovery_document is None:
+        with _discovery_lock:
+            if _discovery_document is None:
+                document = ""
+                if DISCOVERY_DOCUMENT_PATH and os.path.exists(DISCOVERY_DOCUMENT_PATH):
+                    with open(DISCOVERY_DOCUMENT_PATH, "r", encoding="utf-8") as f:
+                        document = f.read()
+                else:
+                    try:
+                        from googleapiclient.discovery_cache import get_static_doc
+                        document = get_static_doc("searchconsole", "v1") or ""
+                    except ImportError:
+                        pass
+                _discovery_document = document
+    return _discovery_document or None
+
+# Default time budget for one tool call; a request can override it with params.timeout
+REQUEST_TIMEOUT = float(os.environ.get("GSC_REQUEST_TIMEOUT", 300))
+# Upper bound for a single socket operation of an API call
+HTTP_TIMEOUT = float(os.environ.get("GSC_HTTP_TIMEOUT", 60))
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request runs out of time before or between API calls."""
+
+class RequestCancelled(asyncio.CancelledError):
+    """Raised in place of an API call when the request was cancelled or its client went away."""
+
+class RequestScope:
+    """
+    Deadline and cancellation state of one JSON-RPC request or background job.
+
+    The scope lives in REQUEST_SCOPE, which asyncio.to_thread copies into worker threads,
+    so the HTTP layer, the quota scheduler and report_progress() can all stop work
+    for a request that timed out or was cancelled.
+    """
+
+    def __init__(self):
+        self.timeout = None
+        self.deadline = None
+        self.reason = None
+        self.cancelled = threading.Event()
+        self._task = None
+
+    def start(self, timeout: Optional[float]):
+        self.timeout = timeout or None
+        self.deadline = time.monotonic() + timeout if timeout else None
+
+    def attach(self, task: asyncio.Task):
+        self._task = task
+        if self.cancelled.is_set():
+            task.cancel()
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise RequestCancelled(self.reason)
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded(f"Deadline of {self.timeout:g}s exceeded")
+
+    def cancel(self, reason: str = "Request cancelled"):
+        self.reason = reason
+        self.cancelled.set()
+        task = self._task
+        if task is not None and not task.done():
+            task.get_loop().call_soon_threadsafe(task.cancel)
+
+REQUEST_SCOPE = contextvars.ContextVar("request_scope", default=None)
+
+def check_deadline():
+    """Raises DeadlineExceeded or RequestCancelled if the current request must stop."""
+    scope = REQUEST_SCOPE.get()
+    if scope is not None:
+        scope.check()
+
+def deadline_remaining() -> Optional[float]:
+    scope = REQUEST_SCOPE.get()
+    return None if scope is None else scope.remaining()
+
+# Profile every tool call: "cprofile" (.pstats files) or "sample" (stack samples as .folded flame graph input)
+PROFILE_MODE = os.environ.get("GSC_PROFILE", "").lower()
+PROFILE_DIR = os.environ.get("GSC_PROFILE_DIR") or os.path.join(SCRIPT_DIR, ".profiles")
+# Seconds between stack samples in "sample" mode
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get("GSC_PROFILE_INTERVAL", 0.005))
+PROFILE_MODES = ("cprofile", "sample")
+# Let clients turn profiling on per call with "profile"; always allowed when GSC_PROFILE is set
+PROFILE_REQUESTS = os.environ.get("GSC_PROFILE_REQUESTS", "").lower() in ("true", "1", "yes")
+
+def resolve_profile_mode(requested: Any = None) -> str:
+    """
+    Returns the profiling mode for one call ("" for none) from its optional "profile" parameter.
+
+    Any call may turn profiling off, but only GSC_PROFILE or GSC_PROFILE_REQUESTS lets a client
+    turn it on, since profiles are written to the server's disk. Raises ValueError otherwise
+    and for unknown modes.
+    """
+    if requested is None:
+        mode = PROFILE_MODE
+    elif not requested:
+        return ""
+    elif not (PROFILE_MODE or PROFILE_REQUESTS):
+        raise ValueError("Profiling is disabled on this server; set GSC_PROFILE or GSC_PROFILE_REQUESTS=true to allow it")
+    else:
+        mode = (PROFILE_MODE or "cprofile") if requested is True else requested
+    if mode and mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}', use one of: {', '.join(PROFILE_MODES)}")
+    return mode
+
+class ToolProfiler:
+    """
+    Profiles one tool call on the thread that runs it and writes one file per call to PROFILE_DIR.
+
+    "cprofile" records every function call and writes a .pstats file for pstats, snakeviz or
+    gprof2dot; it is exact but slows call-heavy code down. "sample" reads the thread's stack
+    every PROFILE_SAMPLE_INTERVAL seconds from a helper thread and writes a .folded file (one
+    "frame;frame;frame count" line per stack) for flamegraph.pl, speedscope or inferno; its
+    overhead barely depends on the tool. Work handed to other threads by QUOTA.run shows up
+    as time spent waiting in the event loop.
+    """
+
+    def __init__(self, mode: str, name: str):
+        self.mode = mode
+        self.name = name
+        self.thread_id = threading.get_ident()
+        self.samples: Dict[str, int] = {}
+        self.started = None
+        self._profile = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.mode == "cprofile":
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._thread = threading.Thread(target=self._sample, name="gsc-profiler", daemon=True)
+            self._thread.start()
+
+    def _sample(self):
+        while not self._stop.wait(PROFILE_SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def stop(self) -> Dict[str, Any]:
+        """Stops profiling, writes the output file and returns its mode, path and duration."""
+        seconds = time.perf_counter() - self.started
+        if self._profile is not None:
+            self._profile.disable()
+        else:
+            self._stop.set()
+            self._thread.join()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stem = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{self.name}-{uuid.uuid4().hex[:8]}")
+        if self._profile is not None:
+            path = stem + ".pstats"
+            self._profile.dump_stats(path)
+        else:
+            path = stem + ".folded"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in sorted(self.samples.items()):
+                    f.write(f"{stack} {count}\n")
+        return {"mode": self.mode, "path": path, "seconds": round(seconds, 3)}
+
+# Keep-alive connections per API host in each client's session; about one per concurrent API call
+HTTP_POOL_SIZE = int(os.environ.get("GSC_HTTP_POOL_SIZE", 16))
+
+class SessionHttp:
+    """
+    httplib2.Http stand-in that sends googleapiclient requests through a pooled requests session.
+
+    Safe to share between threads: each concurrent call borrows its own keep-alive connection
+    from a pool of up to `pool_size` per host. Calls are refused once the current request was
+    cancelled or ran out of time, and their timeout is capped at the time left, so a stuck
+    call cannot outlive its request.
+    """
+
+    def __init__(self, session, pool_size: int = HTTP_POOL_SIZE):
+        from requests.adapters import HTTPAdapter
+
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self.session = session
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        import httplib2
+
+        timeout = HTTP_TIMEOUT
+        scope = REQUEST_SCOPE.get()
+        if scope is not None:
+            scope.check()
+            remaining = scope.remaining()
+            if remaining is not None:
+                timeout = min(timeout, max(remaining, 0.001))
+        response = self.session.request(
+            method, uri, data=body, headers=headers, timeout=timeout,
+            allow_redirects=redirections > 0 and method in ("GET", "HEAD"),
+        )
+        info = {key.lower(): value for key, value in response.headers.items()}
+        # requests already decoded the body, as httplib2 would have
+        info.pop("content-encoding", None)
+        info["status"] = str(response.status_code)
+        resp = httplib2.Response(info)
+        resp.reason = response.reason
+        return resp, response.content
+
+    def close(self):
+        self.session.close()
+
+def build_service(creds):
+    """
+    Builds the searchconsole v1 client, honoring the GSC_API_BASE_URL override.
+
+    The client uses a pooled SessionHttp transport, so one instance can serve all threads.
+    """
+    from google.auth.transport.requests import AuthorizedSession
+    from googleapiclient.discovery import build, build_from_document
+
+    http = SessionHttp(AuthorizedSession(creds))
+    client_options = {"api_endpoint": API_BASE_URL} if API_BASE_URL else None
+    document = load_discovery_document()
+    if document is None:
+        return build("searchconsole", "v1", http=http, client_options=client_options)
+    # build_from_document mutates the parsed document, so every service gets its own copy
+    return build_from_document(json.loads(document), http=http, client_options=client_options)
+
+# Access tokens are refreshed in the background this many seconds before they expire
+TOKEN_REFRESH_MARGIN = int(os.environ.get("GSC_TOKEN_REFRESH_MARGIN", 300))
+
+# Wait before retrying a failed background refresh
+TOKEN_REFRESH_RETRY = 30
+
+def load_oauth_credentials():
+    """
+    Returns valid OAuth user credentials from token.json, running the consent flow if needed.
+    """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    creds = None
+    
+    # Check if token file exists
+    if os.path.exists(TOKEN_FILE):
+        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+    
+    # If credentials don't exist or are invalid, get new ones
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            # Check if client secrets file exists
+            if not os.path.exists(OAUTH_CLIENT_SECRETS_FILE):
+                raise FileNotFoundError(
+                    f"OAuth client secrets file not found. Please place a client_secrets.json file in the script directory "
+                    f"or set the GSC_OAUTH_CLIENT_SECRETS_FILE environment variable."
+                )
+            
+            # Start OAuth flow
+            flow = InstalledAppFlow.from_client_secrets_file(OAUTH_CLIENT_SECRETS_FILE, SCOPES)
+            creds = flow.run_local_server(port=0)
+        
+        # Save the credentials for future use
+        with open(TOKEN_FILE, 'w') as token:
+            token.write(creds.to_json())
+    
+    return creds
+
+def load_credentials() -> tuple:
+    """
+    Resolves credentials in the same order the server always has and returns (credentials, source).
+
+    GSC_CREDENTIALS_CONTENT is parsed in memory; nothing is written to disk.
     """
+    from google.oauth2 import service_account
+
+    if API_NO_AUTH:
+        from google.auth.credentials import AnonymousCredentials
+        return AnonymousCredentials(), "anonymous"
+
     # Versuche zuerst, den Service Account aus der Umgebungsvariable zu erstellen
     service_account_content = os.environ.get("GSC_CREDENTIALS_CONTENT")
     if service_account_content:
         try:
             print(f"Using service account from GSC_CREDENTIALS_CONTENT", file=sys.stderr)
-            import tempfile
-            import json
-            
-            # Validiere JSON-Format
-            json_content = json.loads(service_account_content)
-            
-            # Schreibe in temporäre Datei
-            with tempfile.NamedTemporaryFile(delete=False, mode='w') as temp_file:
-                temp_file.write(service_account_content)
-                temp_path = temp_file.name
-            
-            # Erstelle Credentials direkt aus der temporären Datei
-            try:
-                creds = service_account.Credentials.from_service_account_file(
-                    temp_path, scopes=SCOPES
-                )
-                # Lösche die temporäre Datei nach Verwendung
-                os.unlink(temp_path)
-                return build("searchconsole", "v1", credentials=creds)
-            except Exception as e:
-                print(f"Error creating service account: {str(e)}", file=sys.stderr)
-                # Lösche die temporäre Datei im Fehlerfall
-                os.unlink(temp_path)
-                raise e
+            creds = service_account.Credentials.from_service_account_info(
+                json.loads(service_account_content), scopes=SCOPES
+            )
+            return creds, "GSC_CREDENTIALS_CONTENT"
         except Exception as e:
             print(f"Error processing service account content: {str(e)}", file=sys.stderr)
             # Fahre mit anderen Authentifizierungsmethoden fort
@@ -284,7 +752,7 @@ def get_gsc_service():
     # Try OAuth authentication first if not skipped
     if not SKIP_OAUTH:
         try:
-            return get_gsc_service_oauth()
+            return load_oauth_credentials(), "oauth"
         except Exception as e:
             # If OAuth fails, try service account
             pass
@@ -296,7 +764,7 @@ def get_gsc_service():
                 creds = service_account.Credentials.from_service_account_file(
                     cred_path, scopes=SCOPES
                 )
-                return build("searchconsole", "v1", credentials=creds)
+                return creds, cred_path
             except Exception as e:
                 continue  # Try the next path if this one fails
     
@@ -308,222 +776,3122 @@ def get_gsc_service():
         f"{', '.join([p for p in POSSIBLE_CREDENTIAL_PATHS[1:] if p])}"
     )
 
+class CredentialManager:
+    """
+    Holds the process-wide credentials and keeps their access token fresh.
+
+    Credentials are loaded on first use. After that a daemon thread refreshes the
+    token `refresh_margin` seconds before it expires, so API calls never block on
+    a token refresh or touch the filesystem.
+    """
+
+    def __init__(self, refresh_margin: int = TOKEN_REFRESH_MARGIN, loader=load_credentials):
+        self.refresh_margin = refresh_margin
+        self.loader = loader
+        self.source = None
+        self._credentials = None
+        self._service = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def get(self):
+        """Returns the shared credentials, loading and refreshing them on the first call."""
+        creds = self._credentials
+        if creds is not None:
+            return creds
+        with self._lock:
+            if self._credentials is None:
+                creds, self.source = self.loader()
+                # _refresh writes an OAuth token back to token.json based on self.source
+                if not creds.valid:
+                    self._refresh(creds)
+                self._credentials = creds
+                if getattr(creds, "expiry", None) is not None:
+                    self._thread = threading.Thread(target=self._refresh_loop, name="gsc-token-refresh", daemon=True)
+                    self._thread.start()
+            return self._credentials
+
+    def service(self):
+        """Returns the service object for these credentials, built once and shared by all threads."""
+        service = self._service
+        if service is None:
+            creds = self.get()
+            with self._lock:
+                if self._service is None:
+                    self._service = build_service(creds)
+                service = self._service
+        return service
+
+    def seconds_until_refresh(self) -> float:
+        expiry = getattr(self._credentials, "expiry", None)
+        if expiry is None:
+            return float(TOKEN_REFRESH_RETRY)
+        # google-auth keeps expiry as a naive UTC datetime
+        remaining = (expiry - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds()
+        return max(0.0, remaining - self.refresh_margin)
+
+    def _refresh(self, creds):
+        from google.auth.transport.requests import Request
+
+        creds.refresh(Request())
+        if self.source == "oauth":
+            # Keep token.json current for the next process start; off the request path here
+            try:
+                with open(TOKEN_FILE, 'w') as token:
+                    token.write(creds.to_json())
+            except OSError as e:
+                print(f"Could not update {TOKEN_FILE}: {str(e)}", file=sys.stderr)
+
+    def _refresh_loop(self):
+        creds = self._credentials
+        while self._credentials is creds:
+            self._wakeup.wait(self.seconds_until_refresh())
+            self._wakeup.clear()
+            if self._credentials is not creds:
+                break
+            try:
+                self._refresh(creds)
+            except Exception as e:
+                print(f"Background token refresh failed: {str(e)}", file=sys.stderr)
+                self._wakeup.wait(TOKEN_REFRESH_RETRY)
+                self._wakeup.clear()
+
+CREDENTIALS = CredentialManager()
+
+def get_gsc_service():
+    """
+    Returns an authorized Search Console service object.
+    First tries OAuth authentication, then falls back to service account.
+    """
+    return CREDENTIALS.service()
+
 def get_gsc_service_oauth():
     """
     Returns an authorized Search Console service object using OAuth.
     """
-    creds = None
-    
-    # Check if token file exists
-    if os.path.exists(TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
-    
-    # If credentials don't exist or are invalid, get new ones
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            # Check if client secrets file exists
-            if not os.path.exists(OAUTH_CLIENT_SECRETS_FILE):
-                raise FileNotFoundError(
-                    f"OAuth client secrets file not found. Please place a client_secrets.json file in the script directory "
-                    f"or set the GSC_OAUTH_CLIENT_SECRETS_FILE environment variable."
-                )
-            
-            # Start OAuth flow
-            flow = InstalledAppFlow.from_client_secrets_file(OAUTH_CLIENT_SECRETS_FILE, SCOPES)
-            creds = flow.run_local_server(port=0)
-            
-            # Save the credentials for future use
-            with open(TOKEN_FILE, 'w') as token:
-                token.write(creds.to_json())
-    
-    # Build and return the service
-    return build("searchconsole", "v1", credentials=creds)
+    return build_service(load_oauth_credentials())
 
-@mcp.tool()
-async def list_properties() -> str:
+# Maximum number of rows the Search Analytics API returns per request
+SEARCH_ANALYTICS_PAGE_SIZE = 25000
+
+# How long fetched analytics results are reused before the API is queried again
+CACHE_TTL = int(os.environ.get("GSC_CACHE_TTL", 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get("GSC_CACHE_MAX_ENTRIES", 256))
+
+class TTLCache:
     """
-    Retrieves and returns the user's Search Console properties.
+    Small thread-safe in-memory cache with per-entry expiry and LRU eviction.
     """
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[int] = None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Any):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Number of HTTP server processes sharing one port (USE_FLASK mode, POSIX only)
+WORKERS = int(os.environ.get("GSC_WORKERS", 1))
+# Where response and inspection caches live: "memory", "sqlite" or a redis://host:port/db URL
+CACHE_BACKEND_URL = os.environ.get("GSC_CACHE_BACKEND") or ("sqlite" if WORKERS > 1 else "memory")
+# SQLite database through which workers share quota buckets and, with the sqlite backend, caches.
+# A credential pool keeps its daily usage there too, so it survives restarts.
+SHARED_STATE_PATH = os.environ.get("GSC_SHARED_STATE") or (
+    os.path.join(SCRIPT_DIR, ".gsc_shared.sqlite3")
+    if WORKERS > 1 or CACHE_BACKEND_URL == "sqlite" or os.environ.get("GSC_CREDENTIALS_POOL", "").strip() else None
+)
+# Bump when the layout of cached values changes; entries written by other versions are ignored
+CACHE_SCHEMA_VERSION = 2
+# Key for signing shared cache entries, so a node only unpickles what a peer wrote; required for Redis
+CACHE_SECRET = os.environ.get("GSC_CACHE_SECRET", "").encode("utf-8")
+# Encoded entries larger than this many bytes are compressed
+CACHE_COMPRESS_MIN = 1024
+# Seconds a failing shared cache backend is bypassed before it is tried again
+CACHE_BACKEND_RETRY = 30
+# Seconds a SharedState lock is held at most; a holder that hangs loses it after this
+SHARED_LOCK_LEASE = 300
+SHARED_LOCK_POLL = 0.05
+# Seconds between checks for cancellations another worker received, and how long they are kept
+SHARED_CANCEL_POLL = 0.5
+SHARED_CANCEL_TTL = 600
+
+def process_alive(pid: int) -> bool:
+    """Returns whether a process with this id exists on this machine."""
     try:
-        service = get_gsc_service()
-        site_list = service.sites().list().execute()
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
 
-        # site_list is typically something like:
-        # {
-        #   "siteEntry": [
-        #       {"siteUrl": "...", "permissionLevel": "..."},
-        #       ...
-        #   ]
-        # }
-        sites = site_list.get("siteEntry", [])
+class SharedState:
+    """
+    SQLite database in WAL mode holding cache entries, quota buckets, locks and request
+    cancellations for several processes.
 
-        if not sites:
-            return "No Search Console properties found."
+    Every process and thread opens its own connection, so an instance created before
+    fork() keeps working in the workers. Readers never block the single writer.
+    """
 
-        # Format the results for easy reading
-        lines = []
-        for site in sites:
-            site_url = site.get("siteUrl", "Unknown")
-            permission = site.get("permissionLevel", "Unknown permission")
-            lines.append(f"- {site_url} ({permission})")
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, expires REAL NOT NULL, value BLOB NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (namespace, expires)")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS usage (name TEXT PRIMARY KEY, day INTEGER NOT NULL, used INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, pid INTEGER NOT NULL, owner TEXT NOT NULL, expires REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cancels (request_id TEXT PRIMARY KEY, reason TEXT NOT NULL, created REAL NOT NULL)")
 
-        return "\n".join(lines)
-    except FileNotFoundError as e:
-        return (
-            "Error: Service account credentials file not found.\n\n"
-            "To access Google Search Console, please:\n"
-            "1. Create a service account in Google Cloud Console\n"
-            "2. Download the JSON credentials file\n"
-            "3. Save it as 'service_account_credentials.json' in the same directory as this script\n"
-            "4. Share your GSC properties with the service account email"
-        )
-    except Exception as e:
-        return f"Error retrieving properties: {str(e)}"
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
 
-@mcp.tool()
-async def add_site(site_url: str) -> str:
+    @contextmanager
+    def transaction(self):
+        """Write transaction that takes the database lock up front, so read-modify-write is atomic."""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def lock(self, name: str, lease: float = SHARED_LOCK_LEASE):
+        """
+        Mutex across processes, e.g. around the read-modify-write of a shared cache entry.
+
+        Waiting is bounded by the current request's deadline. A lock whose holder died, or
+        that has been held for longer than `lease` seconds, is taken over.
+        """
+        owner = uuid.uuid4().hex
+        while True:
+            with self.transaction() as conn:
+                row = conn.execute("SELECT pid, expires FROM locks WHERE name = ?", (name,)).fetchone()
+                if row is None or row[1] < time.time() or not process_alive(row[0]):
+                    conn.execute(
+                        "INSERT OR REPLACE INTO locks (name, pid, owner, expires) VALUES (?, ?, ?, ?)",
+                        (name, os.getpid(), owner, time.time() + lease)
+                    )
+                    break
+            check_deadline()
+            time.sleep(SHARED_LOCK_POLL)
+        try:
+            yield
+        finally:
+            with self.transaction() as conn:
+                conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+    def request_cancel(self, request_id: Any, reason: str):
+        """Records a cancellation for whichever worker runs the request."""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM cancels WHERE created < ?", (now - SHARED_CANCEL_TTL,))
+            conn.execute(
+                "INSERT OR REPLACE INTO cancels (request_id, reason, created) VALUES (?, ?, ?)",
+                (json.dumps(request_id), reason, now)
+            )
+
+    def cancel_reason(self, request_id: Any, since: float) -> Optional[str]:
+        """Returns the reason of a cancellation recorded for the request at or after `since`, or None."""
+        row = self.connection().execute(
+            "SELECT reason FROM cancels WHERE request_id = ? AND created >= ?", (json.dumps(request_id), since)
+        ).fetchone()
+        return None if row is None else row[0]
+
+SHARED_STATE = SharedState(SHARED_STATE_PATH) if SHARED_STATE_PATH else None
+
+class CacheBackend(ABC):
     """
-    Add a site to your Search Console properties.
-    
-    Args:
-        site_url: The URL of the site to add (must be exact match e.g. https://example.com, or https://www.example.com, or https://subdomain.example.com/path/, for domain properties use format: sc-domain:example.com)
+    Byte store behind SharedCache. Implementations must be safe to use from several
+    threads and processes; `max_entries` is a hint a backend may leave to its own eviction.
     """
-    try:
-        service = get_gsc_service()
-        
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """Returns the stored bytes, or None if the key is missing or expired."""
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: bytes, ttl: float, max_entries: int):
+        """Stores bytes for `ttl` seconds."""
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str):
+        """Removes one key if present."""
+
+    @abstractmethod
+    def clear(self, namespace: str):
+        """Removes every key of a namespace."""
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache entries in the SharedState database, shared by the workers on one machine.
+
+    Expired entries are purged, and the oldest entries beyond `max_entries` evicted,
+    on roughly one write in fifty.
+    """
+
+    def __init__(self, state: SharedState):
+        self.state = state
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        row = self.state.connection().execute(
+            "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires >= ?",
+            (namespace, key, time.time())
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: float, max_entries: int):
+        with self.state.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, expires, value) VALUES (?, ?, ?, ?)",
+                (namespace, key, time.time() + ttl, value)
+            )
+            if random.random() < 0.02:
+                conn.execute("DELETE FROM cache WHERE namespace = ? AND expires < ?", (namespace, time.time()))
+                conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                    "SELECT key FROM cache WHERE namespace = ? ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                    (namespace, namespace, max_entries)
+                )
+
+    def delete(self, namespace: str, key: str):
+        with self.state.transaction() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace: str):
+        with self.state.transaction() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+class RedisError(Exception):
+    """Error reply from a Redis server."""
+
+class RedisBackend(CacheBackend):
+    """
+    Cache entries in a Redis-protocol server (Redis, Valkey, KeyDB, ...), shared by every node.
+
+    Speaks RESP2 over one connection per thread and process. Expiry and eviction are left
+    to the server, so configure `maxmemory` with an LRU policy there.
+
+    Args:
+        url: redis://[:password@]host[:port][/db]
+        prefix: Prepended to every key, so several deployments can share one server
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, url: str, prefix: str = "gsc:", timeout: float = 5.0):
+        from urllib.parse import unquote, urlparse
+
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported cache backend URL: {url}")
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        import socket
+
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        self._local.pid = os.getpid()
+        if self.password:
+            self._call(*(("AUTH", self.username, self.password) if self.username else ("AUTH", self.password)))
+        if self.db:
+            self._call("SELECT", self.db)
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                self._local.reader.close()
+                sock.close()
+            except OSError:
+                pass
+
+    def _read(self):
+        line = self._local.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(payload.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Redis connection closed")
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise ConnectionError(f"Unexpected Redis reply: {line[:40]!r}")
+
+    def _call(self, *args):
+        parts = [f"*{len(args)}\r\n".encode("ascii")]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(f"${len(data)}\r\n".encode("ascii"))
+            parts.append(data)
+            parts.append(b"\r\n")
+        self._local.sock.sendall(b"".join(parts))
+        return self._read()
+
+    def command(self, *args):
+        """Sends one command, reconnecting once if the pooled connection went away."""
+        for attempt in range(2):
+            if getattr(self._local, "sock", None) is None or self._local.pid != os.getpid():
+                self._connect()
+            try:
+                return self._call(*args)
+            except (ConnectionError, OSError):
+                self._close()
+                if attempt:
+                    raise
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return self.command("GET", self._key(namespace, key))
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: float, max_entries: int):
+        self.command("SET", self._key(namespace, key), value, "PX", max(1, int(ttl * 1000)))
+
+    def delete(self, namespace: str, key: str):
+        self.command("DEL", self._key(namespace, key))
+
+    def clear(self, namespace: str):
+        cursor = "0"
+        while True:
+            cursor, keys = self.command("SCAN", cursor, "MATCH", self._key(namespace, "*"), "COUNT", 1000)
+            if keys:
+                self.command("DEL", *keys)
+            cursor = cursor.decode("ascii") if isinstance(cursor, bytes) else cursor
+            if cursor == "0":
+                return
+
+def open_cache_backend(url: str) -> Optional[CacheBackend]:
+    """Returns the backend for GSC_CACHE_BACKEND, or None for plain in-process caches."""
+    if url == "memory":
+        return None
+    if url == "sqlite":
+        return SQLiteBackend(SHARED_STATE)
+    if url.startswith("redis://"):
+        # Entries are pickled, so anyone able to write unsigned entries to the server could run code here
+        if not CACHE_SECRET:
+            raise ValueError("GSC_CACHE_SECRET must be set to use a Redis cache backend")
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported GSC_CACHE_BACKEND: {url}")
+
+CACHE_BACKEND = open_cache_backend(CACHE_BACKEND_URL)
+
+# Entry header: magic, schema version, flags, expiry (wall-clock seconds)
+CACHE_HEADER = b"GSC"
+CACHE_FLAG_COMPRESSED = 1
+CACHE_FLAG_SIGNED = 2
+
+def encode_cache_entry(value: Any, expires_at: float) -> bytes:
+    """Pickles a value behind a versioned header, compressing large and signing all entries as configured."""
+    import zlib
+
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    flags = 0
+    if len(payload) > CACHE_COMPRESS_MIN:
+        payload = zlib.compress(payload, 1)
+        flags |= CACHE_FLAG_COMPRESSED
+    if CACHE_SECRET:
+        flags |= CACHE_FLAG_SIGNED
+    blob = struct.pack(">3sBBd", CACHE_HEADER, CACHE_SCHEMA_VERSION, flags, expires_at) + payload
+    if CACHE_SECRET:
+        import hmac
+        blob += hmac.new(CACHE_SECRET, blob, hashlib.sha256).digest()
+    return blob
+
+def decode_cache_entry(blob: bytes) -> Optional[tuple]:
+    """
+    Returns (expires_at, value), or None for entries that are expired, foreign or from another schema version.
+
+    With CACHE_SECRET set, the signature is checked before anything is decompressed or
+    unpickled, and unsigned or tampered entries are treated as misses.
+    """
+    import zlib
+
+    if len(blob) < 13:
+        return None
+    magic, version, flags, expires_at = struct.unpack(">3sBBd", blob[:13])
+    if magic != CACHE_HEADER or version != CACHE_SCHEMA_VERSION or expires_at < time.time():
+        return None
+    payload = blob[13:]
+    if CACHE_SECRET:
+        import hmac
+        if not flags & CACHE_FLAG_SIGNED or len(payload) < 32:
+            return None
+        payload, signature = payload[:-32], payload[-32:]
+        if not hmac.compare_digest(signature, hmac.new(CACHE_SECRET, blob[:-32], hashlib.sha256).digest()):
+            return None
+    elif flags & CACHE_FLAG_SIGNED:
+        payload = payload[:-32]
+    if flags & CACHE_FLAG_COMPRESSED:
+        payload = zlib.decompress(payload)
+    return expires_at, pickle.loads(payload)
+
+class SharedCache:
+    """
+    TTLCache counterpart stored in a CacheBackend, so its entries are shared by every
+    process using the same backend.
+
+    The backend is best effort: when it fails, reads miss and writes are dropped, and
+    it is left alone for CACHE_BACKEND_RETRY seconds so an outage does not slow every call.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: int, max_entries: int):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._retry_at = 0.0
+
+    @staticmethod
+    def _key(key: Any) -> str:
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._retry_at
+
+    def _failed(self, action: str, e: Exception):
+        self._retry_at = time.monotonic() + CACHE_BACKEND_RETRY
+        print(f"Cache backend {action} failed for {self.namespace}, bypassing it for {CACHE_BACKEND_RETRY}s: {str(e)}", file=sys.stderr)
+
+    def get_entry(self, key: Any) -> Optional[tuple]:
+        """Returns (expires_at as wall-clock time, value) or None."""
+        if not self._available():
+            return None
+        try:
+            blob = self.backend.get(self.namespace, self._key(key))
+            return None if blob is None else decode_cache_entry(blob)
+        except Exception as e:
+            self._failed("read", e)
+            return None
+
+    def get(self, key: Any) -> Any:
+        entry = self.get_entry(key)
+        return None if entry is None else entry[1]
+
+    def set(self, key: Any, value: Any, ttl: Optional[int] = None):
+        if not self._available():
+            return
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            blob = encode_cache_entry(value, time.time() + ttl)
+            self.backend.set(self.namespace, self._key(key), blob, ttl, self.max_entries)
+        except Exception as e:
+            self._failed("write", e)
+
+    def delete(self, key: Any):
+        try:
+            self.backend.delete(self.namespace, self._key(key))
+        except Exception as e:
+            self._failed("delete", e)
+
+    def clear(self):
+        try:
+            self.backend.clear(self.namespace)
+        except Exception as e:
+            self._failed("clear", e)
+
+class TieredCache:
+    """
+    Per-process TTLCache in front of a SharedCache.
+
+    Hits in the shared tier are copied into the local tier for the rest of their lifetime,
+    so hot entries skip SQLite and unpickling.
+    """
+
+    def __init__(self, local: TTLCache, shared: SharedCache):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: Any) -> Any:
+        value = self.local.get(key)
+        if value is None:
+            entry = self.shared.get_entry(key)
+            if entry is not None:
+                expires_at, value = entry
+                self.local.set(key, value, ttl=max(0.0, expires_at - time.time()))
+        return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[int] = None):
+        self.local.set(key, value, ttl)
+        self.shared.set(key, value, ttl)
+
+    def delete(self, key: Any):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+def make_cache(namespace: str, ttl: int, max_entries: int, local: bool = True):
+    """
+    Returns a TTLCache, or a cache shared through CACHE_BACKEND when one is configured.
+
+    Pass local=False for state that is updated in place and must never be read stale,
+    such as monitoring snapshots.
+    """
+    if CACHE_BACKEND is None:
+        return TTLCache(ttl, max_entries)
+    shared = SharedCache(CACHE_BACKEND, namespace, ttl, max_entries)
+    return TieredCache(TTLCache(ttl, max_entries), shared) if local else shared
+
+# Entries hash onto a fixed set of thread locks, so memory stays bounded however many
+# keys are locked; two keys rarely share a stripe and only wait for each other if they do
+STATE_LOCK_STRIPES = 64
+_STATE_LOCKS = [threading.Lock() for _ in range(STATE_LOCK_STRIPES)]
+
+@contextmanager
+def state_lock(namespace: str, key: Any):
+    """
+    Serializes read-modify-write of one entry of a local=False cache.
+
+    A thread lock covers this process; with SHARED_STATE, a lock in the database covers
+    the other workers too. Nodes sharing only a Redis backend are not coordinated.
+    """
+    name = f"{namespace}:{json.dumps(key, sort_keys=True, default=str)}"
+    lock = _STATE_LOCKS[hash(name) % STATE_LOCK_STRIPES]
+    remaining = deadline_remaining()
+    if not lock.acquire(timeout=-1 if remaining is None else max(remaining, 0)):
+        raise DeadlineExceeded(f"Deadline exceeded while waiting for {namespace}")
+    try:
+        if SHARED_STATE is None:
+            yield
+        else:
+            with SHARED_STATE.lock(name):
+                yield
+    finally:
+        lock.release()
+
+# Fetched AnalyticsRows keyed by property, query body and row cap
+ANALYTICS_CACHE = make_cache("analytics", CACHE_TTL, CACHE_MAX_ENTRIES)
+
+# Requests per minute allowed per API family, and the cap on in-flight API calls
+QUOTA_LIMITS = {
+    "searchanalytics": int(os.environ.get("GSC_QPM_SEARCHANALYTICS", 1200)),
+    "inspection": int(os.environ.get("GSC_QPM_INSPECTION", 600)),
+    "sitemaps": int(os.environ.get("GSC_QPM_SITEMAPS", 200)),
+    "sites": int(os.environ.get("GSC_QPM_SITES", 200)),
+}
+MAX_CONCURRENCY = int(os.environ.get("GSC_MAX_CONCURRENCY", 8))
+
+# HTTP statuses worth retrying with backoff
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`, holding at most `capacity` tokens.
+    """
+    def __init__(self, rate_per_minute: int, capacity: Optional[int] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, rate_per_minute // 10)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Takes a token and returns 0, or returns the seconds to wait before one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        """Returns a token taken for a call that was never sent."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+class SharedTokenBucket:
+    """
+    TokenBucket whose state lives in SharedState, so every worker draws from the same quota.
+    """
+    def __init__(self, state: SharedState, name: str, rate_per_minute: int, capacity: Optional[int] = None):
+        self.state = state
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, rate_per_minute // 10)
+
+    def _update(self, change: float) -> float:
+        with self.state.transaction() as conn:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            now = time.time()
+            tokens = float(self.capacity) if row is None else min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+            wait = 0.0
+            if change < 0 and tokens < 1:
+                wait = (1 - tokens) / self.rate
+            else:
+                tokens = min(self.capacity, tokens + change)
+            conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)", (self.name, tokens, now))
+        return wait
+
+    def try_acquire(self) -> float:
+        """Takes a token and returns 0, or returns the seconds to wait before one is available."""
+        return self._update(-1)
+
+    def refund(self):
+        self._update(1)
+
+class QuotaScheduler:
+    """
+    Paces outbound API calls per quota family and bounds how many run at once.
+
+    Blocking `.execute()` calls are moved to worker threads so many requests can be
+    in flight from one event loop, while the token buckets keep bulk tools inside
+    the Search Console per-minute quotas.
+    """
+    def __init__(self, limits: Dict[str, int], max_concurrency: int, state: Optional[SharedState] = None):
+        # With shared state the per-minute limits hold across all worker processes
+        self.buckets = {
+            name: SharedTokenBucket(state, name, rate) if state else TokenBucket(rate)
+            for name, rate in limits.items()
+        }
+        self.max_concurrency = max_concurrency
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to an event loop; the Flask mode runs one loop per request
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _bucket(self, bucket):
+        # Families name the shared buckets; callers with their own quota pass a bucket object
+        return self.buckets[bucket] if isinstance(bucket, str) else bucket
+
+    async def acquire(self, bucket):
+        while True:
+            wait = self._bucket(bucket).try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(self._checked_wait(wait))
+
+    def acquire_blocking(self, bucket):
+        """Like acquire(), for code running on a plain thread instead of an event loop."""
+        while True:
+            wait = self._bucket(bucket).try_acquire()
+            if not wait:
+                return
+            time.sleep(self._checked_wait(wait))
+
+    @staticmethod
+    def _checked_wait(wait: float) -> float:
+        """Fails fast instead of sleeping past the current request's deadline."""
+        check_deadline()
+        remaining = deadline_remaining()
+        if remaining is not None and wait > remaining:
+            raise DeadlineExceeded(f"Quota wait of {wait:.1f}s exceeds the remaining {max(remaining, 0):.1f}s")
+        return wait
+
+    def call_blocking(self, bucket, func, *args, retries: int = 3, **kwargs) -> Any:
+        """
+        Like run(), for code already on a worker thread: paces `func` on the bucket and retries 429 and 5xx.
+
+        The concurrency cap does not apply; the thread pool running the caller bounds it.
+        """
+        attempt = 0
+        while True:
+            self.acquire_blocking(bucket)
+            try:
+                return func(*args, **kwargs)
+            except (RequestCancelled, DeadlineExceeded):
+                self._bucket(bucket).refund()
+                raise
+            except HttpError as e:
+                if e.resp.status not in RETRYABLE_STATUSES or attempt >= retries:
+                    raise
+            attempt += 1
+            time.sleep(self._checked_wait(min(2 ** attempt, 30) * (0.5 + random.random())))
+
+    async def run(self, bucket, func, *args, retries: int = 3, retry_statuses: tuple = RETRYABLE_STATUSES, **kwargs) -> Any:
+        """
+        Runs a blocking API call on a worker thread once quota and a concurrency slot are free.
+
+        `bucket` is a quota family or a token bucket of its own. Calls failing with one of
+        `retry_statuses` (429 or 5xx by default) are retried with exponential backoff and jitter.
+        Waiting for a slot, for quota and between retries is bounded by the request deadline.
+        """
+        attempt = 0
+        while True:
+            semaphore = self._semaphore()
+            remaining = deadline_remaining()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), None if remaining is None else max(remaining, 0))
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("Deadline exceeded while waiting for a free API slot")
+            try:
+                await self.acquire(bucket)
+                try:
+                    return await asyncio.to_thread(func, *args, **kwargs)
+                except (RequestCancelled, DeadlineExceeded):
+                    # SessionHttp refused the call before sending it, so the token is unused
+                    self._bucket(bucket).refund()
+                    raise
+                except HttpError as e:
+                    if e.resp.status not in retry_statuses or attempt >= retries:
+                        raise
+            finally:
+                semaphore.release()
+            attempt += 1
+            await asyncio.sleep(self._checked_wait(min(2 ** attempt, 30) * (0.5 + random.random())))
+
+QUOTA = QuotaScheduler(QUOTA_LIMITS, MAX_CONCURRENCY, SHARED_STATE)
+
+# Service account files, or directories of them, whose quota is pooled for URL inspection
+CREDENTIALS_POOL = [path.strip() for path in re.split(r"[,%s]" % re.escape(os.pathsep), os.environ.get("GSC_CREDENTIALS_POOL", "")) if path.strip()]
+# URL inspection calls per property and day allowed for each pooled credential
+POOL_INSPECTION_QPD = int(os.environ.get("GSC_POOL_INSPECTION_QPD", 2000))
+# Seconds before a pooled credential's list of accessible properties is fetched again
+POOL_ACCESS_TTL = 3600
+# Error reasons Google uses for quota exhaustion on 403 responses
+POOL_QUOTA_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded", "dailyLimitExceeded")
+# A 429 moves a pooled call to the next credential instead of retrying the same one
+POOL_RETRYABLE_STATUSES = tuple(status for status in RETRYABLE_STATUSES if status != 429)
+
+def http_error_reason(e: HttpError) -> str:
+    """Returns the first error reason of an API error response, or an empty string."""
+    try:
+        return json.loads(e.content.decode("utf-8")).get("error", {}).get("errors", [{}])[0].get("reason", "")
+    except (ValueError, AttributeError, IndexError):
+        return ""
+
+def seconds_until_quota_reset() -> float:
+    """Daily Search Console quotas reset at midnight Pacific time; UTC-8 is close enough and never early."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=8)
+    return (datetime(now.year, now.month, now.day) + timedelta(days=1) - now).total_seconds()
+
+def quota_day() -> int:
+    """Number of the current daily quota period (days since the epoch in UTC-8)."""
+    return int((time.time() - 8 * 3600) // 86400)
+
+class PooledCredential:
+    """
+    One service account in a CredentialPool with its own quota buckets and usage counters.
+
+    With SharedState, buckets and daily usage live in the database, so they hold across
+    worker processes and restarts.
+    """
+
+    def __init__(self, name: str, manager: CredentialManager, state: Optional[SharedState] = None):
+        self.name = name
+        self.manager = manager
+        self.state = state
+        self.buckets = {
+            family: SharedTokenBucket(state, f"pool:{name}:{family}", rate) if state else TokenBucket(rate)
+            for family, rate in QUOTA_LIMITS.items()
+        }
+        self.sites = None
+        self.sites_checked = None
+        self.used = {}
+        self.blocked_until = {}
+        self._day = None
+
+    def service(self):
+        return self.manager.service()
+
+    def _usage_name(self, family: str, site_url: str) -> str:
+        return f"pool:{self.name}:{family}:{site_url}"
+
+    def used_today(self, family: str, site_url: str) -> int:
+        day = quota_day()
+        if self.state is not None:
+            row = self.state.connection().execute(
+                "SELECT used FROM usage WHERE name = ? AND day = ?", (self._usage_name(family, site_url), day)
+            ).fetchone()
+            return 0 if row is None else row[0]
+        if day != self._day:
+            self._day, self.used = day, {}
+        return self.used.get((family, site_url), 0)
+
+    def try_use(self, family: str, site_url: str, limit: Optional[int]) -> bool:
+        """Counts one call against today's usage unless that would exceed `limit`."""
+        day = quota_day()
+        if self.state is None:
+            used = self.used_today(family, site_url)
+            if limit is not None and used >= limit:
+                return False
+            self.used[(family, site_url)] = used + 1
+            return True
+        name = self._usage_name(family, site_url)
+        with self.state.transaction() as conn:
+            row = conn.execute("SELECT used FROM usage WHERE name = ? AND day = ?", (name, day)).fetchone()
+            used = 0 if row is None else row[0]
+            if limit is not None and used >= limit:
+                return False
+            conn.execute("INSERT OR REPLACE INTO usage (name, day, used) VALUES (?, ?, ?)", (name, day, used + 1))
+        return True
+
+class CredentialPool:
+    """
+    Spreads API calls over several service accounts so their per-project quotas add up.
+
+    Each call goes to the credential that can access the property with the most daily
+    quota left, and runs through QUOTA with that credential's per-minute bucket, sharing
+    QUOTA's concurrency cap and 5xx backoff. A 429 or quota 403 rests that credential for
+    the property and the call moves on to the next one; any other 403 drops the property
+    from the credential's access list. Waiting for quota and the API calls themselves never
+    block the event loop.
+    """
+
+    def __init__(self, members: List[PooledCredential]):
+        self.members = members
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_paths(cls, paths: List[str]) -> "CredentialPool":
+        import glob
+        from google.oauth2 import service_account
+
+        files = []
+        for path in paths:
+            files.extend(sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path])
+
+        def loader(path):
+            return lambda: (service_account.Credentials.from_service_account_file(path, scopes=SCOPES), path)
+
+        state = SHARED_STATE
+        return cls([PooledCredential(path, CredentialManager(loader=loader(path)), state) for path in files])
+
+    def _list_sites(self, member: PooledCredential):
+        try:
+            response = member.service().sites().list().execute()
+            sites = {site["siteUrl"] for site in response.get("siteEntry", [])
+                     if site.get("permissionLevel") != "siteUnverifiedUser"}
+        except Exception as e:
+            # Unknown access is tried anyway; a 403 on the call itself settles it
+            print(f"Could not list properties for {member.name}: {str(e)}", file=sys.stderr)
+            sites = None
+        with self._lock:
+            member.sites = sites
+
+    async def refresh_access(self):
+        """Re-lists the properties of members whose list is older than POOL_ACCESS_TTL, concurrently and off the event loop."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [member for member in self.members
+                     if member.sites_checked is None or now - member.sites_checked > POOL_ACCESS_TTL]
+            for member in stale:
+                member.sites_checked = now
+        if stale:
+            await asyncio.gather(*(asyncio.to_thread(self._list_sites, member) for member in stale))
+
+    def _available(self, family: str, site_url: str) -> List[tuple]:
+        """Returns (used today, member) for the members that can serve `site_url` now; call with the lock held."""
+        now = time.monotonic()
+        limit = POOL_INSPECTION_QPD if family == "inspection" else None
+        available = []
+        for member in self.members:
+            if member.sites is not None and site_url not in member.sites:
+                continue
+            if member.blocked_until.get(site_url, 0) > now:
+                continue
+            used = member.used_today(family, site_url)
+            if limit is not None and used >= limit:
+                continue
+            available.append((used, member))
+        return available
+
+    def remaining(self, family: str, site_url: str) -> Optional[int]:
+        """Daily calls left for `site_url` across the members that can serve it, or None if the family has no daily limit."""
+        if family != "inspection":
+            return None
+        with self._lock:
+            return sum(POOL_INSPECTION_QPD - used for used, _ in self._available(family, site_url))
+
+    def _choose(self, family: str, site_url: str) -> Optional[PooledCredential]:
+        """Counts one call against the least used member that can serve it and returns it, or None if none is left."""
+        limit = POOL_INSPECTION_QPD if family == "inspection" else None
+        with self._lock:
+            for used, member in sorted(self._available(family, site_url), key=lambda item: item[0]):
+                # Another worker may have used the last of today's quota meanwhile
+                if member.try_use(family, site_url, limit):
+                    return member
+            return None
+
+    def _rest(self, member: PooledCredential, site_url: str, seconds: float):
+        with self._lock:
+            member.blocked_until[site_url] = time.monotonic() + seconds
+
+    def _drop_access(self, member: PooledCredential, site_url: str):
+        with self._lock:
+            if member.sites is not None:
+                member.sites.discard(site_url)
+            else:
+                member.blocked_until[site_url] = time.monotonic() + POOL_ACCESS_TTL
+
+    async def execute(self, family: str, site_url: str, make_request) -> Any:
+        """
+        Runs `make_request(service).execute()` with a pooled credential, failing over on quota and permission errors.
+
+        Args:
+            family: Quota family of the call, e.g. "inspection"
+            site_url: Property the call is made for
+            make_request: Returns the API request to execute for a given service object
+        """
+        await self.refresh_access()
+        last_error = None
+        while True:
+            member = await asyncio.to_thread(self._choose, family, site_url)
+            if member is None:
+                if last_error is not None:
+                    raise last_error
+                raise PermissionError(f"No pooled credential can access {site_url} with {family} quota left")
+            try:
+                service = await asyncio.to_thread(member.service)
+            except Exception as e:
+                print(f"Could not load {member.name}: {str(e)}", file=sys.stderr)
+                self._rest(member, site_url, POOL_ACCESS_TTL)
+                last_error = e
+                continue
+            try:
+                return await QUOTA.run(member.buckets[family], lambda: make_request(service).execute(),
+                                       retry_statuses=POOL_RETRYABLE_STATUSES)
+            except HttpError as e:
+                reason = http_error_reason(e)
+                if e.resp.status == 429 or (e.resp.status == 403 and reason in POOL_QUOTA_REASONS):
+                    retry_after = (e.resp.get("retry-after") or "").strip()
+                    rest = seconds_until_quota_reset() if reason in ("quotaExceeded", "dailyLimitExceeded") else (
+                        float(retry_after) if retry_after.isdigit() else 60.0)
+                    self._rest(member, site_url, rest)
+                elif e.resp.status == 403:
+                    self._drop_access(member, site_url)
+                else:
+                    raise
+                print(f"{member.name} failed for {site_url} ({e.resp.status} {reason}), trying the next credential", file=sys.stderr)
+                last_error = e
+
+CREDENTIAL_POOL = CredentialPool.from_paths(CREDENTIALS_POOL) if CREDENTIALS_POOL else None
+
+class AnalyticsRow:
+    """
+    Read-only view of one row in an AnalyticsRows container.
+
+    Supports the same `row.get("clicks", 0)` / `row["keys"]` access as the raw API dicts,
+    so formatting code works unchanged, without allocating a dict per row.
+    """
+    __slots__ = ("_rows", "_index")
+
+    def __init__(self, rows: "AnalyticsRows", index: int):
+        self._rows = rows
+        self._index = index
+
+    @property
+    def keys(self) -> List[str]:
+        return self._rows.key(self._index)
+
+    @property
+    def clicks(self) -> int:
+        return self._rows.clicks[self._index]
+
+    @property
+    def impressions(self) -> int:
+        return self._rows.impressions[self._index]
+
+    @property
+    def ctr(self) -> float:
+        return self._rows.ctr[self._index]
+
+    @property
+    def position(self) -> float:
+        return self._rows.position[self._index]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name in AnalyticsRows.FIELDS:
+            return getattr(self, name)
+        return default
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in AnalyticsRows.FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in AnalyticsRows.FIELDS
+
+class AnalyticsRows:
+    """
+    Compact column-oriented container for Search Analytics rows.
+
+    Dimension values are interned into a shared string table and stored as
+    array('I') indices per dimension; metrics live in typed arrays. A row costs
+    about 4 bytes per dimension plus 32 bytes of metrics instead of a dict with
+    a keys list, so million-row result sets fit comfortably in one worker.
+    """
+    __slots__ = ("dimensions", "strings", "key_columns", "clicks", "impressions", "ctr", "position", "_string_ids", "fetch_id")
+
+    FIELDS = ("keys", "clicks", "impressions", "ctr", "position")
+
+    def __init__(self, dimensions: Optional[List[str]] = None):
+        self.dimensions = list(dimensions or [])
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self.key_columns = [array("I") for _ in self.dimensions]
+        self.clicks = array("q")
+        self.impressions = array("q")
+        self.ctr = array("d")
+        self.position = array("d")
+        # Identifies one API fetch; copies decoded from a shared cache keep it
+        self.fetch_id = None
+
+    def intern(self, value: str) -> int:
+        """Returns the string table id for a dimension value, adding it if needed."""
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self.strings)
+            self.strings.append(sys.intern(value))
+        return string_id
+
+    def append(self, keys: List[str], clicks: float = 0, impressions: float = 0, ctr: float = 0.0, position: float = 0.0):
+        for column, value in zip(self.key_columns, keys):
+            column.append(self.intern(value))
+        self.clicks.append(int(clicks))
+        self.impressions.append(int(impressions))
+        self.ctr.append(ctr)
+        self.position.append(position)
+
+    def extend(self, api_rows: List[Dict[str, Any]]):
+        """Appends raw searchanalytics.query rows."""
+        for row in api_rows:
+            self.append(
+                row.get("keys", []),
+                row.get("clicks", 0),
+                row.get("impressions", 0),
+                row.get("ctr", 0.0),
+                row.get("position", 0.0),
+            )
+
+    def key(self, index: int) -> List[str]:
+        strings = self.strings
+        return [strings[column[index]] for column in self.key_columns]
+
+    def key_ids(self, index: int) -> tuple:
+        """Returns the dimension values of a row as a tuple of string table ids."""
+        return tuple(column[index] for column in self.key_columns)
+
+    def __len__(self) -> int:
+        return len(self.clicks)
+
+    def __bool__(self) -> bool:
+        return len(self.clicks) > 0
+
+    def __getitem__(self, index: int) -> AnalyticsRow:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return AnalyticsRow(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield AnalyticsRow(self, index)
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the row data, excluding the string table."""
+        columns = self.key_columns + [self.clicks, self.impressions, self.ctr, self.position]
+        return sum(column.itemsize * len(column) for column in columns)
+
+def fetch_analytics_rows(
+    service,
+    site_url: str,
+    request: Dict[str, Any],
+    max_rows: Optional[int] = None,
+    use_cache: bool = True
+) -> AnalyticsRows:
+    """
+    Runs searchanalytics.query and collects the result into an AnalyticsRows container.
+
+    Pages through the result set until it is exhausted or `max_rows` rows were
+    fetched. When `max_rows` is not given, the request's rowLimit is used as the cap,
+    so single-page queries behave exactly like a plain query. Each page is converted
+    as it arrives, so raw API dicts never accumulate. Results are kept in
+    ANALYTICS_CACHE for GSC_CACHE_TTL seconds; tools pass use_cache=False for force_refresh.
+    Blocking: pages wait for the searchanalytics quota, so call it through asyncio.to_thread.
+
+    Args:
+        service: Authorized Search Console service object
+        site_url: The URL of the site in Search Console
+        request: Query body; rowLimit and startRow are managed here
+        max_rows: Optional cap on the total number of rows fetched
+        use_cache: Set to False to bypass the cache and always query the API
+    """
+    if max_rows is None:
+        max_rows = request.get("rowLimit")
+
+    warm_ttl = CACHE_WARMING.get()
+    cache_key = (site_url, json.dumps(request, sort_keys=True), max_rows)
+    if use_cache and warm_ttl is None:
+        cached = ANALYTICS_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+    rows = AnalyticsRows(request.get("dimensions", []))
+    for page in iter_analytics_pages(service, site_url, request, max_rows):
+        rows.extend(page)
+    rows.fetch_id = uuid.uuid4().hex
+
+    ANALYTICS_CACHE.set(cache_key, rows, ttl=warm_ttl)
+    return rows
+
+def iter_analytics_pages(
+    service,
+    site_url: str,
+    request: Dict[str, Any],
+    max_rows: Optional[int] = None
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yields the raw row pages of a searchanalytics.query, up to `max_rows` rows in total.
+
+    Used directly by callers that process pages as they arrive instead of keeping the
+    whole result, so it never reads or fills ANALYTICS_CACHE.
+    """
+    fetched = 0
+    start_row = request.get("startRow", 0)
+    while True:
+        page_size = SEARCH_ANALYTICS_PAGE_SIZE
+        if max_rows is not None:
+            page_size = min(page_size, max_rows - fetched)
+            if page_size <= 0:
+                break
+
+        body = dict(request, rowLimit=page_size, startRow=start_row)
+        page = QUOTA.call_blocking("searchanalytics", lambda: service.searchanalytics().query(siteUrl=site_url, body=body).execute())
+        page = page.get("rows", [])
+        fetched += len(page)
+        yield page
+        report_progress(done=fetched, message=f"Fetched {fetched} rows")
+
+        # A short page means the API has no more rows for this query
+        if len(page) < page_size:
+            break
+        start_row += len(page)
+
+# Properties whose common reports are prefetched into ANALYTICS_CACHE, comma-separated
+WARM_PROPERTIES = [p.strip() for p in os.environ.get("GSC_WARM_PROPERTIES", "").split(",") if p.strip()]
+# Seconds between warming rounds, or local times of day such as "06:30,14:00" via GSC_WARM_AT
+WARM_INTERVAL = int(os.environ.get("GSC_WARM_INTERVAL", 6 * 3600))
+WARM_AT = [t.strip() for t in os.environ.get("GSC_WARM_AT", "").split(",") if t.strip()]
+# Random delay added to every round so several servers don't warm at the same moment
+WARM_JITTER = int(os.environ.get("GSC_WARM_JITTER", 300))
+# Look-back windows (days) to warm
+WARM_DAYS = [int(d) for d in os.environ.get("GSC_WARM_DAYS", "28").split(",") if d.strip()]
+
+# Extra lifetime for warmed entries beyond the next scheduled round, in case that round runs late
+WARM_GRACE = 900
+
+# Holds the TTL for cache entries while the warmer runs; None for normal tool calls
+CACHE_WARMING = contextvars.ContextVar("cache_warming", default=None)
+
+class CacheWarmer:
+    """
+    Background scheduler that prefetches common reports for WARM_PROPERTIES.
+
+    Each round calls the report tools themselves, so the cached requests are exactly
+    the ones user-facing calls make. While warming, fetch_analytics_rows skips the
+    cache lookup and keeps results until shortly after the next round.
+    """
+
+    def __init__(self, properties: List[str], interval: int = WARM_INTERVAL, times: Optional[List[str]] = None,
+                 jitter: int = WARM_JITTER, days: Optional[List[int]] = None):
+        self.properties = properties
+        self.interval = interval
+        self.times = [datetime.strptime(t, "%H:%M").time() for t in (times or [])]
+        self.jitter = jitter
+        self.days = days or [28]
+        self.last_round = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def calls(self, site_url: str) -> List[tuple]:
+        """Tool calls made per property: totals and daily series, then top query and page tables, then the rollup sync."""
+        calls = []
+        for days in self.days:
+            calls.append(("get_performance_overview", {"site_url": site_url, "days": days}))
+            for dimension in ("query", "page"):
+                calls.append(("get_search_analytics", {"site_url": site_url, "days": days, "dimensions": dimension}))
+        for dimension in ("query", "page"):
+            calls.append(("get_advanced_search_analytics", {"site_url": site_url, "dimensions": dimension}))
+        calls.append(("get_performance_rollup", {"site_url": site_url}))
+        return calls
+
+    def next_run(self, now: datetime) -> datetime:
+        if not self.times:
+            return now + timedelta(seconds=self.interval)
+        candidates = [datetime.combine(now.date(), t) for t in self.times]
+        upcoming = [c for c in candidates if c > now]
+        return min(upcoming) if upcoming else min(candidates) + timedelta(days=1)
+
+    async def warm(self, ttl: int) -> Dict[str, Any]:
+        """Runs one warming round and returns per-call failures and timing."""
+        started = time.monotonic()
+        token = CACHE_WARMING.set(ttl)
+        failures = []
+        try:
+            for site_url in self.properties:
+                for name, kwargs in self.calls(site_url):
+                    output = await mcp.tools[name](**kwargs)
+                    if output.startswith("Error"):
+                        failures.append(f"{name} {site_url}: {output[:200]}")
+        finally:
+            CACHE_WARMING.reset(token)
+        return {"finished": datetime.now(), "seconds": time.monotonic() - started, "failures": failures}
+
+    def _loop(self):
+        # The first round runs right after startup so a fresh process serves from cache early
+        delay = random.uniform(0, self.jitter)
+        while not self._stop.wait(delay):
+            now = datetime.now()
+            next_run = self.next_run(now)
+            ttl = int((next_run - now).total_seconds()) + self.jitter + WARM_GRACE
+            try:
+                self.last_round = asyncio.run(self.warm(ttl))
+                for failure in self.last_round["failures"]:
+                    print(f"Cache warming failed: {failure}", file=sys.stderr)
+            except Exception as e:
+                print(f"Cache warming round failed: {str(e)}", file=sys.stderr)
+            delay = max(0.0, (next_run - datetime.now()).total_seconds()) + random.uniform(0, self.jitter)
+
+    def start(self):
+        if self.properties and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="gsc-cache-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+CACHE_WARMER = CacheWarmer(WARM_PROPERTIES, times=WARM_AT, days=WARM_DAYS)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+FILTER_TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|/((?:[^/\\]|\\.)*)/|(-)|([^\s()"]+))')
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchIndex:
+    """
+    In-memory inverted index over the dimension values of an AnalyticsRows container.
+
+    Every distinct value is indexed once: word tokens for exact term lookups and
+    trigrams for substring lookups. Postings hold string table ids, which are then
+    mapped to row indices per dimension, so boolean filters never touch the API.
+    """
+    def __init__(self, rows: AnalyticsRows):
+        self.rows = rows
+        self.lowered = [value.lower() for value in rows.strings]
+        self.token_postings: Dict[str, set] = {}
+        self.trigram_postings: Dict[str, set] = {}
+        for string_id, value in enumerate(self.lowered):
+            for token in TOKEN_PATTERN.findall(value):
+                self.token_postings.setdefault(token, set()).add(string_id)
+            for gram in trigrams(value):
+                self.trigram_postings.setdefault(gram, set()).add(string_id)
+
+        # Row indices per string id, per dimension
+        self.rows_by_string: Dict[str, Dict[int, List[int]]] = {}
+        for dimension, column in zip(rows.dimensions, rows.key_columns):
+            postings = {}
+            for row_index, string_id in enumerate(column):
+                postings.setdefault(string_id, []).append(row_index)
+            self.rows_by_string[dimension] = postings
+
+    def match_word(self, word: str) -> set:
+        """Values containing every word token of `word` (t-shirt matches "red t shirt")."""
+        postings = sorted((self.token_postings.get(token, set()) for token in TOKEN_PATTERN.findall(word.lower())), key=len)
+        if not postings:
+            return set()
+        return set(postings[0]).intersection(*postings[1:])
+
+    def match_substring(self, needle: str) -> set:
+        needle = needle.lower()
+        grams = trigrams(needle)
+        if grams:
+            # Intersect the rarest postings first, then verify the candidates
+            postings = sorted((self.trigram_postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = range(len(self.lowered))
+        return {string_id for string_id in candidates if needle in self.lowered[string_id]}
+
+    def match_regex(self, pattern: str) -> set:
+        compiled = re.compile(pattern, re.IGNORECASE)
+        return {string_id for string_id, value in enumerate(self.rows.strings) if compiled.search(value)}
+
+    def rows_for(self, dimension: str, string_ids: set) -> set:
+        postings = self.rows_by_string[dimension]
+        matched = set()
+        for string_id in string_ids:
+            matched.update(postings.get(string_id, ()))
+        return matched
+
+    def search(self, expression: str, default_dimension: str) -> set:
+        """
+        Evaluates a filter expression and returns the matching row indices.
+
+        Syntax: bare words match whole tokens, "quoted text" matches substrings and
+        /pattern/ matches a regex. Terms can be prefixed with a dimension (page:blog),
+        combined with AND (or juxtaposition), OR, NOT or a leading -, and grouped
+        with parentheses.
+        """
+        tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = FILTER_TOKEN_PATTERN.match(expression, position)
+            if not match or match.end() == position:
+                raise ValueError(f"Unexpected input at position {position}: {expression[position:]}")
+            position = match.end()
+            if match.group(1):
+                tokens.append(("(", None))
+            elif match.group(2):
+                tokens.append((")", None))
+            elif match.group(3) is not None:
+                tokens.append(("substring", match.group(3).replace('\\"', '"')))
+            elif match.group(4) is not None:
+                tokens.append(("regex", match.group(4).replace("\\/", "/")))
+            elif match.group(5):
+                tokens.append(("NOT", None))
+            elif match.group(6) in ("AND", "OR", "NOT"):
+                tokens.append((match.group(6), None))
+            else:
+                tokens.append(("word", match.group(6)))
+
+        parser = FilterParser(self, tokens, default_dimension)
+        return parser.parse()
+
+class FilterParser:
+    """
+    Recursive-descent evaluator for SearchIndex filter expressions.
+    """
+    def __init__(self, index: SearchIndex, tokens: List[tuple], default_dimension: str):
+        self.index = index
+        self.tokens = tokens
+        self.position = 0
+        self.default_dimension = default_dimension
+        self.all_rows = set(range(len(index.rows)))
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self) -> tuple:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self) -> set:
+        if not self.tokens:
+            raise ValueError("Empty filter expression")
+        result = self.parse_or()
+        if self.position < len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.position][1] or self.tokens[self.position][0]}'")
+        return result
+
+    def parse_or(self) -> set:
+        result = self.parse_and()
+        while self.peek() == "OR":
+            self.take()
+            result = result | self.parse_and()
+        return result
+
+    def parse_and(self) -> set:
+        result = self.parse_not()
+        while self.peek() not in (None, "OR", ")"):
+            if self.peek() == "AND":
+                self.take()
+            result = result & self.parse_not()
+        return result
+
+    def parse_not(self) -> set:
+        if self.peek() == "NOT":
+            self.take()
+            return self.all_rows - self.parse_not()
+        return self.parse_term()
+
+    def parse_term(self) -> set:
+        if self.peek() is None:
+            raise ValueError("Expression ends unexpectedly")
+        kind, value = self.take()
+        if kind == "(":
+            result = self.parse_or()
+            if self.peek() != ")":
+                raise ValueError("Missing closing parenthesis")
+            self.take()
+            return result
+        if kind != "word" and kind not in ("substring", "regex"):
+            raise ValueError(f"Unexpected '{kind}'")
+
+        dimension = self.default_dimension
+        if kind == "word" and ":" in value:
+            prefix, _, rest = value.partition(":")
+            if prefix in self.index.rows_by_string:
+                dimension = prefix
+                if len(rest) > 1 and rest.startswith("/") and rest.endswith("/"):
+                    kind, value = "regex", rest[1:-1]
+                elif rest:
+                    value = rest
+                elif self.peek() in ("substring", "regex", "word"):
+                    kind, value = self.take()
+                else:
+                    raise ValueError(f"Missing term after '{prefix}:'")
+        if dimension not in self.index.rows_by_string:
+            raise ValueError(f"Dimension '{dimension}' is not part of the loaded data")
+
+        if kind == "substring":
+            string_ids = self.index.match_substring(value)
+        elif kind == "regex":
+            try:
+                string_ids = self.index.match_regex(value)
+            except re.error as e:
+                raise ValueError(f"Invalid regex /{value}/: {e}")
+        else:
+            string_ids = self.index.match_word(value)
+        return self.index.rows_for(dimension, string_ids)
+
+# Indexes are keyed on the fetch they were built from, so every copy of a cached result
+# decoded from the shared tier reuses the same index
+SEARCH_INDEX_MAX_ENTRIES = 16
+SEARCH_INDEXES = TTLCache(CACHE_TTL, SEARCH_INDEX_MAX_ENTRIES)
+
+def get_search_index(rows: AnalyticsRows) -> SearchIndex:
+    if rows.fetch_id is None:
+        return SearchIndex(rows)
+    index = SEARCH_INDEXES.get(rows.fetch_id)
+    if index is None:
+        index = SearchIndex(rows)
+        SEARCH_INDEXES.set(rows.fetch_id, index)
+    return index
+
+# Dimensions accepted in dimensionFilterGroups, keyed by lower-case alias
+API_FILTER_DIMENSIONS = {
+    "query": "query", "page": "page", "country": "country", "device": "device",
+    "searchappearance": "searchAppearance", "appearance": "searchAppearance",
+}
+API_FILTER_DEVICES = ("DESKTOP", "MOBILE", "TABLET")
+# The API rejects regular expressions longer than this
+API_FILTER_REGEX_MAX = 4096
+# Backtracking-only constructs RE2 rejects: backreferences, lookarounds, atomic groups,
+# conditionals and possessive quantifiers. Escapes and character classes are skipped first.
+RE2_UNSUPPORTED = re.compile(
+    r"\\[^1-9k]|\[(?:\\.|[^\]\\])*\]"
+    r"|(?P<unsupported>\\[1-9]|\\k|\(\?(?:[=!>(|]|<[=!]|P=)|[*+?}]\+)"
+)
+API_FILTER_CLAUSE_PATTERN = re.compile(r'\s*(?:(;|AND\b)|([A-Za-z]+)\s*(!=|!~|=|~)\s*)')
+# A /regex/ must end a value, so paths like /p/1 stay plain text
+API_FILTER_VALUE_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"|/((?:[^/\\]|\\.)*)/(?=[\s;|]|$)|([^\s;|"]+)')
+API_FILTER_ALTERNATIVE_PATTERN = re.compile(r'\s*\|\s*')
+
+def re2_escape(text: str) -> str:
+    return re.sub(r"([\\.^$|?*+()\[\]{}])", r"\\\1", text)
+
+@lru_cache(maxsize=512)
+def parse_api_filters(expression: str) -> tuple:
+    r"""
+    Parses and validates an API filter expression into (dimension, operator, expression) tuples.
+
+    Syntax: clauses like query~shoes, page="https://example.com/", device!=MOBILE or
+    page~/\/blog\/.*/ joined with ; or AND. Operators: = equals, != not equals, ~ contains,
+    !~ does not contain; a /regex/ value turns ~ and !~ into includingRegex and excludingRegex
+    (quote a path like "/blog/" to match it as text). Alternatives separated by | (query~shoes|boots)
+    match any of them. Results are cached, so repeated expressions are only parsed once.
+
+    Regexes are only checked for constructs RE2 never supports (see RE2_UNSUPPORTED);
+    any other syntax error is reported by the API.
+    """
+    clauses = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = API_FILTER_CLAUSE_PATTERN.match(expression, position)
+        if not match:
+            raise ValueError(f"Expected a clause like query~shoes at position {position}: {expression[position:]}")
+        position = match.end()
+        if match.group(1):
+            continue
+
+        alias, operator = match.group(2), match.group(3)
+        dimension = API_FILTER_DIMENSIONS.get(alias.lower())
+        if dimension is None:
+            raise ValueError(f"Unknown filter dimension '{alias}'. Use one of: query, page, country, device, searchAppearance")
+
+        # Values: one or more quoted, /regex/ or bare terms separated by |
+        values = []
+        while True:
+            match = API_FILTER_VALUE_PATTERN.match(expression, position)
+            if not match:
+                raise ValueError(f"Missing value after '{alias}{operator}'")
+            position = match.end()
+            if match.group(2) is not None:
+                values.append(("regex", match.group(2).replace("\\/", "/")))
+            elif match.group(1) is not None:
+                values.append(("text", match.group(1).replace('\\"', '"')))
+            else:
+                values.append(("text", match.group(3)))
+            separator = API_FILTER_ALTERNATIVE_PATTERN.match(expression, position)
+            if not separator:
+                break
+            position = separator.end()
+        is_regex = any(kind == "regex" for kind, _ in values)
+
+        if dimension in ("device", "country", "searchAppearance"):
+            if operator not in ("=", "!=") or is_regex or len(values) > 1:
+                raise ValueError(f"{dimension} filters only support = and != with a single value")
+            value = values[0][1]
+            if dimension == "device":
+                value = value.upper()
+                if value not in API_FILTER_DEVICES:
+                    raise ValueError(f"Invalid device '{values[0][1]}'. Use one of: {', '.join(API_FILTER_DEVICES)}")
+            elif dimension == "country":
+                value = value.lower()
+                if not re.fullmatch(r"[a-z]{3}", value):
+                    raise ValueError(f"Invalid country '{values[0][1]}'. Use an ISO 3166-1 alpha-3 code such as usa")
+            else:
+                value = value.upper()
+            clauses.append((dimension, "equals" if operator == "=" else "notEquals", value))
+            continue
+
+        if len(values) == 1 and not is_regex:
+            api_operator = {"=": "equals", "!=": "notEquals", "~": "contains", "!~": "notContains"}[operator]
+            clauses.append((dimension, api_operator, values[0][1]))
+            continue
+
+        # Alternatives and regex values compile to one RE2 pattern
+        parts = [value if kind == "regex" else re2_escape(value) for kind, value in values]
+        pattern = parts[0] if len(parts) == 1 else "|".join(f"(?:{part})" for part in parts)
+        if operator in ("=", "!="):
+            pattern = f"^(?:{pattern})$"
+        elif not is_regex:
+            # contains and notContains ignore case; keep that for their alternatives
+            pattern = f"(?i){pattern}"
+        if len(pattern) > API_FILTER_REGEX_MAX:
+            raise ValueError(f"Regex for {dimension} is longer than {API_FILTER_REGEX_MAX} characters")
+        if any(match.group("unsupported") for match in RE2_UNSUPPORTED.finditer(pattern)):
+            raise ValueError(
+                f"Regex for {dimension} uses backreferences, lookarounds, atomic groups or possessive "
+                "quantifiers, which the API's RE2 engine does not support"
+            )
+        clauses.append((dimension, "includingRegex" if operator in ("=", "~") else "excludingRegex", pattern))
+
+    if not clauses:
+        raise ValueError("Empty filter expression")
+    return tuple(clauses)
+
+def compile_api_filters(expression: Optional[str], extra: Optional[List[tuple]] = None) -> List[Dict[str, Any]]:
+    """
+    Returns dimensionFilterGroups for an API filter expression, one group per dimension.
+
+    All groups and all filters within a group must match, so only matching rows leave the API.
+
+    Args:
+        expression: Filter expression (see parse_api_filters); None or blank adds nothing
+        extra: Additional (dimension, operator, expression) filters, e.g. a fixed page filter
+    """
+    clauses = list(extra or [])
+    if expression and expression.strip():
+        clauses.extend(parse_api_filters(expression.strip()))
+    groups = {}
+    for dimension, operator, value in clauses:
+        groups.setdefault(dimension, []).append({"dimension": dimension, "operator": operator, "expression": value})
+    return [{"groupType": "and", "filters": filters} for filters in groups.values()]
+
+# On-disk cache for URL Inspection results, the scarcest API quota
+INSPECTION_CACHE_DIR = os.environ.get("GSC_INSPECTION_CACHE_DIR") or os.path.join(SCRIPT_DIR, ".inspection_cache")
+INSPECTION_CACHE_TTL = int(os.environ.get("GSC_INSPECTION_CACHE_TTL", 86400))
+# Only used with a shared cache backend; the file cache is bounded by disk space
+INSPECTION_CACHE_MAX_ENTRIES = int(os.environ.get("GSC_INSPECTION_CACHE_MAX_ENTRIES", 100000))
+# Maximum number of URLs per batch_url_inspection or check_indexing_issues call
+INSPECTION_BATCH_LIMIT = 10
+
+class InspectionCache:
+    """
+    Persistent cache of raw `inspectionResult` payloads, one JSON file per property and URL.
+
+    Each entry records its own expiry time, so a TTL change only affects newly
+    cached URLs. Files are written atomically and can be shared between processes.
+    With a shared CACHE_BACKEND configured, entries are stored there instead of in files.
+    """
+    def __init__(self, directory: str, ttl: int, backend: Optional[CacheBackend] = None):
+        self.directory = directory
+        self.ttl = ttl
+        self.shared = SharedCache(backend, "inspection", ttl, INSPECTION_CACHE_MAX_ENTRIES) if backend else None
+
+    def _path(self, site_url: str, page_url: str) -> str:
+        digest = hashlib.sha256(f"{site_url}\n{page_url}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def get(self, site_url: str, page_url: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached entry ({"inspectionResult", "inspectedAt", "expiresAt"}) if still fresh."""
+        if self.shared is not None:
+            return self.shared.get((site_url, page_url))
+        try:
+            with open(self._path(site_url, page_url)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expiresAt", 0) < time.time():
+            return None
+        return entry
+
+    def set(self, site_url: str, page_url: str, inspection: Dict[str, Any], ttl: Optional[int] = None):
+        now = time.time()
+        entry = {
+            "siteUrl": site_url,
+            "inspectionUrl": page_url,
+            "inspectedAt": now,
+            "expiresAt": now + (self.ttl if ttl is None else ttl),
+            "inspectionResult": inspection,
+        }
+        if self.shared is not None:
+            self.shared.set((site_url, page_url), entry, entry["expiresAt"] - now)
+            return
+        path = self._path(site_url, page_url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            # Caching is best effort; the inspection itself already succeeded
+            print(f"Could not write inspection cache entry: {str(e)}", file=sys.stderr)
+
+INSPECTION_CACHE = InspectionCache(INSPECTION_CACHE_DIR, INSPECTION_CACHE_TTL, CACHE_BACKEND)
+
+async def inspect_url(service, site_url: str, page_url: str, force_refresh: bool = False) -> tuple:
+    """
+    Returns (inspectionResult, inspected_at) for a URL, using INSPECTION_CACHE when possible.
+
+    inspectionResult is None when the API returned no inspection data. inspected_at is
+    a datetime for results served from the cache and None for fresh API results.
+    """
+    if not force_refresh:
+        entry = INSPECTION_CACHE.get(site_url, page_url)
+        if entry is not None:
+            return entry["inspectionResult"], datetime.fromtimestamp(entry["inspectedAt"])
+
+    request = {
+        "inspectionUrl": page_url,
+        "siteUrl": site_url
+    }
+    if CREDENTIAL_POOL is not None:
+        response = await CREDENTIAL_POOL.execute(
+            "inspection", site_url, lambda pooled: pooled.urlInspection().index().inspect(body=request)
+        )
+    else:
+        response = await QUOTA.run("inspection", lambda: service.urlInspection().index().inspect(body=request).execute())
+
+    if not response or "inspectionResult" not in response:
+        return None, None
+
+    INSPECTION_CACHE.set(site_url, page_url, response["inspectionResult"])
+    return response["inspectionResult"], None
+
+async def inspect_urls(service, site_url: str, url_list: List[str], force_refresh: bool = False,
+                       describe=None) -> List[tuple]:
+    """
+    Inspects URLs concurrently and returns (page_url, inspectionResult, inspected_at, error) for each, in order.
+
+    At most MAX_CONCURRENCY inspections run at once; QUOTA or CREDENTIAL_POOL paces the API
+    calls. A failed URL carries its exception as `error`; a deadline or cancellation stops
+    the whole batch. `describe`, if given, formats a finished URL as partial job output.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    finished = 0
+
+    async def inspect_one(page_url: str) -> tuple:
+        nonlocal finished
+        async with semaphore:
+            try:
+                outcome = (page_url, *await inspect_url(service, site_url, page_url, force_refresh), None)
+            except (DeadlineExceeded, RequestCancelled):
+                raise
+            except Exception as e:
+                outcome = (page_url, None, None, e)
+        finished += 1
+        report_progress(done=finished, total=len(url_list), message=f"Inspected {page_url}",
+                        partial=describe(*outcome) if describe else None)
+        return outcome
+
+    tasks = [asyncio.ensure_future(inspect_one(page_url)) for page_url in url_list]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def inspection_batch_limit(site_url: str) -> int:
+    """Most URLs one batch may inspect: INSPECTION_BATCH_LIMIT, or what the credential pool has left for the property today."""
+    if CREDENTIAL_POOL is None:
+        return INSPECTION_BATCH_LIMIT
+    await CREDENTIAL_POOL.refresh_access()
+    return max(INSPECTION_BATCH_LIMIT, await asyncio.to_thread(CREDENTIAL_POOL.remaining, "inspection", site_url))
+
+# Background jobs are persisted here so they survive a restart
+JOBS_DIR = os.environ.get("GSC_JOBS_DIR", os.path.join(SCRIPT_DIR, ".jobs"))
+JOB_WORKERS = int(os.environ.get("GSC_JOB_WORKERS", 4))
+# Finished jobs are deleted this many seconds after completion
+JOB_RETENTION = int(os.environ.get("GSC_JOB_RETENTION", 7 * 86400))
+JOB_FINAL_STATES = ("succeeded", "failed", "cancelled")
+# Tools without side effects; only these are run again when a restart interrupted them
+JOB_RESUMABLE_TOOLS = frozenset((
+    "list_properties", "get_site_details", "get_sitemaps", "list_sitemaps_enhanced", "get_sitemap_details",
+    "get_search_analytics", "get_performance_overview", "get_advanced_search_analytics", "compare_search_periods",
+    "get_search_by_page_query", "detect_performance_anomalies", "filter_search_analytics", "get_performance_rollup",
+    "compare_multiple_periods", "cluster_queries", "inspect_url_enhanced", "batch_url_inspection",
+    "check_indexing_issues", "crawl_sitemap", "get_creator_info",
+))
+
+# Id of the background job running the current tool call, if any
+CURRENT_JOB = contextvars.ContextVar("current_job", default=None)
+
+def report_progress(done: Optional[int] = None, total: Optional[int] = None,
+                    message: Optional[str] = None, partial: Optional[str] = None):
+    """
+    Records progress for the background job running the current tool call; a no-op otherwise.
+
+    Also serves as a cancellation point: raises once the job or request has been cancelled
+    or has run out of time, so long loops in blocking code stop at the next report.
+
+    Args:
+        done: Units of work finished so far
+        total: Total units of work, if known
+        message: Short description of the current step
+        partial: A partial result line clients can read before the job finishes
+    """
+    check_deadline()
+    job_id = CURRENT_JOB.get()
+    if job_id is not None:
+        JOBS.update_progress(job_id, done, total, message, partial)
+
+class JobManager:
+    """
+    Runs tool calls as background jobs that clients poll for status, progress and partial results.
+
+    Every job runs in its own event loop on a worker thread, so one blocking tool never
+    delays another. Job records are written to `directory` as one JSON file each. At
+    start(), jobs that were queued or running when their process stopped are queued again
+    if they never started or their tool is in JOB_RESUMABLE_TOOLS; the others may already
+    have changed something, such as a submitted sitemap, and are marked failed instead.
+
+    With several server workers the directory is shared: a job belongs to the process that
+    runs it, other workers read its record from disk and request cancellation through a
+    marker file.
+    """
+
+    def __init__(self, directory: str, workers: int, retention: int):
+        self.directory = directory
+        self.workers = workers
+        self.retention = retention
+        self._jobs = {}
+        self._futures = {}
+        self._tasks = {}
+        self._saved_at = {}
+        self._lock = threading.RLock()
+        self._executor = None
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _load(self, job_id: str) -> Dict[str, Any]:
+        """Reads a job record owned by another worker."""
+        if not all(c in "0123456789abcdef" for c in job_id):
+            raise KeyError(job_id)
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise KeyError(job_id)
+
+    @staticmethod
+    def _owner_alive(job: Dict[str, Any]) -> bool:
+        owner = job.get("owner")
+        if not owner or owner == os.getpid():
+            return False
+        return process_alive(owner)
+
+    def _claim(self, job: Dict[str, Any]) -> bool:
+        """Makes sure only one worker re-queues a job whose owner has died."""
+        try:
+            fd = os.open(os.path.join(self.directory, f"{job['id']}.claim-{job.get('owner')}"),
+                         os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        except OSError:
+            return True
+        os.close(fd)
+        return True
+
+    def _cancel_marker(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.cancel")
+
+    def _save(self, job: Dict[str, Any]):
+        path = self._path(job["id"])
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(job, f)
+            os.replace(temp_path, path)
+            self._saved_at[job["id"]] = time.monotonic()
+        except OSError as e:
+            print(f"Could not persist job {job['id']}: {str(e)}", file=sys.stderr)
+
+    def start(self):
+        """Starts the worker threads and resumes interrupted jobs; called once the server starts serving."""
+        self._ensure_started()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gsc-job")
+            self._restore()
+
+    def _restore(self):
+        try:
+            names_all = os.listdir(self.directory)
+        except OSError:
+            return
+        names = [name for name in names_all if name.endswith(".json")]
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path) as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if job["status"] in JOB_FINAL_STATES:
+                if now - job.get("finishedAt", now) > self.retention:
+                    for leftover in names_all:
+                        if not leftover.startswith(f"{job['id']}."):
+                            continue
+                        try:
+                            os.remove(os.path.join(self.directory, leftover))
+                        except OSError:
+                            pass
+                    continue
+                if self._owner_alive(job):
+                    continue
+            else:
+                if self._owner_alive(job) or not self._claim(job):
+                    continue
+                job["owner"] = os.getpid()
+                if job["attempts"] and job["tool"] not in JOB_RESUMABLE_TOOLS:
+                    self._finish(job, "failed", error=(
+                        f"Interrupted by a server restart. {job['tool']} is not run again automatically "
+                        f"because it may already have made changes; check its effect and submit it again if needed."
+                    ))
+                else:
+                    job["status"] = "queued"
+                    job["progress"]["message"] = "Re-queued after server restart"
+                    self._save(job)
+                    self._futures[job["id"]] = self._executor.submit(self._run, job["id"])
+            self._jobs[job["id"]] = job
+
+    def _view(self, job: Dict[str, Any], since: int = 0) -> Dict[str, Any]:
+        view = {key: value for key, value in job.items() if key != "partial"}
+        view["partial"] = job["partial"][since:]
+        view["partialOffset"] = since
+        return json.loads(json.dumps(view))
+
+    def submit(self, tool: str, parameters: Dict[str, Any], profile_mode: str = "") -> Dict[str, Any]:
+        if tool not in mcp.tools:
+            raise ValueError(f"Tool '{tool}' not found")
+        self._ensure_started()
+        job = {
+            "id": uuid.uuid4().hex,
+            "tool": tool,
+            "parameters": parameters,
+            "status": "queued",
+            "owner": os.getpid(),
+            "createdAt": time.time(),
+            "startedAt": None,
+            "finishedAt": None,
+            "attempts": 0,
+            "cancelRequested": False,
+            "progress": {"done": None, "total": None, "message": None},
+            "partial": [],
+            "result": None,
+            "error": None,
+            "profileMode": profile_mode,
+            "profile": None,
+        }
+        with self._lock:
+            self._jobs[job["id"]] = job
+            self._save(job)
+            self._futures[job["id"]] = self._executor.submit(self._run, job["id"])
+            return self._view(job)
+
+    def get(self, job_id: str, since: int = 0) -> Dict[str, Any]:
+        """Returns the job record with partial results from offset `since` on."""
+        self._ensure_started()
+        with self._lock:
+            if job_id not in self._jobs:
+                return self._view(self._load(job_id), since)
+            return self._view(self._jobs[job_id], since)
+
+    def list(self) -> List[Dict[str, Any]]:
+        self._ensure_started()
+        with self._lock:
+            jobs = dict(self._jobs)
+        if WORKERS > 1:
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                names = []
+            for name in names:
+                job_id = name[:-len(".json")]
+                if name.endswith(".json") and job_id not in jobs:
+                    try:
+                        jobs[job_id] = self._load(job_id)
+                    except KeyError:
+                        pass
+        with self._lock:
+            jobs = sorted(jobs.values(), key=lambda job: job["createdAt"], reverse=True)
+            return [
+                {key: job[key] for key in ("id", "tool", "status", "createdAt", "finishedAt", "progress")}
+                for job in jobs
+            ]
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        self._ensure_started()
+        with self._lock:
+            if job_id not in self._jobs:
+                job = self._load(job_id)
+                if job["status"] not in JOB_FINAL_STATES:
+                    # The owning worker picks this up at its next progress report
+                    with open(self._cancel_marker(job_id), "w"):
+                        pass
+                    job["cancelRequested"] = True
+                return self._view(job)
+            job = self._jobs[job_id]
+            if job["status"] not in JOB_FINAL_STATES:
+                job["cancelRequested"] = True
+                future = self._futures.get(job_id)
+                if future is not None and future.cancel():
+                    self._finish(job, "cancelled")
+                else:
+                    scope = self._tasks.get(job_id)
+                    if scope is not None:
+                        scope.cancel("Job cancelled")
+                    self._save(job)
+            return self._view(job)
+
+    def update_progress(self, job_id: str, done, total, message, partial):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if job["cancelRequested"]:
+                raise asyncio.CancelledError()
+            progress = job["progress"]
+            if done is not None:
+                progress["done"] = done
+            if total is not None:
+                progress["total"] = total
+            if message is not None:
+                progress["message"] = message
+            if partial is not None:
+                job["partial"].append(partial)
+            # Progress is persisted, and cancellation from other workers checked, at most once per second
+            if time.monotonic() - self._saved_at.get(job_id, 0) >= 1:
+                if WORKERS > 1 and os.path.exists(self._cancel_marker(job_id)):
+                    job["cancelRequested"] = True
+                    raise asyncio.CancelledError()
+                self._save(job)
+
+    def _finish(self, job: Dict[str, Any], status: str, result: Optional[str] = None, error: Optional[str] = None):
+        job["status"] = status
+        job["result"] = result
+        job["error"] = error
+        job["finishedAt"] = time.time()
+        self._futures.pop(job["id"], None)
+        self._save(job)
+
+    def _run(self, job_id: str):
+        asyncio.run(self._execute(job_id))
+
+    async def _execute(self, job_id: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            if job["cancelRequested"] or os.path.exists(self._cancel_marker(job_id)):
+                self._finish(job, "cancelled")
+                return
+            job["status"] = "running"
+            job["startedAt"] = time.time()
+            job["attempts"] += 1
+            scope = self._tasks[job_id] = RequestScope()
+            scope.attach(asyncio.current_task())
+            self._save(job)
+
+        token = CURRENT_JOB.set(job_id)
+        scope_token = REQUEST_SCOPE.set(scope)
+        profile_mode = job.get("profileMode")
+        profiler = ToolProfiler(profile_mode, job["tool"]) if profile_mode else None
+        try:
+            if profiler is not None:
+                profiler.start()
+            result = await mcp.tools[job["tool"]](**job["parameters"])
+            if isinstance(result, str) and result.startswith("Error"):
+                outcome = ("failed", result, result)
+            else:
+                outcome = ("succeeded", result, None)
+        except asyncio.CancelledError:
+            outcome = ("cancelled", None, None)
+        except Exception as e:
+            outcome = ("failed", None, str(e))
+        finally:
+            REQUEST_SCOPE.reset(scope_token)
+            CURRENT_JOB.reset(token)
+            if profiler is not None and profiler.started is not None:
+                try:
+                    job["profile"] = profiler.stop()
+                    print(f"Profile of job {job_id} written to {job['profile']['path']}", file=sys.stderr)
+                except Exception as e:
+                    print(f"Writing profile of job {job_id} failed: {str(e)}", file=sys.stderr)
+
+        with self._lock:
+            self._tasks.pop(job_id, None)
+            self._finish(job, *outcome)
+
+JOBS = JobManager(JOBS_DIR, JOB_WORKERS, JOB_RETENTION)
+
+# Sitemap files are limited to 50,000 URLs; indexes may nest one level deep in practice
+SITEMAP_MAX_DEPTH = 3
+SITEMAP_USER_AGENT = "mcp-gsc sitemap crawler"
+
+def iter_sitemap_locs(stream) -> Iterator[tuple]:
+    """
+    Incrementally parses a sitemap or sitemap index and yields ("url" | "sitemap", loc).
+
+    Elements are cleared as soon as their <loc> has been read, so memory stays flat
+    no matter how many entries the file holds.
+    """
+    root = None
+    kind = "url"
+    for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            if root is None:
+                root = elem
+                kind = "sitemap" if tag == "sitemapindex" else "url"
+            continue
+        if tag == "loc" and elem.text:
+            yield kind, elem.text.strip()
+        elif tag in ("url", "sitemap"):
+            # Drop finished entries from the tree to keep memory flat
+            root.clear()
+
+def fetch_sitemap(session, sitemap_url: str, timeout: int) -> tuple:
+    """
+    Streams one sitemap over HTTP and returns (page_urls, child_sitemaps).
+
+    Gzipped sitemap files (.xml.gz) are decompressed on the fly.
+    """
+    page_urls = []
+    child_sitemaps = []
+    with session.get(sitemap_url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        stream = response.raw
+        # .xml.gz files are served as gzip payloads, not with a gzip Content-Encoding
+        content_type = response.headers.get("Content-Type", "")
+        is_gzip_file = sitemap_url.endswith(".gz") or "gzip" in content_type
+        if is_gzip_file and "gzip" not in response.headers.get("Content-Encoding", ""):
+            stream = gzip.GzipFile(fileobj=stream)
+        for kind, loc in iter_sitemap_locs(stream):
+            (child_sitemaps if kind == "sitemap" else page_urls).append(loc)
+    return page_urls, child_sitemaps
+
+def crawl_sitemaps(sitemap_url: str, max_urls: int = 50000, concurrency: int = 8, timeout: int = 30) -> Dict[str, Any]:
+    """
+    Fetches a sitemap or sitemap index and all child sitemaps concurrently.
+
+    Child sitemaps are fetched level by level on a thread pool that shares one
+    keep-alive connection pool. Returns the deduplicated page URLs in discovery
+    order along with the sitemaps fetched and any per-sitemap errors.
+    """
+    import requests
+
+    session = requests.Session()
+    session.headers["User-Agent"] = SITEMAP_USER_AGENT
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    urls = {}  # dict keeps discovery order for deduplicated URLs
+    fetched = []
+    errors = {}
+    seen_sitemaps = {sitemap_url}
+    level = [sitemap_url]
+    depth = 0
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while level and depth < SITEMAP_MAX_DEPTH and len(urls) < max_urls:
+                futures = {executor.submit(fetch_sitemap, session, url, timeout): url for url in level}
+                next_level = []
+                for future in as_completed(futures):
+                    url = futures[future]
+                    try:
+                        page_urls, child_sitemaps = future.result()
+                    except Exception as e:
+                        errors[url] = str(e)
+                        continue
+                    fetched.append(url)
+                    report_progress(done=len(urls), message=f"{len(fetched)} sitemaps fetched")
+                    for page_url in page_urls:
+                        if len(urls) >= max_urls:
+                            break
+                        urls.setdefault(page_url, None)
+                    for child in child_sitemaps:
+                        if child not in seen_sitemaps:
+                            seen_sitemaps.add(child)
+                            next_level.append(child)
+                level = next_level
+                depth += 1
+    finally:
+        session.close()
+
+    return {
+        "urls": list(urls),
+        "sitemaps": fetched,
+        "errors": errors,
+        "skipped_sitemaps": level if len(urls) < max_urls else [],
+        "truncated": len(urls) >= max_urls,
+    }
+
+def rolling_zscores(series: List[float], baseline_days: int, recent_days: int) -> List[float]:
+    """
+    Computes z-scores of the last `recent_days` values against a trailing baseline.
+
+    Each recent day is scored against the `baseline_days` values immediately before it,
+    using prefix sums so every window costs O(1). The standard deviation is floored at
+    the Poisson noise level of the baseline mean so sparse series don't produce huge scores.
+    """
+    n = len(series)
+    prefix = list(accumulate(series, initial=0.0))
+    prefix_sq = list(accumulate(map(mul, series, series), initial=0.0))
+
+    scores = []
+    for t in range(max(n - recent_days, baseline_days), n):
+        lo = t - baseline_days
+        mean = (prefix[t] - prefix[lo]) / baseline_days
+        variance = (prefix_sq[t] - prefix_sq[lo]) / baseline_days - mean * mean
+        std = max(variance, 0.0) ** 0.5
+        std = max(std, mean ** 0.5, 1.0)
+        scores.append((series[t] - mean) / std)
+    return scores
+
+@mcp.tool()
+async def list_properties() -> str:
+    """
+    Retrieves and returns the user's Search Console properties.
+    """
+    try:
+        service = get_gsc_service()
+        site_list = await QUOTA.run("sites", lambda: service.sites().list().execute())
+
+        # site_list is typically something like:
+        # {
+        #   "siteEntry": [
+        #       {"siteUrl": "...", "permissionLevel": "..."},
+        #       ...
+        #   ]
+        # }
+        sites = site_list.get("siteEntry", [])
+
+        if not sites:
+            return "No Search Console properties found."
+
+        # Format the results for easy reading
+        lines = []
+        for site in sites:
+            site_url = site.get("siteUrl", "Unknown")
+            permission = site.get("permissionLevel", "Unknown permission")
+            lines.append(f"- {site_url} ({permission})")
+
+        return "\n".join(lines)
+    except FileNotFoundError as e:
+        return (
+            "Error: Service account credentials file not found.\n\n"
+            "To access Google Search Console, please:\n"
+            "1. Create a service account in Google Cloud Console\n"
+            "2. Download the JSON credentials file\n"
+            "3. Save it as 'service_account_credentials.json' in the same directory as this script\n"
+            "4. Share your GSC properties with the service account email"
+        )
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error retrieving properties: {str(e)}"
+
+@mcp.tool()
+async def add_site(site_url: str) -> str:
+    """
+    Add a site to your Search Console properties.
+    
+    Args:
+        site_url: The URL of the site to add (must be exact match e.g. https://example.com, or https://www.example.com, or https://subdomain.example.com/path/, for domain properties use format: sc-domain:example.com)
+    """
+    try:
+        service = get_gsc_service()
+        
         # Add the site
-        response = service.sites().add(siteUrl=site_url).execute()
+        response = await QUOTA.run("sites", lambda: service.sites().add(siteUrl=site_url).execute())
+        
+        # Format the response
+        result_lines = [f"Site {site_url} has been added to Search Console."]
+        
+        # Add permission level if available
+        if "permissionLevel" in response:
+            result_lines.append(f"Permission level: {response['permissionLevel']}")
+        
+        return "\n".join(result_lines)
+    except HttpError as e:
+        error_content = json.loads(e.content.decode('utf-8'))
+        error_details = error_content.get('error', {})
+        error_code = e.resp.status
+        error_message = error_details.get('message', str(e))
+        error_reason = error_details.get('errors', [{}])[0].get('reason', '')
+        
+        if error_code == 409:
+            return f"Site {site_url} is already added to Search Console."
+        elif error_code == 403:
+            if error_reason == 'forbidden':
+                return f"Error: You don't have permission to add this site. Please verify ownership first."
+            elif error_reason == 'quotaExceeded':
+                return f"Error: API quota exceeded. Please try again later."
+            else:
+                return f"Error: Permission denied. {error_message}"
+        elif error_code == 400:
+            if error_reason == 'invalidParameter':
+                return f"Error: Invalid site URL format. Please check the URL format and try again."
+            else:
+                return f"Error: Bad request. {error_message}"
+        elif error_code == 401:
+            return f"Error: Unauthorized. Please check your credentials."
+        elif error_code == 429:
+            return f"Error: Too many requests. Please try again later."
+        elif error_code == 500:
+            return f"Error: Internal server error from Google Search Console API. Please try again later."
+        elif error_code == 503:
+            return f"Error: Service unavailable. Google Search Console API is currently down. Please try again later."
+        else:
+            return f"Error adding site (HTTP {error_code}): {error_message}"
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error adding site: {str(e)}"
+
+@mcp.tool()
+async def delete_site(site_url: str) -> str:
+    """
+    Remove a site from your Search Console properties.
+    
+    Args:
+        site_url: The URL of the site to remove (must be exact match e.g. https://example.com, or https://www.example.com, or https://subdomain.example.com/path/, for domain properties use format: sc-domain:example.com)
+    """
+    try:
+        service = get_gsc_service()
+        
+        # Delete the site
+        await QUOTA.run("sites", lambda: service.sites().delete(siteUrl=site_url).execute())
+        
+        return f"Site {site_url} has been removed from Search Console."
+    except HttpError as e:
+        error_content = json.loads(e.content.decode('utf-8'))
+        error_details = error_content.get('error', {})
+        error_code = e.resp.status
+        error_message = error_details.get('message', str(e))
+        error_reason = error_details.get('errors', [{}])[0].get('reason', '')
+        
+        if error_code == 404:
+            return f"Site {site_url} was not found in Search Console."
+        elif error_code == 403:
+            if error_reason == 'forbidden':
+                return f"Error: You don't have permission to remove this site."
+            elif error_reason == 'quotaExceeded':
+                return f"Error: API quota exceeded. Please try again later."
+            else:
+                return f"Error: Permission denied. {error_message}"
+        elif error_code == 400:
+            if error_reason == 'invalidParameter':
+                return f"Error: Invalid site URL format. Please check the URL format and try again."
+            else:
+                return f"Error: Bad request. {error_message}"
+        elif error_code == 401:
+            return f"Error: Unauthorized. Please check your credentials."
+        elif error_code == 429:
+            return f"Error: Too many requests. Please try again later."
+        elif error_code == 500:
+            return f"Error: Internal server error from Google Search Console API. Please try again later."
+        elif error_code == 503:
+            return f"Error: Service unavailable. Google Search Console API is currently down. Please try again later."
+        else:
+            return f"Error removing site (HTTP {error_code}): {error_message}"
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error removing site: {str(e)}"
+
+@mcp.tool()
+async def get_search_analytics(site_url: str, days: int = 28, dimensions: str = "query", filters: str = None, force_refresh: bool = False) -> str:
+    """
+    Get search analytics data for a specific property.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match)
+        days: Number of days to look back (default: 28)
+        dimensions: Dimensions to group by (default: query). Options: query, page, device, country, date
+                   You can provide multiple dimensions separated by comma (e.g., "query,page")
+        filters: Filters applied by the API, e.g. query~shoes|boots; page!~"/tag/"; device=MOBILE.
+                 Operators: = equals, != not equals, ~ contains, !~ does not contain, /regex/ values for RE2
+                 regular expressions, | for alternatives; clauses joined with ; or AND must all match
+        force_refresh: Ignore cached analytics results and query the API again (default: false)
+    """
+    try:
+        service = get_gsc_service()
+        
+        # Calculate date range
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days)
+        
+        # Parse dimensions
+        dimension_list = [d.strip() for d in dimensions.split(",")]
+        
+        # Build request
+        request = {
+            "startDate": start_date.strftime("%Y-%m-%d"),
+            "endDate": end_date.strftime("%Y-%m-%d"),
+            "dimensions": dimension_list,
+            "rowLimit": 20  # Limit to top 20 results
+        }
+        if filters:
+            try:
+                request["dimensionFilterGroups"] = compile_api_filters(filters)
+            except ValueError as e:
+                return f"Invalid filters: {str(e)}"
+        
+        # Execute request
+        rows = await asyncio.to_thread(fetch_analytics_rows, service, site_url, request, use_cache=not force_refresh)
+        
+        if not rows:
+            return f"No search analytics data found for {site_url} in the last {days} days" + (f" matching {filters}." if filters else ".")
+        
+        # Format results
+        result_lines = [f"Search analytics for {site_url} (last {days} days):"]
+        if filters:
+            result_lines.append(f"Filters: {filters}")
+        result_lines.append("\n" + "-" * 80 + "\n")
+        
+        # Create header based on dimensions
+        header = []
+        for dim in dimension_list:
+            header.append(dim.capitalize())
+        header.extend(["Clicks", "Impressions", "CTR", "Position"])
+        result_lines.append(" | ".join(header))
+        result_lines.append("-" * 80)
+        
+        # Add data rows
+        for row in rows:
+            data = []
+            # Add dimension values
+            for dim_value in row.get("keys", []):
+                data.append(dim_value[:100])  # Increased truncation limit to 100 characters
+            
+            # Add metrics
+            data.append(str(row.get("clicks", 0)))
+            data.append(str(row.get("impressions", 0)))
+            data.append(f"{row.get('ctr', 0) * 100:.2f}%")
+            data.append(f"{row.get('position', 0):.1f}")
+            
+            result_lines.append(" | ".join(data))
+        
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error retrieving search analytics: {str(e)}"
+
+@mcp.tool()
+async def get_site_details(site_url: str) -> str:
+    """
+    Get detailed information about a specific Search Console property.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match)
+    """
+    try:
+        service = get_gsc_service()
+        
+        # Get site details
+        site_info = await QUOTA.run("sites", lambda: service.sites().get(siteUrl=site_url).execute())
+        
+        # Format the results
+        result_lines = [f"Site details for {site_url}:"]
+        result_lines.append("-" * 50)
+        
+        # Add basic info
+        result_lines.append(f"Permission level: {site_info.get('permissionLevel', 'Unknown')}")
+        
+        # Add verification info if available
+        if "siteVerificationInfo" in site_info:
+            verify_info = site_info["siteVerificationInfo"]
+            result_lines.append(f"Verification state: {verify_info.get('verificationState', 'Unknown')}")
+            
+            if "verifiedUser" in verify_info:
+                result_lines.append(f"Verified by: {verify_info['verifiedUser']}")
+                
+            if "verificationMethod" in verify_info:
+                result_lines.append(f"Verification method: {verify_info['verificationMethod']}")
+        
+        # Add ownership info if available
+        if "ownershipInfo" in site_info:
+            owner_info = site_info["ownershipInfo"]
+            result_lines.append("\nOwnership Information:")
+            result_lines.append(f"Owner: {owner_info.get('owner', 'Unknown')}")
+            
+            if "verificationMethod" in owner_info:
+                result_lines.append(f"Ownership verification: {owner_info['verificationMethod']}")
+        
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error retrieving site details: {str(e)}"
+
+@mcp.tool()
+async def get_sitemaps(site_url: str) -> str:
+    """
+    List all sitemaps for a specific Search Console property.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match)
+    """
+    try:
+        service = get_gsc_service()
+        
+        # Get sitemaps list
+        sitemaps = await QUOTA.run("sitemaps", lambda: service.sitemaps().list(siteUrl=site_url).execute())
+        
+        if not sitemaps.get("sitemap"):
+            return f"No sitemaps found for {site_url}."
+        
+        # Format the results
+        result_lines = [f"Sitemaps for {site_url}:"]
+        result_lines.append("-" * 80)
+        
+        # Header
+        result_lines.append("Path | Last Downloaded | Status | Indexed URLs | Errors")
+        result_lines.append("-" * 80)
+        
+        # Add each sitemap
+        for sitemap in sitemaps.get("sitemap", []):
+            path = sitemap.get("path", "Unknown")
+            last_downloaded = sitemap.get("lastDownloaded", "Never")
+            
+            # Format last downloaded date if it exists
+            if last_downloaded != "Never":
+                try:
+                    # Convert to more readable format
+                    dt = datetime.fromisoformat(last_downloaded.replace('Z', '+00:00'))
+                    last_downloaded = dt.strftime("%Y-%m-%d %H:%M")
+                except:
+                    pass
+            
+            status = "Valid"
+            if "errors" in sitemap and int(sitemap["errors"]) > 0:
+                status = "Has errors"
+            
+            # Get counts
+            warnings = sitemap.get("warnings", 0)
+            errors = sitemap.get("errors", 0)
+            
+            # Get contents if available
+            indexed_urls = "N/A"
+            if "contents" in sitemap:
+                for content in sitemap["contents"]:
+                    if content.get("type") == "web":
+                        indexed_urls = content.get("submitted", "0")
+                        break
+            
+            result_lines.append(f"{path} | {last_downloaded} | {status} | {indexed_urls} | {errors}")
+        
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error retrieving sitemaps: {str(e)}"
+
+@mcp.tool()
+async def inspect_url_enhanced(site_url: str, page_url: str, force_refresh: bool = False) -> str:
+    """
+    Enhanced URL inspection to check indexing status and rich results in Google.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
+        page_url: The specific URL to inspect
+        force_refresh: Ignore cached inspection results and query the API again (default: false)
+    """
+    try:
+        # Pooled credentials bring their own services
+        service = get_gsc_service() if CREDENTIAL_POOL is None else None
+        
+        # Execute request (or reuse a cached inspection)
+        inspection, inspected_at = await inspect_url(service, site_url, page_url, force_refresh)
+        
+        if not inspection:
+            return f"No inspection data found for {page_url}."
+        
+        # Format the results
+        result_lines = [f"URL Inspection for {page_url}:"]
+        if inspected_at:
+            result_lines.append(f"(Cached result from {inspected_at.strftime('%Y-%m-%d %H:%M')}, use force_refresh to re-inspect)")
+        result_lines.append("-" * 80)
+        
+        # Add inspection result link if available
+        if "inspectionResultLink" in inspection:
+            result_lines.append(f"Search Console Link: {inspection['inspectionResultLink']}")
+            result_lines.append("-" * 80)
+        
+        # Indexing status section
+        index_status = inspection.get("indexStatusResult", {})
+        verdict = index_status.get("verdict", "UNKNOWN")
+        
+        result_lines.append(f"Indexing Status: {verdict}")
+        
+        # Coverage state
+        if "coverageState" in index_status:
+            result_lines.append(f"Coverage: {index_status['coverageState']}")
+        
+        # Last crawl
+        if "lastCrawlTime" in index_status:
+            try:
+                crawl_time = datetime.fromisoformat(index_status["lastCrawlTime"].replace('Z', '+00:00'))
+                result_lines.append(f"Last Crawled: {crawl_time.strftime('%Y-%m-%d %H:%M')}")
+            except:
+                result_lines.append(f"Last Crawled: {index_status['lastCrawlTime']}")
+        
+        # Page fetch
+        if "pageFetchState" in index_status:
+            result_lines.append(f"Page Fetch: {index_status['pageFetchState']}")
+        
+        # Robots.txt status
+        if "robotsTxtState" in index_status:
+            result_lines.append(f"Robots.txt: {index_status['robotsTxtState']}")
+        
+        # Indexing state
+        if "indexingState" in index_status:
+            result_lines.append(f"Indexing State: {index_status['indexingState']}")
+        
+        # Canonical information
+        if "googleCanonical" in index_status:
+            result_lines.append(f"Google Canonical: {index_status['googleCanonical']}")
+        
+        if "userCanonical" in index_status and index_status.get("userCanonical") != index_status.get("googleCanonical"):
+            result_lines.append(f"User Canonical: {index_status['userCanonical']}")
+        
+        # Crawled as
+        if "crawledAs" in index_status:
+            result_lines.append(f"Crawled As: {index_status['crawledAs']}")
+        
+        # Referring URLs
+        if "referringUrls" in index_status and index_status["referringUrls"]:
+            result_lines.append("\nReferring URLs:")
+            for url in index_status["referringUrls"][:5]:  # Limit to 5 examples
+                result_lines.append(f"- {url}")
+            
+            if len(index_status["referringUrls"]) > 5:
+                result_lines.append(f"... and {len(index_status['referringUrls']) - 5} more")
+        
+        # Rich results
+        if "richResultsResult" in inspection:
+            rich = inspection["richResultsResult"]
+            result_lines.append(f"\nRich Results: {rich.get('verdict', 'UNKNOWN')}")
+            
+            if "detectedItems" in rich and rich["detectedItems"]:
+                result_lines.append("Detected Rich Result Types:")
+                
+                for item in rich["detectedItems"]:
+                    rich_type = item.get("richResultType", "Unknown")
+                    result_lines.append(f"- {rich_type}")
+                    
+                    # If there are items with names, show them
+                    if "items" in item and item["items"]:
+                        for i, subitem in enumerate(item["items"][:3]):  # Limit to 3 examples
+                            if "name" in subitem:
+                                result_lines.append(f"  • {subitem['name']}")
+                        
+                        if len(item["items"]) > 3:
+                            result_lines.append(f"  • ... and {len(item['items']) - 3} more items")
+            
+            # Check for issues
+            if "richResultsIssues" in rich and rich["richResultsIssues"]:
+                result_lines.append("\nRich Results Issues:")
+                for issue in rich["richResultsIssues"]:
+                    severity = issue.get("severity", "Unknown")
+                    message = issue.get("message", "Unknown issue")
+                    result_lines.append(f"- [{severity}] {message}")
+        
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error inspecting URL: {str(e)}"
+
+@mcp.tool()
+async def batch_url_inspection(site_url: str, urls: str, force_refresh: bool = False) -> str:
+    """
+    Inspect multiple URLs in batch (within API limits).
+    
+    URLs are inspected concurrently. Up to 10 URLs are accepted per call, or as many as the
+    credential pool has daily inspection quota left for when GSC_CREDENTIALS_POOL is set.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
+        urls: List of URLs to inspect, one per line
+        force_refresh: Ignore cached inspection results and query the API again (default: false)
+    """
+    try:
+        # Pooled credentials bring their own services
+        service = get_gsc_service() if CREDENTIAL_POOL is None else None
+        
+        # Parse URLs
+        url_list = [url.strip() for url in urls.split('\n') if url.strip()]
+        
+        if not url_list:
+            return "No URLs provided for inspection."
+        
+        batch_limit = await inspection_batch_limit(site_url)
+        if len(url_list) > batch_limit:
+            return f"Too many URLs provided ({len(url_list)}). Please limit to {batch_limit} URLs per batch to avoid API quota issues."
+        
+        def describe(page_url, inspection, inspected_at, error) -> str:
+            if error is not None:
+                return f"{page_url}: Error - {str(error)}"
+            if not inspection:
+                return f"{page_url}: No inspection data found"
+            
+            index_status = inspection.get("indexStatusResult", {})
+            
+            # Get key information
+            verdict = index_status.get("verdict", "UNKNOWN")
+            coverage = index_status.get("coverageState", "Unknown")
+            last_crawl = "Never"
+            
+            if "lastCrawlTime" in index_status:
+                try:
+                    crawl_time = datetime.fromisoformat(index_status["lastCrawlTime"].replace('Z', '+00:00'))
+                    last_crawl = crawl_time.strftime('%Y-%m-%d')
+                except:
+                    last_crawl = index_status["lastCrawlTime"]
+            
+            # Check for rich results
+            rich_results = "None"
+            if "richResultsResult" in inspection:
+                rich = inspection["richResultsResult"]
+                if rich.get("verdict") == "PASS" and "detectedItems" in rich and rich["detectedItems"]:
+                    rich_types = [item.get("richResultType", "Unknown") for item in rich["detectedItems"]]
+                    rich_results = ", ".join(rich_types)
+            
+            # Format result
+            cached_note = f"\n  Cached: {inspected_at.strftime('%Y-%m-%d %H:%M')}" if inspected_at else ""
+            return f"{page_url}:\n  Status: {verdict} - {coverage}\n  Last Crawl: {last_crawl}\n  Rich Results: {rich_results}{cached_note}\n"
+        
+        # Inspect all URLs concurrently (or reuse cached inspections)
+        outcomes = await inspect_urls(service, site_url, url_list, force_refresh, describe)
+        results = [describe(*outcome) for outcome in outcomes]
+        
+        # Combine results
+        return f"Batch URL Inspection Results for {site_url}:\n\n" + "\n".join(results)
+    
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error performing batch inspection: {str(e)}"
+
+@mcp.tool()
+async def check_indexing_issues(site_url: str, urls: str, force_refresh: bool = False) -> str:
+    """
+    Check for specific indexing issues across multiple URLs.
+    
+    URLs are inspected concurrently. Up to 10 URLs are accepted per call, or as many as the
+    credential pool has daily inspection quota left for when GSC_CREDENTIALS_POOL is set.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
+        urls: List of URLs to check, one per line
+        force_refresh: Ignore cached inspection results and query the API again (default: false)
+    """
+    try:
+        # Pooled credentials bring their own services
+        service = get_gsc_service() if CREDENTIAL_POOL is None else None
+        
+        # Parse URLs
+        url_list = [url.strip() for url in urls.split('\n') if url.strip()]
+        
+        if not url_list:
+            return "No URLs provided for inspection."
+        
+        batch_limit = await inspection_batch_limit(site_url)
+        if len(url_list) > batch_limit:
+            return f"Too many URLs provided ({len(url_list)}). Please limit to {batch_limit} URLs per batch to avoid API quota issues."
+        
+        # Track issues by category
+        issues_summary = {
+            "not_indexed": [],
+            "canonical_issues": [],
+            "robots_blocked": [],
+            "fetch_issues": [],
+            "indexed": []
+        }
         
-        # Format the response
-        result_lines = [f"Site {site_url} has been added to Search Console."]
+        # Inspect all URLs concurrently (or reuse cached inspections), then sort them into categories
+        cached_count = 0
+        for page_url, inspection, inspected_at, error in await inspect_urls(service, site_url, url_list, force_refresh):
+            if error is not None:
+                issues_summary["not_indexed"].append(f"{page_url} - Error: {str(error)}")
+                continue
+            try:
+                if not inspection:
+                    issues_summary["not_indexed"].append(f"{page_url} - No inspection data found")
+                    continue
+                
+                if inspected_at:
+                    cached_count += 1
+                index_status = inspection.get("indexStatusResult", {})
+                
+                # Check indexing status
+                verdict = index_status.get("verdict", "UNKNOWN")
+                coverage = index_status.get("coverageState", "Unknown")
+                
+                if verdict != "PASS" or "not indexed" in coverage.lower() or "excluded" in coverage.lower():
+                    issues_summary["not_indexed"].append(f"{page_url} - {coverage}")
+                else:
+                    issues_summary["indexed"].append(page_url)
+                
+                # Check canonical issues
+                google_canonical = index_status.get("googleCanonical", "")
+                user_canonical = index_status.get("userCanonical", "")
+                
+                if google_canonical and user_canonical and google_canonical != user_canonical:
+                    issues_summary["canonical_issues"].append(
+                        f"{page_url} - Google chose: {google_canonical} instead of user-declared: {user_canonical}"
+                    )
+                
+                # Check robots.txt status
+                robots_state = index_status.get("robotsTxtState", "")
+                if robots_state == "BLOCKED":
+                    issues_summary["robots_blocked"].append(page_url)
+                
+                # Check fetch issues
+                fetch_state = index_status.get("pageFetchState", "")
+                if fetch_state != "SUCCESSFUL":
+                    issues_summary["fetch_issues"].append(f"{page_url} - {fetch_state}")
+            
+            except Exception as e:
+                issues_summary["not_indexed"].append(f"{page_url} - Error: {str(e)}")
         
-        # Add permission level if available
-        if "permissionLevel" in response:
-            result_lines.append(f"Permission level: {response['permissionLevel']}")
+        # Format results
+        result_lines = [f"Indexing Issues Report for {site_url}:"]
+        result_lines.append("-" * 80)
         
-        return "\n".join(result_lines)
-    except HttpError as e:
-        error_content = json.loads(e.content.decode('utf-8'))
-        error_details = error_content.get('error', {})
-        error_code = e.resp.status
-        error_message = error_details.get('message', str(e))
-        error_reason = error_details.get('errors', [{}])[0].get('reason', '')
+        # Summary counts
+        result_lines.append(f"Total URLs checked: {len(url_list)}")
+        result_lines.append(f"Indexed: {len(issues_summary['indexed'])}")
+        result_lines.append(f"Not indexed: {len(issues_summary['not_indexed'])}")
+        result_lines.append(f"Canonical issues: {len(issues_summary['canonical_issues'])}")
+        result_lines.append(f"Robots.txt blocked: {len(issues_summary['robots_blocked'])}")
+        result_lines.append(f"Fetch issues: {len(issues_summary['fetch_issues'])}")
+        if cached_count:
+            result_lines.append(f"Served from inspection cache: {cached_count} (use force_refresh to re-inspect)")
+        result_lines.append("-" * 80)
         
-        if error_code == 409:
-            return f"Site {site_url} is already added to Search Console."
-        elif error_code == 403:
-            if error_reason == 'forbidden':
-                return f"Error: You don't have permission to add this site. Please verify ownership first."
-            elif error_reason == 'quotaExceeded':
-                return f"Error: API quota exceeded. Please try again later."
-            else:
-                return f"Error: Permission denied. {error_message}"
-        elif error_code == 400:
-            if error_reason == 'invalidParameter':
-                return f"Error: Invalid site URL format. Please check the URL format and try again."
-            else:
-                return f"Error: Bad request. {error_message}"
-        elif error_code == 401:
-            return f"Error: Unauthorized. Please check your credentials."
-        elif error_code == 429:
-            return f"Error: Too many requests. Please try again later."
-        elif error_code == 500:
-            return f"Error: Internal server error from Google Search Console API. Please try again later."
-        elif error_code == 503:
-            return f"Error: Service unavailable. Google Search Console API is currently down. Please try again later."
-        else:
-            return f"Error adding site (HTTP {error_code}): {error_message}"
+        # Detailed issues
+        if issues_summary["not_indexed"]:
+            result_lines.append("\nNot Indexed URLs:")
+            for issue in issues_summary["not_indexed"]:
+                result_lines.append(f"- {issue}")
+        
+        if issues_summary["canonical_issues"]:
+            result_lines.append("\nCanonical Issues:")
+            for issue in issues_summary["canonical_issues"]:
+                result_lines.append(f"- {issue}")
+        
+        if issues_summary["robots_blocked"]:
+            result_lines.append("\nRobots.txt Blocked URLs:")
+            for url in issues_summary["robots_blocked"]:
+                result_lines.append(f"- {url}")
+        
+        if issues_summary["fetch_issues"]:
+            result_lines.append("\nFetch Issues:")
+            for issue in issues_summary["fetch_issues"]:
+                result_lines.append(f"- {issue}")
+        
+        return "\n".join(result_lines)
+    
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        return f"Error adding site: {str(e)}"
+        return f"Error checking indexing issues: {str(e)}"
 
 @mcp.tool()
-async def delete_site(site_url: str) -> str:
+async def get_performance_overview(site_url: str, days: int = 28, force_refresh: bool = False) -> str:
     """
-    Remove a site from your Search Console properties.
+    Get a performance overview for a specific property.
     
     Args:
-        site_url: The URL of the site to remove (must be exact match e.g. https://example.com, or https://www.example.com, or https://subdomain.example.com/path/, for domain properties use format: sc-domain:example.com)
+        site_url: The URL of the site in Search Console (must be exact match)
+        days: Number of days to look back (default: 28)
+        force_refresh: Ignore cached analytics results and query the API again (default: false)
     """
     try:
         service = get_gsc_service()
         
-        # Delete the site
-        service.sites().delete(siteUrl=site_url).execute()
+        # Calculate date range
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days)
         
-        return f"Site {site_url} has been removed from Search Console."
-    except HttpError as e:
-        error_content = json.loads(e.content.decode('utf-8'))
-        error_details = error_content.get('error', {})
-        error_code = e.resp.status
-        error_message = error_details.get('message', str(e))
-        error_reason = error_details.get('errors', [{}])[0].get('reason', '')
+        # Get total metrics
+        total_request = {
+            "startDate": start_date.strftime("%Y-%m-%d"),
+            "endDate": end_date.strftime("%Y-%m-%d"),
+            "dimensions": [],  # No dimensions for totals
+            "rowLimit": 1
+        }
         
-        if error_code == 404:
-            return f"Site {site_url} was not found in Search Console."
-        elif error_code == 403:
-            if error_reason == 'forbidden':
-                return f"Error: You don't have permission to remove this site."
-            elif error_reason == 'quotaExceeded':
-                return f"Error: API quota exceeded. Please try again later."
-            else:
-                return f"Error: Permission denied. {error_message}"
-        elif error_code == 400:
-            if error_reason == 'invalidParameter':
-                return f"Error: Invalid site URL format. Please check the URL format and try again."
-            else:
-                return f"Error: Bad request. {error_message}"
-        elif error_code == 401:
-            return f"Error: Unauthorized. Please check your credentials."
-        elif error_code == 429:
-            return f"Error: Too many requests. Please try again later."
-        elif error_code == 500:
-            return f"Error: Internal server error from Google Search Console API. Please try again later."
-        elif error_code == 503:
-            return f"Error: Service unavailable. Google Search Console API is currently down. Please try again later."
+        # Get by date for trend
+        date_request = {
+            "startDate": start_date.strftime("%Y-%m-%d"),
+            "endDate": end_date.strftime("%Y-%m-%d"),
+            "dimensions": ["date"],
+            "rowLimit": days
+        }
+        
+        total_rows, date_rows = await asyncio.gather(
+            asyncio.to_thread(fetch_analytics_rows, service, site_url, total_request, use_cache=not force_refresh),
+            asyncio.to_thread(fetch_analytics_rows, service, site_url, date_request, use_cache=not force_refresh)
+        )
+        
+        # Format results
+        result_lines = [f"Performance Overview for {site_url} (last {days} days):"]
+        result_lines.append("-" * 80)
+        
+        # Add total metrics
+        if total_rows:
+            row = total_rows[0]
+            result_lines.append(f"Total Clicks: {row.get('clicks', 0):,}")
+            result_lines.append(f"Total Impressions: {row.get('impressions', 0):,}")
+            result_lines.append(f"Average CTR: {row.get('ctr', 0) * 100:.2f}%")
+            result_lines.append(f"Average Position: {row.get('position', 0):.1f}")
         else:
-            return f"Error removing site (HTTP {error_code}): {error_message}"
+            result_lines.append("No data available for the selected period.")
+            return "\n".join(result_lines)
+        
+        # Add trend data
+        if date_rows:
+            result_lines.append("\nDaily Trend:")
+            result_lines.append("Date | Clicks | Impressions | CTR | Position")
+            result_lines.append("-" * 80)
+            
+            # Sort by date
+            sorted_rows = sorted(date_rows, key=lambda x: x["keys"][0])
+            
+            for row in sorted_rows:
+                date_str = row["keys"][0]
+                # Format date from YYYY-MM-DD to MM/DD
+                try:
+                    date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+                    date_formatted = date_obj.strftime("%m/%d")
+                except:
+                    date_formatted = date_str
+                
+                clicks = row.get("clicks", 0)
+                impressions = row.get("impressions", 0)
+                ctr = row.get("ctr", 0) * 100
+                position = row.get("position", 0)
+                
+                result_lines.append(f"{date_formatted} | {clicks:.0f} | {impressions:.0f} | {ctr:.2f}% | {position:.1f}")
+        
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        return f"Error removing site: {str(e)}"
+        return f"Error retrieving performance overview: {str(e)}"
 
 @mcp.tool()
-async def get_search_analytics(site_url: str, days: int = 28, dimensions: str = "query") -> str:
+async def get_advanced_search_analytics(
+    site_url: str, 
+    start_date: str = None, 
+    end_date: str = None, 
+    dimensions: str = "query", 
+    search_type: str = "WEB",
+    row_limit: int = 1000,
+    start_row: int = 0,
+    sort_by: str = "clicks",
+    sort_direction: str = "descending",
+    filter_dimension: str = None,
+    filter_operator: str = "contains", 
+    filter_expression: str = None,
+    filters: str = None,
+    force_refresh: bool = False
+) -> str:
     """
-    Get search analytics data for a specific property.
+    Get advanced search analytics data with sorting, filtering, and pagination.
     
     Args:
         site_url: The URL of the site in Search Console (must be exact match)
-        days: Number of days to look back (default: 28)
-        dimensions: Dimensions to group by (default: query). Options: query, page, device, country, date
-                   You can provide multiple dimensions separated by comma (e.g., "query,page")
+        start_date: Start date in YYYY-MM-DD format (defaults to 28 days ago)
+        end_date: End date in YYYY-MM-DD format (defaults to today)
+        dimensions: Dimensions to group by, comma-separated (e.g., "query,page,device")
+        search_type: Type of search results (WEB, IMAGE, VIDEO, NEWS, DISCOVER)
+        row_limit: Maximum number of rows to return (max 25000)
+        start_row: Starting row for pagination
+        sort_by: Metric to sort by (clicks, impressions, ctr, position)
+        sort_direction: Sort direction (ascending or descending)
+        filter_dimension: Dimension to filter on (query, page, country, device)
+        filter_operator: Filter operator (contains, equals, notContains, notEquals)
+        filter_expression: Filter expression value
+        filters: Filters applied by the API, e.g. query~shoes|boots; page!~"/tag/"; device=MOBILE.
+                 Operators: = equals, != not equals, ~ contains, !~ does not contain, /regex/ values for RE2
+                 regular expressions, | for alternatives; clauses joined with ; or AND must all match.
+                 Dimensions: query, page, country, device, searchAppearance. Applied together with filter_dimension
+        force_refresh: Ignore cached analytics results and query the API again (default: false)
     """
     try:
         service = get_gsc_service()
         
-        # Calculate date range
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=days)
+        # Calculate date range if not provided
+        if not end_date:
+            end_date = datetime.now().date().strftime("%Y-%m-%d")
+        if not start_date:
+            start_date = (datetime.now().date() - timedelta(days=28)).strftime("%Y-%m-%d")
         
         # Parse dimensions
         dimension_list = [d.strip() for d in dimensions.split(",")]
         
         # Build request
         request = {
-            "startDate": start_date.strftime("%Y-%m-%d"),
-            "endDate": end_date.strftime("%Y-%m-%d"),
+            "startDate": start_date,
+            "endDate": end_date,
             "dimensions": dimension_list,
-            "rowLimit": 20  # Limit to top 20 results
+            "rowLimit": min(row_limit, 25000),  # Cap at API maximum
+            "startRow": start_row,
+            "searchType": search_type.upper()
         }
         
+        # Add sorting
+        if sort_by:
+            metric_map = {
+                "clicks": "CLICK_COUNT",
+                "impressions": "IMPRESSION_COUNT",
+                "ctr": "CTR",
+                "position": "POSITION"
+            }
+            
+            if sort_by in metric_map:
+                request["orderBy"] = [{
+                    "metric": metric_map[sort_by],
+                    "direction": sort_direction.lower()
+                }]
+        
+        # Add filtering if provided
+        extra = [(filter_dimension, filter_operator, filter_expression)] if filter_dimension and filter_expression else []
+        if extra or filters:
+            try:
+                request["dimensionFilterGroups"] = compile_api_filters(filters, extra)
+            except ValueError as e:
+                return f"Invalid filters: {str(e)}"
+        
         # Execute request
-        response = service.searchanalytics().query(siteUrl=site_url, body=request).execute()
+        rows = await asyncio.to_thread(fetch_analytics_rows, service, site_url, request, use_cache=not force_refresh)
         
-        if not response.get("rows"):
-            return f"No search analytics data found for {site_url} in the last {days} days."
+        if not rows:
+            return (f"No search analytics data found for {site_url} with the specified parameters.\n\n"
+                   f"Parameters used:\n"
+                   f"- Date range: {start_date} to {end_date}\n"
+                   f"- Dimensions: {dimensions}\n"
+                   f"- Search type: {search_type}\n"
+                   + (f"- Filter: {filter_dimension} {filter_operator} '{filter_expression}'\n" if filter_dimension else "")
+                   + (f"- Filters: {filters}" if filters else "")
+                   + ("" if filter_dimension or filters else "- No filter applied"))
         
         # Format results
-        result_lines = [f"Search analytics for {site_url} (last {days} days):"]
+        result_lines = [f"Search analytics for {site_url}:"]
+        result_lines.append(f"Date range: {start_date} to {end_date}")
+        result_lines.append(f"Search type: {search_type}")
+        if filter_dimension:
+            result_lines.append(f"Filter: {filter_dimension} {filter_operator} '{filter_expression}'")
+        if filters:
+            result_lines.append(f"Filters: {filters}")
+        result_lines.append(f"Showing rows {start_row+1} to {start_row+len(rows)} (sorted by {sort_by} {sort_direction})")
         result_lines.append("\n" + "-" * 80 + "\n")
         
         # Create header based on dimensions
@@ -535,7 +3903,7 @@ async def get_search_analytics(site_url: str, days: int = 28, dimensions: str =
         result_lines.append("-" * 80)
         
         # Add data rows
-        for row in response.get("rows", []):
+        for row in rows:
             data = []
             # Add dimension values
             for dim_value in row.get("keys", []):
@@ -549,843 +3917,1542 @@ async def get_search_analytics(site_url: str, days: int = 28, dimensions: str =
             
             result_lines.append(" | ".join(data))
         
-        return "\n".join(result_lines)
-    except Exception as e:
-        return f"Error retrieving search analytics: {str(e)}"
-
-@mcp.tool()
-async def get_site_details(site_url: str) -> str:
-    """
-    Get detailed information about a specific Search Console property.
-    
-    Args:
-        site_url: The URL of the site in Search Console (must be exact match)
-    """
-    try:
-        service = get_gsc_service()
-        
-        # Get site details
-        site_info = service.sites().get(siteUrl=site_url).execute()
-        
-        # Format the results
-        result_lines = [f"Site details for {site_url}:"]
-        result_lines.append("-" * 50)
-        
-        # Add basic info
-        result_lines.append(f"Permission level: {site_info.get('permissionLevel', 'Unknown')}")
-        
-        # Add verification info if available
-        if "siteVerificationInfo" in site_info:
-            verify_info = site_info["siteVerificationInfo"]
-            result_lines.append(f"Verification state: {verify_info.get('verificationState', 'Unknown')}")
-            
-            if "verifiedUser" in verify_info:
-                result_lines.append(f"Verified by: {verify_info['verifiedUser']}")
-                
-            if "verificationMethod" in verify_info:
-                result_lines.append(f"Verification method: {verify_info['verificationMethod']}")
-        
-        # Add ownership info if available
-        if "ownershipInfo" in site_info:
-            owner_info = site_info["ownershipInfo"]
-            result_lines.append("\nOwnership Information:")
-            result_lines.append(f"Owner: {owner_info.get('owner', 'Unknown')}")
-            
-            if "verificationMethod" in owner_info:
-                result_lines.append(f"Ownership verification: {owner_info['verificationMethod']}")
+        # Add pagination info if there might be more results
+        if len(rows) == row_limit:
+            next_start = start_row + row_limit
+            result_lines.append("\nThere may be more results available. To see the next page, use:")
+            result_lines.append(f"start_row: {next_start}, row_limit: {row_limit}")
         
         return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        return f"Error retrieving site details: {str(e)}"
+        return f"Error retrieving advanced search analytics: {str(e)}"
 
-@mcp.tool()
-async def get_sitemaps(site_url: str) -> str:
-    """
-    List all sitemaps for a specific Search Console property.
-    
-    Args:
-        site_url: The URL of the site in Search Console (must be exact match)
-    """
-    try:
-        service = get_gsc_service()
-        
-        # Get sitemaps list
-        sitemaps = service.sitemaps().list(siteUrl=site_url).execute()
-        
-        if not sitemaps.get("sitemap"):
-            return f"No sitemaps found for {site_url}."
-        
-        # Format the results
-        result_lines = [f"Sitemaps for {site_url}:"]
-        result_lines.append("-" * 80)
-        
-        # Header
-        result_lines.append("Path | Last Downloaded | Status | Indexed URLs | Errors")
-        result_lines.append("-" * 80)
-        
-        # Add each sitemap
-        for sitemap in sitemaps.get("sitemap", []):
-            path = sitemap.get("path", "Unknown")
-            last_downloaded = sitemap.get("lastDownloaded", "Never")
-            
-            # Format last downloaded date if it exists
-            if last_downloaded != "Never":
-                try:
-                    # Convert to more readable format
-                    dt = datetime.fromisoformat(last_downloaded.replace('Z', '+00:00'))
-                    last_downloaded = dt.strftime("%Y-%m-%d %H:%M")
-                except:
-                    pass
-            
-            status = "Valid"
-            if "errors" in sitemap and sitemap["errors"] > 0:
-                status = "Has errors"
-            
-            # Get counts
-            warnings = sitemap.get("warnings", 0)
-            errors = sitemap.get("errors", 0)
-            
-            # Get contents if available
-            indexed_urls = "N/A"
-            if "contents" in sitemap:
-                for content in sitemap["contents"]:
-                    if content.get("type") == "web":
-                        indexed_urls = content.get("submitted", "0")
-                        break
-            
-            result_lines.append(f"{path} | {last_downloaded} | {status} | {indexed_urls} | {errors}")
-        
-        return "\n".join(result_lines)
-    except Exception as e:
-        return f"Error retrieving sitemaps: {str(e)}"
+# Memory for rows buffered by streaming comparisons before sorted runs are spilled to disk
+STREAM_MEMORY_MB = int(os.environ.get("GSC_STREAM_MEMORY_MB", 256))
+# Folder for spilled runs; defaults to the system temp folder
+SPILL_DIR = os.environ.get("GSC_SPILL_DIR") or None
+# Records pickled together in a spilled run, and read back together while merging
+SPILL_BLOCK_ROWS = 4096
+# Smallest buffer a SortedRuns uses, however little memory it is given
+SPILL_MIN_BYTES = 16 * 1024 * 1024
+# Most run files a SortedRuns keeps open; beyond that the smaller runs are merged first
+SPILL_MAX_OPEN_RUNS = 64
 
-@mcp.tool()
-async def inspect_url_enhanced(site_url: str, page_url: str) -> str:
+class SortedRuns:
     """
-    Enhanced URL inspection to check indexing status and rich results in Google.
-    
-    Args:
-        site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
-        page_url: The specific URL to inspect
+    Sorts (keys, clicks, impressions, position) records that may not fit in memory.
+
+    Records are buffered until their estimated size reaches `memory_bytes` (at least
+    SPILL_MIN_BYTES), then sorted by keys and written to an anonymous temporary file in
+    `spill_dir` as pickled blocks of SPILL_BLOCK_ROWS records. Once SPILL_MAX_OPEN_RUNS runs
+    exist, the smaller half is merged into one run, so the number of open files stays bounded.
+    Iterating merges the remaining runs with heapq.merge, holding one block per run in memory.
+    Run files disappear when closed or when the process exits.
     """
-    try:
-        service = get_gsc_service()
-        
-        # Build request
-        request = {
-            "inspectionUrl": page_url,
-            "siteUrl": site_url
-        }
-        
-        # Execute request
-        response = service.urlInspection().index().inspect(body=request).execute()
-        
-        if not response or "inspectionResult" not in response:
-            return f"No inspection data found for {page_url}."
-        
-        inspection = response["inspectionResult"]
-        
-        # Format the results
-        result_lines = [f"URL Inspection for {page_url}:"]
-        result_lines.append("-" * 80)
-        
-        # Add inspection result link if available
-        if "inspectionResultLink" in inspection:
-            result_lines.append(f"Search Console Link: {inspection['inspectionResultLink']}")
-            result_lines.append("-" * 80)
-        
-        # Indexing status section
-        index_status = inspection.get("indexStatusResult", {})
-        verdict = index_status.get("verdict", "UNKNOWN")
-        
-        result_lines.append(f"Indexing Status: {verdict}")
-        
-        # Coverage state
-        if "coverageState" in index_status:
-            result_lines.append(f"Coverage: {index_status['coverageState']}")
-        
-        # Last crawl
-        if "lastCrawlTime" in index_status:
+
+    def __init__(self, memory_bytes: int, spill_dir: Optional[str] = None):
+        self.memory_bytes = max(memory_bytes, SPILL_MIN_BYTES)
+        self.spill_dir = spill_dir
+        self.buffer: List[tuple] = []
+        self.buffer_bytes = 0
+        self.runs = []
+        self.run_rows: List[int] = []
+        self.spilled = 0
+        self.rows = 0
+
+    def add(self, keys: tuple, clicks: int, impressions: int, position: float):
+        self.buffer.append((keys, clicks, impressions, position))
+        # Tuple, ints, float and str headers; rough but stable enough to bound memory
+        self.buffer_bytes += 200 + sum(len(key) for key in keys)
+        self.rows += 1
+        if self.buffer_bytes >= self.memory_bytes:
+            self._spill()
+
+    def _write_run(self, records: Iterator[tuple]):
+        import tempfile
+        run = tempfile.TemporaryFile(prefix="gsc-run-", dir=self.spill_dir)
+        records = iter(records)
+        while True:
+            block = list(islice(records, SPILL_BLOCK_ROWS))
+            if not block:
+                break
+            pickle.dump(block, run, protocol=pickle.HIGHEST_PROTOCOL)
+        run.seek(0)
+        return run
+
+    def _spill(self):
+        self.buffer.sort()
+        self.runs.append(self._write_run(self.buffer))
+        self.run_rows.append(len(self.buffer))
+        self.spilled += 1
+        self.buffer = []
+        self.buffer_bytes = 0
+        if len(self.runs) >= SPILL_MAX_OPEN_RUNS:
+            self._merge_runs()
+
+    def _merge_runs(self):
+        """Merges the smaller half of the runs into one; merging the smallest first keeps rewrites low."""
+        by_size = sorted(range(len(self.runs)), key=self.run_rows.__getitem__)
+        chosen = set(by_size[:len(by_size) // 2 + 1])
+        merged = self._write_run(heapq.merge(*(self._read_run(self.runs[i]) for i in chosen)))
+        merged_rows = sum(self.run_rows[i] for i in chosen)
+        for i in chosen:
+            self.runs[i].close()
+        kept = [i for i in range(len(self.runs)) if i not in chosen]
+        self.runs = [self.runs[i] for i in kept] + [merged]
+        self.run_rows = [self.run_rows[i] for i in kept] + [merged_rows]
+
+    @staticmethod
+    def _read_run(run) -> Iterator[tuple]:
+        while True:
             try:
-                crawl_time = datetime.fromisoformat(index_status["lastCrawlTime"].replace('Z', '+00:00'))
-                result_lines.append(f"Last Crawled: {crawl_time.strftime('%Y-%m-%d %H:%M')}")
-            except:
-                result_lines.append(f"Last Crawled: {index_status['lastCrawlTime']}")
-        
-        # Page fetch
-        if "pageFetchState" in index_status:
-            result_lines.append(f"Page Fetch: {index_status['pageFetchState']}")
-        
-        # Robots.txt status
-        if "robotsTxtState" in index_status:
-            result_lines.append(f"Robots.txt: {index_status['robotsTxtState']}")
-        
-        # Indexing state
-        if "indexingState" in index_status:
-            result_lines.append(f"Indexing State: {index_status['indexingState']}")
-        
-        # Canonical information
-        if "googleCanonical" in index_status:
-            result_lines.append(f"Google Canonical: {index_status['googleCanonical']}")
-        
-        if "userCanonical" in index_status and index_status.get("userCanonical") != index_status.get("googleCanonical"):
-            result_lines.append(f"User Canonical: {index_status['userCanonical']}")
-        
-        # Crawled as
-        if "crawledAs" in index_status:
-            result_lines.append(f"Crawled As: {index_status['crawledAs']}")
-        
-        # Referring URLs
-        if "referringUrls" in index_status and index_status["referringUrls"]:
-            result_lines.append("\nReferring URLs:")
-            for url in index_status["referringUrls"][:5]:  # Limit to 5 examples
-                result_lines.append(f"- {url}")
-            
-            if len(index_status["referringUrls"]) > 5:
-                result_lines.append(f"... and {len(index_status['referringUrls']) - 5} more")
-        
-        # Rich results
-        if "richResultsResult" in inspection:
-            rich = inspection["richResultsResult"]
-            result_lines.append(f"\nRich Results: {rich.get('verdict', 'UNKNOWN')}")
-            
-            if "detectedItems" in rich and rich["detectedItems"]:
-                result_lines.append("Detected Rich Result Types:")
-                
-                for item in rich["detectedItems"]:
-                    rich_type = item.get("richResultType", "Unknown")
-                    result_lines.append(f"- {rich_type}")
-                    
-                    # If there are items with names, show them
-                    if "items" in item and item["items"]:
-                        for i, subitem in enumerate(item["items"][:3]):  # Limit to 3 examples
-                            if "name" in subitem:
-                                result_lines.append(f"  • {subitem['name']}")
-                        
-                        if len(item["items"]) > 3:
-                            result_lines.append(f"  • ... and {len(item['items']) - 3} more items")
-            
-            # Check for issues
-            if "richResultsIssues" in rich and rich["richResultsIssues"]:
-                result_lines.append("\nRich Results Issues:")
-                for issue in rich["richResultsIssues"]:
-                    severity = issue.get("severity", "Unknown")
-                    message = issue.get("message", "Unknown issue")
-                    result_lines.append(f"- [{severity}] {message}")
-        
-        return "\n".join(result_lines)
-    except Exception as e:
-        return f"Error inspecting URL: {str(e)}"
+                block = pickle.load(run)
+            except EOFError:
+                return
+            yield from block
+
+    def __iter__(self) -> Iterator[tuple]:
+        self.buffer.sort()
+        if not self.runs:
+            return iter(self.buffer)
+        return heapq.merge(self.buffer, *(self._read_run(run) for run in self.runs))
+
+    def close(self):
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.run_rows = []
+        self.buffer = []
+
+def merge_join(left: Iterator[tuple], right: Iterator[tuple]) -> Iterator[tuple]:
+    """Full outer join of two record streams sorted by keys; yields (keys, left record or None, right record or None)."""
+    left_record, right_record = next(left, None), next(right, None)
+    while left_record is not None or right_record is not None:
+        if right_record is None or (left_record is not None and left_record[0] < right_record[0]):
+            yield left_record[0], left_record, None
+            left_record = next(left, None)
+        elif left_record is None or right_record[0] < left_record[0]:
+            yield right_record[0], None, right_record
+            right_record = next(right, None)
+        else:
+            yield left_record[0], left_record, right_record
+            left_record, right_record = next(left, None), next(right, None)
+
+def stream_period_comparison(service, site_url: str, requests: List[Dict[str, Any]], limit: int,
+                             max_rows: Optional[int] = None, memory_mb: int = STREAM_MEMORY_MB,
+                             spill_dir: Optional[str] = SPILL_DIR) -> tuple:
+    """
+    Compares two periods without holding either one in memory.
+
+    Each period's pages are streamed into SortedRuns (half of `memory_mb` each), the two sorted
+    streams are merge-joined on the dimension keys and the `limit` largest absolute click changes
+    are kept in a bounded heap. Returns (top changes as (keys, period 1 record, period 2 record)
+    with the biggest change first, statistics dict); the list is empty when `limit` is not positive.
+    Blocking: call it through asyncio.to_thread.
+    """
+    runs = [SortedRuns(memory_mb * 1024 * 1024 // 2, spill_dir) for _ in requests]
+    try:
+        for request, sorted_runs in zip(requests, runs):
+            for page in iter_analytics_pages(service, site_url, request, max_rows):
+                for row in page:
+                    sorted_runs.add(tuple(row.get("keys", [])), int(row.get("clicks", 0)),
+                                    int(row.get("impressions", 0)), row.get("position", 0.0))
+
+        top = []
+        joined = matched = 0
+        for keys, first, second in merge_join(iter(runs[0]), iter(runs[1])):
+            joined += 1
+            matched += first is not None and second is not None
+            change = abs((second[1] if second else 0) - (first[1] if first else 0))
+            # Ties keep the key order from the merge, so results are deterministic
+            entry = (change, -joined, keys, first, second)
+            if len(top) < limit:
+                heapq.heappush(top, entry)
+            elif top and entry > top[0]:
+                heapq.heapreplace(top, entry)
+            if joined % 100000 == 0:
+                report_progress(done=joined, message=f"Compared {joined} keys")
+
+        stats = {
+            "period1_rows": runs[0].rows,
+            "period2_rows": runs[1].rows,
+            "keys": joined,
+            "matched": matched,
+            "spilled_runs": sum(sorted_runs.spilled for sorted_runs in runs),
+        }
+        return [(keys, first, second) for _, _, keys, first, second in sorted(top, reverse=True)], stats
+    finally:
+        for sorted_runs in runs:
+            sorted_runs.close()
 
 @mcp.tool()
-async def batch_url_inspection(site_url: str, urls: str) -> str:
+async def compare_search_periods(
+    site_url: str,
+    period1_start: str,
+    period1_end: str,
+    period2_start: str,
+    period2_end: str,
+    dimensions: str = "query",
+    limit: int = 10,
+    filters: str = None,
+    streaming: bool = False,
+    max_rows: int = None,
+    force_refresh: bool = False
+) -> str:
     """
-    Inspect multiple URLs in batch (within API limits).
+    Compare search analytics data between two time periods.
+
+    By default the top 1000 rows of each period are compared in memory. With streaming=True
+    every row of both periods is compared: rows are sorted into runs on disk
+    (GSC_STREAM_MEMORY_MB, GSC_SPILL_DIR) and merge-joined, so memory stays bounded
+    however large the properties are.
     
     Args:
-        site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
-        urls: List of URLs to inspect, one per line
+        site_url: The URL of the site in Search Console (must be exact match)
+        period1_start: Start date for period 1 (YYYY-MM-DD)
+        period1_end: End date for period 1 (YYYY-MM-DD)
+        period2_start: Start date for period 2 (YYYY-MM-DD)
+        period2_end: End date for period 2 (YYYY-MM-DD)
+        dimensions: Dimensions to group by (default: query)
+        limit: Number of top results to compare (default: 10)
+        filters: Filters applied by the API to both periods, e.g. query~shoes; device=MOBILE (same syntax as
+                 get_advanced_search_analytics)
+        streaming: Compare all rows of both periods through sorted on-disk runs instead of the top 1000 (default: false)
+        max_rows: With streaming, the maximum number of rows fetched per period (default: all)
+        force_refresh: Ignore cached analytics results and query the API again (default: false)
     """
     try:
         service = get_gsc_service()
         
-        # Parse URLs
-        url_list = [url.strip() for url in urls.split('\n') if url.strip()]
+        # Parse dimensions
+        dimension_list = [d.strip() for d in dimensions.split(",")]
         
-        if not url_list:
-            return "No URLs provided for inspection."
+        # Build requests for both periods
+        period1_request = {
+            "startDate": period1_start,
+            "endDate": period1_end,
+            "dimensions": dimension_list,
+            "rowLimit": 1000  # Get more to ensure we can match items between periods
+        }
         
-        if len(url_list) > 10:
-            return f"Too many URLs provided ({len(url_list)}). Please limit to 10 URLs per batch to avoid API quota issues."
+        period2_request = {
+            "startDate": period2_start,
+            "endDate": period2_end,
+            "dimensions": dimension_list,
+            "rowLimit": 1000
+        }
+        if filters:
+            try:
+                period1_request["dimensionFilterGroups"] = compile_api_filters(filters)
+                period2_request["dimensionFilterGroups"] = compile_api_filters(filters)
+            except ValueError as e:
+                return f"Invalid filters: {str(e)}"
+        
+        stream_stats = None
+        if streaming:
+            top_changes, stream_stats = await asyncio.to_thread(
+                stream_period_comparison, service, site_url, [period1_request, period2_request], limit, max_rows
+            )
+            if not stream_stats["keys"]:
+                return f"No data found for either period for {site_url}."
+
+            comparison_data = []
+            for key, p1, p2 in top_changes:
+                p1_clicks, p1_position = (p1[1], p1[3]) if p1 else (0, 0)
+                p2_clicks, p2_position = (p2[1], p2[3]) if p2 else (0, 0)
+                click_diff = p2_clicks - p1_clicks
+                comparison_data.append({
+                    "key": key,
+                    "p1_clicks": p1_clicks,
+                    "p2_clicks": p2_clicks,
+                    "click_diff": click_diff,
+                    "click_pct": (click_diff / p1_clicks) * 100 if p1_clicks > 0 else float('inf'),
+                    "p1_position": p1_position,
+                    "p2_position": p2_position,
+                    "pos_diff": p1_position - p2_position
+                })
+            compared = stream_stats["keys"]
+        else:
+            # Execute requests
+            period1_rows, period2_rows = await asyncio.gather(
+                asyncio.to_thread(fetch_analytics_rows, service, site_url, period1_request, use_cache=not force_refresh),
+                asyncio.to_thread(fetch_analytics_rows, service, site_url, period2_request, use_cache=not force_refresh)
+            )
+            
+            if not period1_rows and not period2_rows:
+                return f"No data found for either period for {site_url}."
+            
+            # Map each key to its row index for easy lookup
+            period1_index = {tuple(period1_rows.key(i)): i for i in range(len(period1_rows))}
+            period2_index = {tuple(period2_rows.key(i)): i for i in range(len(period2_rows))}
+            all_keys = period1_index.keys() | period2_index.keys()
+        
+            def metric(rows, index, name, key):
+                i = index.get(key)
+                return getattr(rows, name)[i] if i is not None else 0
+        
+            # Rank keys by absolute click difference (can change to other metrics),
+            # only the top rows are expanded into full comparison records
+            top_keys = heapq.nlargest(
+                limit, all_keys,
+                key=lambda k: abs(metric(period2_rows, period2_index, "clicks", k) - metric(period1_rows, period1_index, "clicks", k))
+            )
         
-        # Process each URL
-        results = []
+            comparison_data = []
+            for key in top_keys:
+                p1 = {name: metric(period1_rows, period1_index, name, key) for name in ("clicks", "impressions", "ctr", "position")}
+                p2 = {name: metric(period2_rows, period2_index, name, key) for name in ("clicks", "impressions", "ctr", "position")}
+            
+                # Calculate differences
+                click_diff = p2["clicks"] - p1["clicks"]
+                click_pct = (click_diff / p1["clicks"]) * 100 if p1["clicks"] > 0 else float('inf')
+                pos_diff = p1["position"] - p2["position"]  # Note: lower position is better
+            
+                comparison_data.append({
+                    "key": key,
+                    "p1_clicks": p1["clicks"],
+                    "p2_clicks": p2["clicks"],
+                    "click_diff": click_diff,
+                    "click_pct": click_pct,
+                    "p1_position": p1["position"],
+                    "p2_position": p2["position"],
+                    "pos_diff": pos_diff
+                })
+            compared = len(all_keys)
         
-        for page_url in url_list:
-            # Build request
-            request = {
-                "inspectionUrl": page_url,
-                "siteUrl": site_url
-            }
+        # Format results
+        result_lines = [f"Search analytics comparison for {site_url}:"]
+        result_lines.append(f"Period 1: {period1_start} to {period1_end}")
+        result_lines.append(f"Period 2: {period2_start} to {period2_end}")
+        result_lines.append(f"Dimension(s): {dimensions}")
+        if filters:
+            result_lines.append(f"Filters: {filters}")
+        if stream_stats:
+            result_lines.append(
+                f"Streamed {stream_stats['period1_rows']:,} + {stream_stats['period2_rows']:,} rows, "
+                f"{stream_stats['keys']:,} keys ({stream_stats['matched']:,} in both periods), "
+                f"{stream_stats['spilled_runs']} runs spilled to disk"
+            )
+        result_lines.append(f"Top {min(limit, compared)} results by change in clicks:")
+        result_lines.append("\n" + "-" * 100 + "\n")
+        
+        # Create header
+        dim_header = " | ".join([d.capitalize() for d in dimension_list])
+        result_lines.append(f"{dim_header} | P1 Clicks | P2 Clicks | Change | % | P1 Pos | P2 Pos | Pos Δ")
+        result_lines.append("-" * 100)
+        
+        # Add data rows (limited to requested number)
+        for item in comparison_data[:limit]:
+            key_str = " | ".join([str(k)[:100] for k in item["key"]])
             
-            try:
-                # Execute request with a small delay to avoid rate limits
-                response = service.urlInspection().index().inspect(body=request).execute()
-                
-                if not response or "inspectionResult" not in response:
-                    results.append(f"{page_url}: No inspection data found")
-                    continue
-                
-                inspection = response["inspectionResult"]
-                index_status = inspection.get("indexStatusResult", {})
-                
-                # Get key information
-                verdict = index_status.get("verdict", "UNKNOWN")
-                coverage = index_status.get("coverageState", "Unknown")
-                last_crawl = "Never"
-                
-                if "lastCrawlTime" in index_status:
-                    try:
-                        crawl_time = datetime.fromisoformat(index_status["lastCrawlTime"].replace('Z', '+00:00'))
-                        last_crawl = crawl_time.strftime('%Y-%m-%d')
-                    except:
-                        last_crawl = index_status["lastCrawlTime"]
-                
-                # Check for rich results
-                rich_results = "None"
-                if "richResultsResult" in inspection:
-                    rich = inspection["richResultsResult"]
-                    if rich.get("verdict") == "PASS" and "detectedItems" in rich and rich["detectedItems"]:
-                        rich_types = [item.get("richResultType", "Unknown") for item in rich["detectedItems"]]
-                        rich_results = ", ".join(rich_types)
-                
-                # Format result
-                results.append(f"{page_url}:\n  Status: {verdict} - {coverage}\n  Last Crawl: {last_crawl}\n  Rich Results: {rich_results}\n")
+            # Format the click change with color indicators
+            click_change = item["click_diff"]
+            click_pct = item["click_pct"] if item["click_pct"] != float('inf') else "N/A"
+            click_pct_str = f"{click_pct:.1f}%" if click_pct != "N/A" else "N/A"
             
-            except Exception as e:
-                results.append(f"{page_url}: Error - {str(e)}")
+            # Format position change (positive is good - moving up in rankings)
+            pos_change = item["pos_diff"]
+            
+            result_lines.append(
+                f"{key_str} | {item['p1_clicks']} | {item['p2_clicks']} | "
+                f"{click_change:+d} | {click_pct_str} | "
+                f"{item['p1_position']:.1f} | {item['p2_position']:.1f} | {pos_change:+.1f}"
+            )
         
-        # Combine results
-        return f"Batch URL Inspection Results for {site_url}:\n\n" + "\n".join(results)
-    
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        return f"Error performing batch inspection: {str(e)}"
+        return f"Error comparing search periods: {str(e)}"
 
 @mcp.tool()
-async def check_indexing_issues(site_url: str, urls: str) -> str:
+async def get_search_by_page_query(
+    site_url: str,
+    page_url: str,
+    days: int = 28,
+    filters: str = None,
+    force_refresh: bool = False
+) -> str:
     """
-    Check for specific indexing issues across multiple URLs.
+    Get search analytics data for a specific page, broken down by query.
     
     Args:
-        site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
-        urls: List of URLs to check, one per line
+        site_url: The URL of the site in Search Console (must be exact match)
+        page_url: The specific page URL to analyze
+        days: Number of days to look back (default: 28)
+        filters: Additional filters applied by the API, e.g. query!~brand; country=usa (same syntax as
+                 get_advanced_search_analytics)
+        force_refresh: Ignore cached analytics results and query the API again (default: false)
     """
     try:
         service = get_gsc_service()
         
-        # Parse URLs
-        url_list = [url.strip() for url in urls.split('\n') if url.strip()]
-        
-        if not url_list:
-            return "No URLs provided for inspection."
-        
-        if len(url_list) > 10:
-            return f"Too many URLs provided ({len(url_list)}). Please limit to 10 URLs per batch to avoid API quota issues."
+        # Calculate date range
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days)
         
-        # Track issues by category
-        issues_summary = {
-            "not_indexed": [],
-            "canonical_issues": [],
-            "robots_blocked": [],
-            "fetch_issues": [],
-            "indexed": []
+        # Build request with page filter
+        try:
+            filter_groups = compile_api_filters(filters, [("page", "equals", page_url)])
+        except ValueError as e:
+            return f"Invalid filters: {str(e)}"
+        request = {
+            "startDate": start_date.strftime("%Y-%m-%d"),
+            "endDate": end_date.strftime("%Y-%m-%d"),
+            "dimensions": ["query"],
+            "dimensionFilterGroups": filter_groups,
+            "rowLimit": 20,  # Top 20 queries for this page
+            "orderBy": [{"metric": "CLICK_COUNT", "direction": "descending"}]
         }
         
-        # Process each URL
-        for page_url in url_list:
-            # Build request
-            request = {
-                "inspectionUrl": page_url,
-                "siteUrl": site_url
-            }
-            
-            try:
-                # Execute request
-                response = service.urlInspection().index().inspect(body=request).execute()
-                
-                if not response or "inspectionResult" not in response:
-                    issues_summary["not_indexed"].append(f"{page_url} - No inspection data found")
-                    continue
-                
-                inspection = response["inspectionResult"]
-                index_status = inspection.get("indexStatusResult", {})
-                
-                # Check indexing status
-                verdict = index_status.get("verdict", "UNKNOWN")
-                coverage = index_status.get("coverageState", "Unknown")
-                
-                if verdict != "PASS" or "not indexed" in coverage.lower() or "excluded" in coverage.lower():
-                    issues_summary["not_indexed"].append(f"{page_url} - {coverage}")
-                else:
-                    issues_summary["indexed"].append(page_url)
-                
-                # Check canonical issues
-                google_canonical = index_status.get("googleCanonical", "")
-                user_canonical = index_status.get("userCanonical", "")
-                
-                if google_canonical and user_canonical and google_canonical != user_canonical:
-                    issues_summary["canonical_issues"].append(
-                        f"{page_url} - Google chose: {google_canonical} instead of user-declared: {user_canonical}"
-                    )
-                
-                # Check robots.txt status
-                robots_state = index_status.get("robotsTxtState", "")
-                if robots_state == "BLOCKED":
-                    issues_summary["robots_blocked"].append(page_url)
-                
-                # Check fetch issues
-                fetch_state = index_status.get("pageFetchState", "")
-                if fetch_state != "SUCCESSFUL":
-                    issues_summary["fetch_issues"].append(f"{page_url} - {fetch_state}")
-            
-            except Exception as e:
-                issues_summary["not_indexed"].append(f"{page_url} - Error: {str(e)}")
+        # Execute request
+        rows = await asyncio.to_thread(fetch_analytics_rows, service, site_url, request, use_cache=not force_refresh)
+        
+        if not rows:
+            return f"No search data found for page {page_url} in the last {days} days."
         
         # Format results
-        result_lines = [f"Indexing Issues Report for {site_url}:"]
-        result_lines.append("-" * 80)
+        result_lines = [f"Search queries for page {page_url} (last {days} days):"]
+        if filters:
+            result_lines.append(f"Filters: {filters}")
+        result_lines.append("\n" + "-" * 80 + "\n")
         
-        # Summary counts
-        result_lines.append(f"Total URLs checked: {len(url_list)}")
-        result_lines.append(f"Indexed: {len(issues_summary['indexed'])}")
-        result_lines.append(f"Not indexed: {len(issues_summary['not_indexed'])}")
-        result_lines.append(f"Canonical issues: {len(issues_summary['canonical_issues'])}")
-        result_lines.append(f"Robots.txt blocked: {len(issues_summary['robots_blocked'])}")
-        result_lines.append(f"Fetch issues: {len(issues_summary['fetch_issues'])}")
+        # Create header
+        result_lines.append("Query | Clicks | Impressions | CTR | Position")
         result_lines.append("-" * 80)
         
-        # Detailed issues
-        if issues_summary["not_indexed"]:
-            result_lines.append("\nNot Indexed URLs:")
-            for issue in issues_summary["not_indexed"]:
-                result_lines.append(f"- {issue}")
-        
-        if issues_summary["canonical_issues"]:
-            result_lines.append("\nCanonical Issues:")
-            for issue in issues_summary["canonical_issues"]:
-                result_lines.append(f"- {issue}")
+        # Add data rows
+        for row in rows:
+            query = row.get("keys", ["Unknown"])[0]
+            clicks = row.get("clicks", 0)
+            impressions = row.get("impressions", 0)
+            ctr = row.get("ctr", 0) * 100
+            position = row.get("position", 0)
+            
+            result_lines.append(f"{query[:100]} | {clicks} | {impressions} | {ctr:.2f}% | {position:.1f}")
         
-        if issues_summary["robots_blocked"]:
-            result_lines.append("\nRobots.txt Blocked URLs:")
-            for url in issues_summary["robots_blocked"]:
-                result_lines.append(f"- {url}")
+        # Add total metrics
+        total_clicks = sum(rows.clicks)
+        total_impressions = sum(rows.impressions)
+        avg_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
         
-        if issues_summary["fetch_issues"]:
-            result_lines.append("\nFetch Issues:")
-            for issue in issues_summary["fetch_issues"]:
-                result_lines.append(f"- {issue}")
+        result_lines.append("-" * 80)
+        result_lines.append(f"TOTAL | {total_clicks} | {total_impressions} | {avg_ctr:.2f}% | -")
         
         return "\n".join(result_lines)
-    
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        return f"Error checking indexing issues: {str(e)}"
+        return f"Error retrieving page query data: {str(e)}"
 
 @mcp.tool()
-async def get_performance_overview(site_url: str, days: int = 28) -> str:
+async def detect_performance_anomalies(
+    site_url: str,
+    dimension: str = "page",
+    metric: str = "clicks",
+    days: int = 56,
+    baseline_days: int = 28,
+    recent_days: int = 7,
+    min_baseline: int = 5,
+    limit: int = 20,
+    max_rows: int = 500000,
+    force_refresh: bool = False
+) -> str:
     """
-    Get a performance overview for a specific property.
-    
+    Scan every page or query of a property for sudden drops and spikes in one call.
+
     Args:
         site_url: The URL of the site in Search Console (must be exact match)
-        days: Number of days to look back (default: 28)
+        dimension: Series to scan, either page or query (default: page)
+        metric: Metric to score (clicks or impressions, default: clicks)
+        days: Number of days of daily data to fetch (default: 56)
+        baseline_days: Length of the trailing baseline window in days (default: 28)
+        recent_days: Number of most recent days that are scored against the baseline (default: 7)
+        min_baseline: Minimum average daily metric in the baseline for a series to be scored (default: 5)
+        limit: Number of regressions and spikes to return (default: 20)
+        max_rows: Maximum number of dimension x date rows to fetch (default: 500000)
+        force_refresh: Ignore cached analytics results and query the API again (default: false)
     """
     try:
+        dimension = dimension.strip().lower()
+        metric = metric.strip().lower()
+        if dimension not in ("page", "query"):
+            return f"Invalid dimension: {dimension}. Please use page or query."
+        if metric not in ("clicks", "impressions"):
+            return f"Invalid metric: {metric}. Please use clicks or impressions."
+        if baseline_days <= 0 or recent_days <= 0:
+            return "baseline_days and recent_days must both be positive."
+        if days < baseline_days + recent_days:
+            return f"days ({days}) must cover baseline_days + recent_days ({baseline_days + recent_days})."
+
         service = get_gsc_service()
-        
+
         # Calculate date range
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days)
-        
-        # Get total metrics
-        total_request = {
+
+        request = {
             "startDate": start_date.strftime("%Y-%m-%d"),
             "endDate": end_date.strftime("%Y-%m-%d"),
-            "dimensions": [],  # No dimensions for totals
-            "rowLimit": 1
+            "dimensions": [dimension, "date"],
         }
-        
-        total_response = service.searchanalytics().query(siteUrl=site_url, body=total_request).execute()
-        
-        # Get by date for trend
-        date_request = {
-            "startDate": start_date.strftime("%Y-%m-%d"),
-            "endDate": end_date.strftime("%Y-%m-%d"),
-            "dimensions": ["date"],
-            "rowLimit": days
+        rows = await asyncio.to_thread(fetch_analytics_rows, service, site_url, request, max_rows=max_rows, use_cache=not force_refresh)
+
+        if not rows:
+            return f"No search analytics data found for {site_url} in the last {days} days."
+
+        # GSC data lags a few days; anchor the series on the last date that has data
+        last_date_str = max(rows.strings[i] for i in set(rows.key_columns[1]))
+        last_date = datetime.strptime(last_date_str, "%Y-%m-%d").date()
+        first_date = last_date - timedelta(days=baseline_days + recent_days - 1)
+        n_days = (last_date - first_date).days + 1
+
+        # Map each interned date string to its column once instead of parsing per row
+        date_offsets = {
+            i: (datetime.strptime(rows.strings[i], "%Y-%m-%d").date() - first_date).days
+            for i in set(rows.key_columns[1])
         }
-        
-        date_response = service.searchanalytics().query(siteUrl=site_url, body=date_request).execute()
-        
+
+        # Build the dense series x date matrix, one row per dimension value
+        series_index = {}
+        matrix = []
+        values = getattr(rows, metric)
+        for key_id, date_id, value in zip(rows.key_columns[0], rows.key_columns[1], values):
+            offset = date_offsets[date_id]
+            if offset < 0:
+                continue
+            idx = series_index.get(key_id)
+            if idx is None:
+                idx = series_index[key_id] = len(matrix)
+                matrix.append([0.0] * n_days)
+            matrix[idx][offset] = value
+
+        # Score every series against its own trailing baseline
+        scored = []
+        for key_id, idx in series_index.items():
+            key = rows.strings[key_id]
+            series = matrix[idx]
+            baseline_mean = sum(series[:baseline_days]) / baseline_days
+            if baseline_mean < min_baseline:
+                continue
+            scores = rolling_zscores(series, baseline_days, recent_days)
+            score = sum(scores) / len(scores)
+            recent_mean = sum(series[-recent_days:]) / recent_days
+            scored.append((score, key, baseline_mean, recent_mean))
+
+        if not scored:
+            return (f"No {dimension} series in {site_url} reached the minimum baseline of "
+                    f"{min_baseline} {metric} per day.")
+
+        scored.sort()
+        regressions = [item for item in scored[:limit] if item[0] < 0]
+        spikes = [item for item in reversed(scored[-limit:]) if item[0] > 0]
+
         # Format results
-        result_lines = [f"Performance Overview for {site_url} (last {days} days):"]
-        result_lines.append("-" * 80)
-        
-        # Add total metrics
-        if total_response.get("rows"):
-            row = total_response["rows"][0]
-            result_lines.append(f"Total Clicks: {row.get('clicks', 0):,}")
-            result_lines.append(f"Total Impressions: {row.get('impressions', 0):,}")
-            result_lines.append(f"Average CTR: {row.get('ctr', 0) * 100:.2f}%")
-            result_lines.append(f"Average Position: {row.get('position', 0):.1f}")
-        else:
-            result_lines.append("No data available for the selected period.")
-            return "\n".join(result_lines)
-        
-        # Add trend data
-        if date_response.get("rows"):
-            result_lines.append("\nDaily Trend:")
-            result_lines.append("Date | Clicks | Impressions | CTR | Position")
-            result_lines.append("-" * 80)
-            
-            # Sort by date
-            sorted_rows = sorted(date_response["rows"], key=lambda x: x["keys"][0])
-            
-            for row in sorted_rows:
-                date_str = row["keys"][0]
-                # Format date from YYYY-MM-DD to MM/DD
-                try:
-                    date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-                    date_formatted = date_obj.strftime("%m/%d")
-                except:
-                    date_formatted = date_str
-                
-                clicks = row.get("clicks", 0)
-                impressions = row.get("impressions", 0)
-                ctr = row.get("ctr", 0) * 100
-                position = row.get("position", 0)
-                
-                result_lines.append(f"{date_formatted} | {clicks:.0f} | {impressions:.0f} | {ctr:.2f}% | {position:.1f}")
-        
+        result_lines = [f"Anomaly scan for {site_url} ({dimension} x {metric}):"]
+        result_lines.append(f"Baseline: {first_date} to {first_date + timedelta(days=baseline_days - 1)} ({baseline_days} days)")
+        result_lines.append(f"Scored window: last {recent_days} days ending {last_date}")
+        result_lines.append(f"Series scanned: {len(series_index)}, scored: {len(scored)} (from {len(rows)} rows)")
+        result_lines.append("-" * 100)
+
+        for title, items in (("Top Regressions", regressions), ("Top Spikes", spikes)):
+            result_lines.append(f"\n{title}:")
+            if not items:
+                result_lines.append("None detected.")
+                continue
+            result_lines.append(f"{dimension.capitalize()} | Z-Score | Baseline/Day | Recent/Day | Change")
+            result_lines.append("-" * 100)
+            for score, key, baseline_mean, recent_mean in items:
+                change = (recent_mean - baseline_mean) / baseline_mean * 100
+                result_lines.append(
+                    f"{key[:100]} | {score:+.2f} | {baseline_mean:.1f} | {recent_mean:.1f} | {change:+.1f}%"
+                )
+
         return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        return f"Error retrieving performance overview: {str(e)}"
+        return f"Error detecting performance anomalies: {str(e)}"
 
 @mcp.tool()
-async def get_advanced_search_analytics(
-    site_url: str, 
-    start_date: str = None, 
-    end_date: str = None, 
-    dimensions: str = "query", 
+async def filter_search_analytics(
+    site_url: str,
+    expression: str,
+    dimensions: str = "query,page",
+    start_date: str = None,
+    end_date: str = None,
     search_type: str = "WEB",
-    row_limit: int = 1000,
-    start_row: int = 0,
     sort_by: str = "clicks",
-    sort_direction: str = "descending",
-    filter_dimension: str = None,
-    filter_operator: str = "contains", 
-    filter_expression: str = None
+    limit: int = 50,
+    max_rows: int = 100000,
+    filters: str = None,
+    force_refresh: bool = False
 ) -> str:
     """
-    Get advanced search analytics data with sorting, filtering, and pagination.
-    
+    Filter search analytics locally with boolean, substring and regex expressions.
+
+    The full dataset is fetched once and cached; follow-up filters on the same
+    dataset are answered from an in-memory index without calling the API.
+
     Args:
         site_url: The URL of the site in Search Console (must be exact match)
+        expression: Filter expression. Bare words match whole words, "quoted text" matches substrings,
+                    /pattern/ matches a regex. Prefix a term with a dimension (e.g. page:"/blog/") and combine
+                    terms with AND, OR, NOT (or -term) and parentheses, e.g. shoes AND NOT (cheap OR "free ship")
+        dimensions: Dimensions to load, comma-separated (default: query,page). Unprefixed terms match the first one
         start_date: Start date in YYYY-MM-DD format (defaults to 28 days ago)
         end_date: End date in YYYY-MM-DD format (defaults to today)
-        dimensions: Dimensions to group by, comma-separated (e.g., "query,page,device")
         search_type: Type of search results (WEB, IMAGE, VIDEO, NEWS, DISCOVER)
-        row_limit: Maximum number of rows to return (max 25000)
-        start_row: Starting row for pagination
-        sort_by: Metric to sort by (clicks, impressions, ctr, position)
-        sort_direction: Sort direction (ascending or descending)
-        filter_dimension: Dimension to filter on (query, page, country, device)
-        filter_operator: Filter operator (contains, equals, notContains, notEquals)
-        filter_expression: Filter expression value
+        sort_by: Metric to sort matches by (clicks, impressions, ctr, position)
+        limit: Number of matching rows to show (default: 50)
+        max_rows: Maximum number of rows to load into the local index (default: 100000)
+        filters: Filters applied by the API before rows are loaded, e.g. device=MOBILE; page~"/blog/" (same
+                 syntax as get_advanced_search_analytics). Narrows the dataset so fewer rows are transferred
+        force_refresh: Ignore cached analytics results and query the API again (default: false)
     """
     try:
+        sort_by = sort_by.strip().lower()
+        if sort_by not in ("clicks", "impressions", "ctr", "position"):
+            return f"Invalid sort_by: {sort_by}. Please use one of: clicks, impressions, ctr, position"
+
         service = get_gsc_service()
-        
+
         # Calculate date range if not provided
         if not end_date:
             end_date = datetime.now().date().strftime("%Y-%m-%d")
         if not start_date:
             start_date = (datetime.now().date() - timedelta(days=28)).strftime("%Y-%m-%d")
-        
-        # Parse dimensions
+
         dimension_list = [d.strip() for d in dimensions.split(",")]
-        
-        # Build request
         request = {
             "startDate": start_date,
             "endDate": end_date,
             "dimensions": dimension_list,
-            "rowLimit": min(row_limit, 25000),  # Cap at API maximum
-            "startRow": start_row,
             "searchType": search_type.upper()
         }
-        
-        # Add sorting
-        if sort_by:
-            metric_map = {
-                "clicks": "CLICK_COUNT",
-                "impressions": "IMPRESSION_COUNT",
-                "ctr": "CTR",
-                "position": "POSITION"
-            }
-            
-            if sort_by in metric_map:
-                request["orderBy"] = [{
-                    "metric": metric_map[sort_by],
-                    "direction": sort_direction.lower()
-                }]
-        
-        # Add filtering if provided
-        if filter_dimension and filter_expression:
-            filter_group = {
-                "filters": [{
-                    "dimension": filter_dimension,
-                    "operator": filter_operator,
-                    "expression": filter_expression
-                }]
-            }
-            request["dimensionFilterGroups"] = [filter_group]
-        
-        # Execute request
-        response = service.searchanalytics().query(siteUrl=site_url, body=request).execute()
-        
-        if not response.get("rows"):
-            return (f"No search analytics data found for {site_url} with the specified parameters.\n\n"
-                   f"Parameters used:\n"
-                   f"- Date range: {start_date} to {end_date}\n"
-                   f"- Dimensions: {dimensions}\n"
-                   f"- Search type: {search_type}\n"
-                   f"- Filter: {filter_dimension} {filter_operator} '{filter_expression}'" if filter_dimension else "- No filter applied")
-        
+        if filters:
+            try:
+                request["dimensionFilterGroups"] = compile_api_filters(filters)
+            except ValueError as e:
+                return f"Invalid filters: {str(e)}"
+        rows = await asyncio.to_thread(fetch_analytics_rows, service, site_url, request, max_rows=max_rows, use_cache=not force_refresh)
+
+        if not rows:
+            return f"No search analytics data found for {site_url} between {start_date} and {end_date}."
+
+        started = time.perf_counter()
+        try:
+            matches = get_search_index(rows).search(expression, dimension_list[0])
+        except ValueError as e:
+            return f"Invalid filter expression: {str(e)}"
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        # Position sorts ascending (lower is better), everything else descending
+        metric_values = getattr(rows, sort_by)
+        top = heapq.nsmallest(limit, matches, key=lambda i: metric_values[i]) if sort_by == "position" \
+            else heapq.nlargest(limit, matches, key=lambda i: metric_values[i])
+
         # Format results
-        result_lines = [f"Search analytics for {site_url}:"]
+        result_lines = [f"Filtered search analytics for {site_url}:"]
         result_lines.append(f"Date range: {start_date} to {end_date}")
-        result_lines.append(f"Search type: {search_type}")
-        if filter_dimension:
-            result_lines.append(f"Filter: {filter_dimension} {filter_operator} '{filter_expression}'")
-        result_lines.append(f"Showing rows {start_row+1} to {start_row+len(response.get('rows', []))} (sorted by {sort_by} {sort_direction})")
+        if filters:
+            result_lines.append(f"API filters: {filters}")
+        result_lines.append(f"Expression: {expression}")
+        result_lines.append(f"Matched {len(matches)} of {len(rows)} rows in {elapsed_ms:.1f} ms (sorted by {sort_by})")
         result_lines.append("\n" + "-" * 80 + "\n")
-        
-        # Create header based on dimensions
-        header = []
-        for dim in dimension_list:
-            header.append(dim.capitalize())
+
+        if not matches:
+            result_lines.append("No rows match the expression.")
+            return "\n".join(result_lines)
+
+        header = [dim.capitalize() for dim in dimension_list]
         header.extend(["Clicks", "Impressions", "CTR", "Position"])
         result_lines.append(" | ".join(header))
         result_lines.append("-" * 80)
-        
-        # Add data rows
-        for row in response.get("rows", []):
-            data = []
-            # Add dimension values
-            for dim_value in row.get("keys", []):
-                data.append(dim_value[:100])  # Increased truncation limit to 100 characters
-            
-            # Add metrics
-            data.append(str(row.get("clicks", 0)))
-            data.append(str(row.get("impressions", 0)))
-            data.append(f"{row.get('ctr', 0) * 100:.2f}%")
-            data.append(f"{row.get('position', 0):.1f}")
-            
+
+        for i in top:
+            row = rows[i]
+            data = [dim_value[:100] for dim_value in row.keys]
+            data.append(str(row.clicks))
+            data.append(str(row.impressions))
+            data.append(f"{row.ctr * 100:.2f}%")
+            data.append(f"{row.position:.1f}")
             result_lines.append(" | ".join(data))
-        
-        # Add pagination info if there might be more results
-        if len(response.get("rows", [])) == row_limit:
-            next_start = start_row + row_limit
-            result_lines.append("\nThere may be more results available. To see the next page, use:")
-            result_lines.append(f"start_row: {next_start}, row_limit: {row_limit}")
-        
+
+        # Totals across all matches, not just the rows shown
+        total_clicks = sum(rows.clicks[i] for i in matches)
+        total_impressions = sum(rows.impressions[i] for i in matches)
+        avg_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
+        result_lines.append("-" * 80)
+        result_lines.append(f"TOTAL ({len(matches)} rows) | {total_clicks} | {total_impressions} | {avg_ctr:.2f}% | -")
+
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error filtering search analytics: {str(e)}"
+
+# Last reported metrics per watch, keyed by (watch_id, site_url, dimensions, days, search_type, row_limit)
+DELTA_SNAPSHOT_TTL = int(os.environ.get("GSC_DELTA_SNAPSHOT_TTL", 7 * 86400))
+DELTA_SNAPSHOTS = make_cache("delta_snapshots", DELTA_SNAPSHOT_TTL, 1000, local=False)
+
+@mcp.tool()
+async def get_search_analytics_delta(
+    site_url: str,
+    watch_id: str = "default",
+    days: int = 28,
+    dimensions: str = "query",
+    search_type: str = "WEB",
+    row_limit: int = 1000,
+    min_click_change: int = 1,
+    min_impression_change_pct: float = 10.0,
+    min_position_change: float = 1.0,
+    limit: int = 100,
+    reset: bool = False
+) -> str:
+    """
+    Return only the search analytics rows that changed since the last call for the same watch.
+
+    Fresh data is compared locally against the snapshot of what this watch last reported.
+    The first call stores every row as the baseline and lists the top rows as added. Rows are marked changed when clicks move by at
+    least min_click_change, impressions by at least min_impression_change_pct percent or position
+    by at least min_position_change. Small changes are not dropped: they build up against the
+    last reported value until they cross a threshold.
+
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match)
+        watch_id: Name of the monitoring loop; each watch keeps its own snapshot (default: "default")
+        days: Number of days to look back (default: 28)
+        dimensions: Dimensions to group by, comma-separated (default: query)
+        search_type: Type of search results (WEB, IMAGE, VIDEO, NEWS, DISCOVER)
+        row_limit: Number of top rows to track (max 25000, default: 1000)
+        min_click_change: Absolute click change that counts as changed (default: 1)
+        min_impression_change_pct: Relative impression change in percent that counts as changed (default: 10)
+        min_position_change: Absolute position change that counts as changed (default: 1.0)
+        limit: Maximum rows listed per section; unlisted changes are reported on the next call (default: 100)
+        reset: Drop the stored snapshot first, so every row is reported again
+    """
+    try:
+        service = get_gsc_service()
+
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days)
+        dimension_list = [d.strip() for d in dimensions.split(",")]
+        row_limit = min(row_limit, 25000)
+
+        snapshot_key = (watch_id, site_url, tuple(dimension_list), days, search_type.upper(), row_limit)
+        def sync() -> tuple:
+            # Concurrent calls for the same watch would each report, and then overwrite, the same changes.
+            # Runs on a worker thread, so waiting for another call's sync never blocks the event loop.
+            with state_lock("delta_snapshots", snapshot_key):
+                if reset:
+                    DELTA_SNAPSHOTS.delete(snapshot_key)
+                snapshot = DELTA_SNAPSHOTS.get(snapshot_key)
+                first_sync = snapshot is None
+                if first_sync:
+                    snapshot = {}
+
+                request = {
+                    "startDate": start_date.strftime("%Y-%m-%d"),
+                    "endDate": end_date.strftime("%Y-%m-%d"),
+                    "dimensions": dimension_list,
+                    "rowLimit": row_limit,
+                    "searchType": search_type.upper()
+                }
+                rows = fetch_analytics_rows(service, site_url, request, use_cache=False)
+
+                added = []
+                changed = []
+                seen = set()
+                for i in range(len(rows)):
+                    key = tuple(rows.key(i))
+                    seen.add(key)
+                    current = (rows.clicks[i], rows.impressions[i], rows.ctr[i], rows.position[i])
+                    previous = snapshot.get(key)
+                    if previous is None:
+                        added.append((key, current))
+                        continue
+                    click_change = current[0] - previous[0]
+                    impression_change_pct = (current[1] - previous[1]) / previous[1] * 100 if previous[1] else float("inf") if current[1] else 0.0
+                    position_change = current[3] - previous[3]
+                    if (abs(click_change) >= min_click_change
+                            or abs(impression_change_pct) >= min_impression_change_pct
+                            or abs(position_change) >= min_position_change):
+                        changed.append((key, previous, current))
+                removed = [(key, previous) for key, previous in snapshot.items() if key not in seen]
+
+                # Largest movements first. After the initial sync only what is listed is written back
+                # to the snapshot, so changes cut off by `limit` are reported on the next call.
+                totals = (len(added), len(changed), len(removed))
+                if first_sync:
+                    snapshot.update(added)
+                added = heapq.nlargest(limit, added, key=lambda item: item[1][0])
+                changed = heapq.nlargest(limit, changed, key=lambda item: (abs(item[2][0] - item[1][0]), abs(item[2][1] - item[1][1])))
+                removed = heapq.nlargest(limit, removed, key=lambda item: item[1][0])
+                for key, current in added:
+                    snapshot[key] = current
+                for key, _, current in changed:
+                    snapshot[key] = current
+                for key, _ in removed:
+                    del snapshot[key]
+                DELTA_SNAPSHOTS.set(snapshot_key, snapshot)
+            return rows, first_sync, totals, added, changed, removed
+
+        rows, first_sync, totals, added, changed, removed = await asyncio.to_thread(sync)
+
+        # Format results
+        result_lines = [f"Search analytics delta for {site_url} (watch: {watch_id}, last {days} days):"]
+        if first_sync:
+            result_lines.append(f"Initial sync: {len(rows)} rows tracked")
+        result_lines.append(f"Added: {totals[0]} | Changed: {totals[1]} | Removed: {totals[2]} | Unchanged: {len(rows) - totals[0] - totals[1]}")
+        if not any(totals):
+            result_lines.append("No changes since last sync.")
+            return "\n".join(result_lines)
+
+        dim_header = " | ".join(d.capitalize() for d in dimension_list)
+        if added:
+            result_lines.append("\nAdded:")
+            result_lines.append(f"{dim_header} | Clicks | Impressions | CTR | Position")
+            result_lines.append("-" * 80)
+            for key, (clicks, impressions, ctr, position) in added:
+                key_str = " | ".join(k[:100] for k in key)
+                result_lines.append(f"{key_str} | {clicks} | {impressions} | {ctr * 100:.2f}% | {position:.1f}")
+
+        if changed:
+            result_lines.append("\nChanged:")
+            result_lines.append(f"{dim_header} | Clicks | Δ | Impressions | Δ | Position | Δ")
+            result_lines.append("-" * 80)
+            for key, previous, current in changed:
+                key_str = " | ".join(k[:100] for k in key)
+                result_lines.append(
+                    f"{key_str} | {current[0]} | {current[0] - previous[0]:+d} | "
+                    f"{current[1]} | {current[1] - previous[1]:+d} | "
+                    f"{current[3]:.1f} | {current[3] - previous[3]:+.1f}"
+                )
+
+        if removed:
+            result_lines.append(f"\nRemoved (no longer in the top {row_limit} rows):")
+            result_lines.append(f"{dim_header} | Last Clicks | Last Impressions")
+            result_lines.append("-" * 80)
+            for key, previous in removed:
+                key_str = " | ".join(k[:100] for k in key)
+                result_lines.append(f"{key_str} | {previous[0]} | {previous[1]}")
+
+        pending = sum(totals) - len(added) - len(changed) - len(removed)
+        if first_sync and pending > 0:
+            result_lines.append(f"\n{pending} more rows are stored in the snapshot; later calls only report changes.")
+        elif pending > 0:
+            result_lines.append(f"\n{pending} more changes will be reported on the next call.")
+
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error computing search analytics delta: {str(e)}"
+
+# Days of daily totals kept per property for rollups; Search Console itself returns about 16 months
+ROLLUP_HISTORY_DAYS = int(os.environ.get("GSC_ROLLUP_HISTORY_DAYS", 730))
+# Seconds before a rollup call syncs the daily series again
+ROLLUP_SYNC_INTERVAL = int(os.environ.get("GSC_ROLLUP_SYNC_INTERVAL", CACHE_TTL))
+# Trailing days fetched again on every sync, because Search Console still revises them
+ROLLUP_REFRESH_DAYS = 4
+ROLLUP_GRANULARITIES = ("day", "week", "month", "quarter")
+
+class DailyRollup:
+    """
+    Daily totals of one property and search type, with prefix sums for any date window.
+
+    Day i is `first + i`. Clicks and impressions are kept as array('q') and position as
+    position * impressions in array('d'), so summing a window gives exact CTR
+    (clicks / impressions) and impression-weighted position. Prefix sums are rebuilt only from
+    the first day a sync changed, and every week, month or quarter bucket is two lookups.
+    """
+    __slots__ = ("first", "clicks", "impressions", "weighted_position",
+                 "prefix_clicks", "prefix_impressions", "prefix_weighted", "synced_at")
+
+    def __init__(self):
+        self.first = 0
+        self.clicks = array("q")
+        self.impressions = array("q")
+        self.weighted_position = array("d")
+        self.prefix_clicks = array("q", [0])
+        self.prefix_impressions = array("q", [0])
+        self.prefix_weighted = array("d", [0.0])
+        self.synced_at = 0.0
+
+    @property
+    def start(self) -> Optional[date]:
+        return date.fromordinal(self.first) if self.clicks else None
+
+    @property
+    def last(self) -> Optional[date]:
+        return date.fromordinal(self.first + len(self.clicks) - 1) if self.clicks else None
+
+    def copy(self) -> "DailyRollup":
+        rollup = DailyRollup()
+        rollup.first = self.first
+        for name in self.__slots__[1:-1]:
+            setattr(rollup, name, getattr(self, name)[:])
+        rollup.synced_at = self.synced_at
+        return rollup
+
+    def merge(self, rows: AnalyticsRows, start: date):
+        """
+        Replaces the days from `start` through the last fetched day with fetched date rows.
+
+        Stored days after the last fetched one are kept, so a refresh that returns no
+        (or fewer) rows never loses data. Prefix sums are extended from `start`.
+        """
+        days = sorted((datetime.strptime(rows.key(i)[0], "%Y-%m-%d").date().toordinal(), i) for i in range(len(rows)))
+        if not days:
+            return
+        if not self.clicks:
+            self.first = days[0][0]
+        index = max(0, start.toordinal() - self.first)
+        columns = (self.clicks, self.impressions, self.weighted_position)
+        tail = [column[max(index, days[-1][0] - self.first + 1):] for column in columns]
+        for column in columns:
+            del column[index:]
+        for ordinal, i in days:
+            if ordinal < self.first:
+                continue
+            # Days without any row between two fetched days had no impressions
+            for _ in range(ordinal - self.first - len(self.clicks)):
+                self.clicks.append(0)
+                self.impressions.append(0)
+                self.weighted_position.append(0.0)
+            self.clicks.append(rows.clicks[i])
+            self.impressions.append(rows.impressions[i])
+            self.weighted_position.append(rows.position[i] * rows.impressions[i])
+        for column, kept in zip(columns, tail):
+            column.extend(kept)
+        self._extend_prefix(index)
+
+    def trim(self, start: date):
+        """Drops days before `start`."""
+        drop = start.toordinal() - self.first
+        if drop <= 0 or not self.clicks:
+            return
+        for column in (self.clicks, self.impressions, self.weighted_position):
+            del column[:drop]
+        self.first = start.toordinal()
+        self._extend_prefix(0)
+
+    def _extend_prefix(self, index: int):
+        for values, prefix in ((self.clicks, self.prefix_clicks), (self.impressions, self.prefix_impressions),
+                               (self.weighted_position, self.prefix_weighted)):
+            del prefix[index + 1:]
+            running = accumulate(values[index:], initial=prefix[index])
+            next(running)
+            prefix.extend(running)
+
+    def covers(self, start: date, end: date) -> bool:
+        return bool(self.clicks) and self.first <= start.toordinal() and end <= self.last
+
+    def totals(self, start: date, end: date) -> tuple:
+        """Returns (clicks, impressions, CTR, position) for the days from `start` to `end` inclusive."""
+        i = max(0, start.toordinal() - self.first)
+        j = max(i, min(len(self.clicks), end.toordinal() - self.first + 1))
+        clicks = self.prefix_clicks[j] - self.prefix_clicks[i]
+        impressions = self.prefix_impressions[j] - self.prefix_impressions[i]
+        weighted = self.prefix_weighted[j] - self.prefix_weighted[i]
+        return (clicks, impressions, clicks / impressions if impressions else 0.0,
+                weighted / impressions if impressions else 0.0)
+
+DAILY_ROLLUPS = make_cache("daily_rollups", 30 * 86400, 1000, local=False)
+
+def sync_daily_rollup(service, site_url: str, search_type: str, force: bool = False) -> DailyRollup:
+    """
+    Returns the stored daily series for a property, fetching only what changed since the last sync.
+
+    The first sync loads ROLLUP_HISTORY_DAYS days in one query. Later syncs re-fetch the last
+    ROLLUP_REFRESH_DAYS stored days plus anything newer, and drop days that aged out. Syncs happen
+    at most every ROLLUP_SYNC_INTERVAL seconds unless forced; warming rounds always sync.
+    Blocking: call it through asyncio.to_thread.
+    """
+    key = (site_url, search_type)
+    rollup = DAILY_ROLLUPS.get(key)
+    if (rollup is not None and not force and CACHE_WARMING.get() is None
+            and time.time() - rollup.synced_at < ROLLUP_SYNC_INTERVAL):
+        return rollup
+
+    seen_sync = rollup.synced_at if rollup is not None else 0.0
+    with state_lock("daily_rollups", key):
+        # Another thread or worker may have synced while this one waited
+        rollup = DAILY_ROLLUPS.get(key)
+        if rollup is not None and rollup.synced_at > seen_sync:
+            return rollup
+        return _sync_daily_rollup(service, site_url, search_type, rollup)
+
+def _sync_daily_rollup(service, site_url: str, search_type: str, rollup: Optional[DailyRollup]) -> DailyRollup:
+    """
+    Fetches the missing and revisable days on top of `rollup` and stores the result; runs under state_lock.
+
+    The new series is built on a copy and replaces the stored one in a single set, so
+    readers holding the previous rollup never see a half-merged series.
+    """
+    key = (site_url, search_type)
+    today = datetime.now().date()
+    history_start = today - timedelta(days=ROLLUP_HISTORY_DAYS - 1)
+    if rollup is not None:
+        rollup = rollup.copy()
+        rollup.trim(history_start)
+    if rollup is None or not rollup.clicks or rollup.synced_at < time.time() - ROLLUP_HISTORY_DAYS * 86400:
+        rollup = DailyRollup()
+        fetch_start = history_start
+    else:
+        fetch_start = max(rollup.start, rollup.last - timedelta(days=ROLLUP_REFRESH_DAYS - 1))
+
+    request = {
+        "startDate": fetch_start.strftime("%Y-%m-%d"),
+        "endDate": today.strftime("%Y-%m-%d"),
+        "dimensions": ["date"],
+        "searchType": search_type,
+        "rowLimit": (today - fetch_start).days + 1
+    }
+    rows = fetch_analytics_rows(service, site_url, request, use_cache=False)
+    rollup.merge(rows, fetch_start)
+    rollup.synced_at = time.time()
+    DAILY_ROLLUPS.set(key, rollup)
+    return rollup
+
+def bucket_start(day: date, granularity: str) -> date:
+    """Returns the first day of the day, week (Monday), month or quarter containing `day`."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "quarter":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day
+
+def bucket_end(start: date, granularity: str) -> date:
+    """Returns the last day of the bucket starting at `start`."""
+    if granularity == "week":
+        return start + timedelta(days=6)
+    if granularity in ("month", "quarter"):
+        months = start.month - 1 + (1 if granularity == "month" else 3)
+        return start.replace(year=start.year + months // 12, month=months % 12 + 1) - timedelta(days=1)
+    return start
+
+def bucket_label(start: date, granularity: str) -> str:
+    if granularity == "week":
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    if granularity == "month":
+        return start.strftime("%Y-%m")
+    if granularity == "quarter":
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return start.strftime("%Y-%m-%d")
+
+def comparison_bucket(start: date, granularity: str, compare: str) -> date:
+    """Returns the start of the bucket a bucket is compared against: the previous one, or the same one a year earlier."""
+    if compare == "previous":
+        return bucket_start(start - timedelta(days=1), granularity)
+    if granularity in ("day", "week"):
+        # 52 weeks back keeps weekdays aligned
+        return start - timedelta(days=364)
+    return start.replace(year=start.year - 1)
+
+@mcp.tool()
+async def get_performance_rollup(
+    site_url: str,
+    granularity: str = "week",
+    periods: int = 12,
+    compare: str = "previous",
+    search_type: str = "WEB",
+    end_date: str = None,
+    refresh: bool = False
+) -> str:
+    """
+    Get clicks, impressions, CTR and position rolled up by day, week, month or quarter.
+
+    Totals come from a locally stored daily series covering up to GSC_ROLLUP_HISTORY_DAYS days.
+    It is synced incrementally, so any granularity or comparison window is answered without
+    new API calls. CTR is clicks / impressions over the bucket and position is weighted by impressions.
+    Weeks start on Monday. A partial bucket is compared over the same number of days.
+
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match)
+        granularity: Bucket size: day, week, month or quarter (default: week)
+        periods: Number of buckets to list, ending with the bucket containing end_date (default: 12)
+        compare: previous (preceding bucket), yoy (same bucket one year earlier) or none (default: previous)
+        search_type: Type of search results (WEB, IMAGE, VIDEO, NEWS, DISCOVER)
+        end_date: Last day to include (YYYY-MM-DD); defaults to the latest day with data
+        refresh: Sync the daily series now even if it was synced recently
+    """
+    try:
+        granularity = granularity.lower()
+        compare = compare.lower()
+        if granularity not in ROLLUP_GRANULARITIES:
+            return f"Invalid granularity: {granularity}. Use one of: {', '.join(ROLLUP_GRANULARITIES)}"
+        if compare not in ("previous", "yoy", "none"):
+            return f"Invalid compare: {compare}. Use previous, yoy or none"
+
+        service = get_gsc_service()
+        rollup = await asyncio.to_thread(sync_daily_rollup, service, site_url, search_type.upper(), force=refresh)
+        if not rollup.clicks:
+            return f"No data available for {site_url}."
+
+        end = rollup.last
+        if end_date:
+            end = min(end, datetime.strptime(end_date, "%Y-%m-%d").date())
+        if end < rollup.start:
+            return f"No data before {end.strftime('%Y-%m-%d')}; stored data starts on {rollup.start.strftime('%Y-%m-%d')}."
+
+        # Walk back from the bucket containing `end`, clipping the first and last bucket to the data
+        buckets = []
+        start = bucket_start(end, granularity)
+        while len(buckets) < max(1, periods) and bucket_end(start, granularity) >= rollup.start:
+            buckets.append((start, max(start, rollup.start), min(bucket_end(start, granularity), end)))
+            start = bucket_start(start - timedelta(days=1), granularity)
+        buckets.reverse()
+
+        def comparison(full_start: date, first: date, last: date) -> Optional[tuple]:
+            if compare == "none":
+                return None
+            other = comparison_bucket(full_start, granularity, compare)
+            other_end = bucket_end(other, granularity)
+            if first != full_start or last != bucket_end(full_start, granularity):
+                other, other_end = other + (first - full_start), min(other_end, other + (last - full_start))
+            return rollup.totals(other, other_end) if rollup.covers(other, other_end) else None
+
+        compare_label = {"previous": "vs previous period", "yoy": "vs same period last year", "none": "no comparison"}[compare]
+        result_lines = [f"Performance rollup for {site_url} by {granularity} ({compare_label}):"]
+        result_lines.append(
+            f"Stored daily data: {rollup.start.strftime('%Y-%m-%d')} to {rollup.last.strftime('%Y-%m-%d')}, "
+            f"synced {int(time.time() - rollup.synced_at)}s ago"
+        )
+        result_lines.append("-" * 80)
+        header = "Period | Days | Clicks | Impressions | CTR | Position"
+        if compare != "none":
+            header += " | Clicks Δ | Impressions Δ | CTR Δ | Position Δ"
+        result_lines.append(header)
+        result_lines.append("-" * 80)
+
+        def pct_change(current: float, previous: float) -> str:
+            return f"{(current - previous) / previous * 100:+.1f}%" if previous else "n/a"
+
+        partial = False
+        for full_start, first, last in buckets:
+            clicks, impressions, ctr, position = rollup.totals(first, last)
+            label = bucket_label(full_start, granularity)
+            if first != full_start or last != bucket_end(full_start, granularity):
+                label += "*"
+                partial = True
+            line = f"{label} | {(last - first).days + 1} | {clicks:,} | {impressions:,} | {ctr * 100:.2f}% | {position:.1f}"
+            if compare != "none":
+                other = comparison(full_start, first, last)
+                if other is None:
+                    line += " | n/a | n/a | n/a | n/a"
+                else:
+                    line += (f" | {pct_change(clicks, other[0])} | {pct_change(impressions, other[1])} | "
+                             f"{(ctr - other[2]) * 100:+.2f}pp | {position - other[3]:+.1f}")
+            result_lines.append(line)
+
+        clicks, impressions, ctr, position = rollup.totals(buckets[0][1], buckets[-1][2])
+        result_lines.append("-" * 80)
+        result_lines.append(f"Total: {clicks:,} clicks | {impressions:,} impressions | {ctr * 100:.2f}% CTR | {position:.1f} avg position")
+        if partial:
+            result_lines.append("* Partial period: only days with stored data are included")
         return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        return f"Error retrieving advanced search analytics: {str(e)}"
+        return f"Error retrieving performance rollup: {str(e)}"
+
+# Most periods compare_multiple_periods accepts in one call
+MAX_COMPARE_PERIODS = 36
+# Days Search Console typically needs before a day's data is complete
+DATA_DELAY_DAYS = 3
+PERIOD_COUNT_PATTERN = re.compile(r"^\s*(\d+)\s*(day|week|month|quarter)s?\s*$", re.IGNORECASE)
+
+def parse_periods(spec: str, today: date) -> List[tuple]:
+    """
+    Parses "12 months"-style specs or explicit "YYYY-MM-DD..YYYY-MM-DD" ranges into (label, start, end).
+
+    Counted periods are whole calendar buckets ending with the last one complete after
+    DATA_DELAY_DAYS. Explicit ranges are separated by commas or newlines and kept in order.
+    """
+    match = PERIOD_COUNT_PATTERN.match(spec)
+    if match:
+        count, granularity = int(match.group(1)), match.group(2).lower()
+        latest = today - timedelta(days=DATA_DELAY_DAYS)
+        start = bucket_start(latest, granularity)
+        if bucket_end(start, granularity) > latest:
+            start = bucket_start(start - timedelta(days=1), granularity)
+        periods = []
+        for _ in range(count):
+            periods.append((bucket_label(start, granularity), start, bucket_end(start, granularity)))
+            start = bucket_start(start - timedelta(days=1), granularity)
+        return periods[::-1]
+
+    periods = []
+    for item in re.split(r"[,\n]", spec):
+        if not item.strip():
+            continue
+        first, separator, last = item.strip().partition("..")
+        if not separator:
+            raise ValueError(f"expected START..END, got {item.strip()!r}")
+        start = datetime.strptime(first.strip(), "%Y-%m-%d").date()
+        end = datetime.strptime(last.strip(), "%Y-%m-%d").date()
+        if end < start:
+            raise ValueError(f"{item.strip()} ends before it starts")
+        periods.append((f"{start.strftime('%Y-%m-%d')}..{end.strftime('%Y-%m-%d')}", start, end))
+    return periods
 
 @mcp.tool()
-async def compare_search_periods(
+async def compare_multiple_periods(
     site_url: str,
-    period1_start: str,
-    period1_end: str,
-    period2_start: str,
-    period2_end: str,
+    periods: str = "8 weeks",
     dimensions: str = "query",
-    limit: int = 10
+    metric: str = "clicks",
+    row_limit: int = 1000,
+    limit: int = 10,
+    search_type: str = "WEB",
+    filters: str = None,
+    force_refresh: bool = False
 ) -> str:
     """
-    Compare search analytics data between two time periods.
-    
+    Compare search analytics across any number of periods and list the biggest risers and decliners.
+
+    All periods are fetched concurrently (or served from the cache) and aligned into one
+    key-by-period matrix. For every key the change from the first to the last period, the
+    least-squares slope per period and the rank change are computed column by column.
+    A key missing from a period's top row_limit rows counts as 0 there.
+
     Args:
         site_url: The URL of the site in Search Console (must be exact match)
-        period1_start: Start date for period 1 (YYYY-MM-DD)
-        period1_end: End date for period 1 (YYYY-MM-DD)
-        period2_start: Start date for period 2 (YYYY-MM-DD)
-        period2_end: End date for period 2 (YYYY-MM-DD)
-        dimensions: Dimensions to group by (default: query)
-        limit: Number of top results to compare (default: 10)
+        periods: "<N> days|weeks|months|quarters" for the last N complete calendar periods, or
+                 START..END date ranges (YYYY-MM-DD) separated by commas (default: 8 weeks)
+        dimensions: Dimensions to group by, comma-separated (default: query)
+        metric: Metric to compare: clicks or impressions (default: clicks)
+        row_limit: Top rows fetched per period (max 25000, default: 1000)
+        limit: Number of risers and of decliners to list (default: 10)
+        search_type: Type of search results (WEB, IMAGE, VIDEO, NEWS, DISCOVER)
+        filters: Filters applied by the API to every period, e.g. query~shoes; device=MOBILE (same syntax as
+                 get_advanced_search_analytics)
+        force_refresh: Ignore cached analytics results and query the API again (default: false)
     """
     try:
+        metric = metric.lower()
+        if metric not in ("clicks", "impressions"):
+            return f"Invalid metric: {metric}. Use clicks or impressions"
+        try:
+            period_list = parse_periods(periods, datetime.now().date())
+        except ValueError as e:
+            return f"Invalid periods: {str(e)}"
+        if len(period_list) < 2:
+            return "Provide at least two periods to compare."
+        if len(period_list) > MAX_COMPARE_PERIODS:
+            return f"Too many periods ({len(period_list)}). Please compare at most {MAX_COMPARE_PERIODS} periods per call."
+
         service = get_gsc_service()
-        
-        # Parse dimensions
         dimension_list = [d.strip() for d in dimensions.split(",")]
-        
-        # Build requests for both periods
-        period1_request = {
-            "startDate": period1_start,
-            "endDate": period1_end,
-            "dimensions": dimension_list,
-            "rowLimit": 1000  # Get more to ensure we can match items between periods
-        }
-        
-        period2_request = {
-            "startDate": period2_start,
-            "endDate": period2_end,
-            "dimensions": dimension_list,
-            "rowLimit": 1000
-        }
-        
-        # Execute requests
-        period1_response = service.searchanalytics().query(siteUrl=site_url, body=period1_request).execute()
-        period2_response = service.searchanalytics().query(siteUrl=site_url, body=period2_request).execute()
-        
-        period1_rows = period1_response.get("rows", [])
-        period2_rows = period2_response.get("rows", [])
-        
-        if not period1_rows and not period2_rows:
-            return f"No data found for either period for {site_url}."
-        
-        # Create dictionaries for easy lookup
-        period1_data = {tuple(row.get("keys", [])): row for row in period1_rows}
-        period2_data = {tuple(row.get("keys", [])): row for row in period2_rows}
-        
-        # Find common keys and calculate differences
-        all_keys = set(period1_data.keys()) | set(period2_data.keys())
-        comparison_data = []
-        
-        for key in all_keys:
-            p1_row = period1_data.get(key, {"clicks": 0, "impressions": 0, "ctr": 0, "position": 0})
-            p2_row = period2_data.get(key, {"clicks": 0, "impressions": 0, "ctr": 0, "position": 0})
-            
-            # Calculate differences
-            click_diff = p2_row.get("clicks", 0) - p1_row.get("clicks", 0)
-            click_pct = (click_diff / p1_row.get("clicks", 1)) * 100 if p1_row.get("clicks", 0) > 0 else float('inf')
-            
-            imp_diff = p2_row.get("impressions", 0) - p1_row.get("impressions", 0)
-            imp_pct = (imp_diff / p1_row.get("impressions", 1)) * 100 if p1_row.get("impressions", 0) > 0 else float('inf')
-            
-            ctr_diff = p2_row.get("ctr", 0) - p1_row.get("ctr", 0)
-            pos_diff = p1_row.get("position", 0) - p2_row.get("position", 0)  # Note: lower position is better
-            
-            comparison_data.append({
-                "key": key,
-                "p1_clicks": p1_row.get("clicks", 0),
-                "p2_clicks": p2_row.get("clicks", 0),
-                "click_diff": click_diff,
-                "click_pct": click_pct,
-                "p1_impressions": p1_row.get("impressions", 0),
-                "p2_impressions": p2_row.get("impressions", 0),
-                "imp_diff": imp_diff,
-                "imp_pct": imp_pct,
-                "p1_ctr": p1_row.get("ctr", 0),
-                "p2_ctr": p2_row.get("ctr", 0),
-                "ctr_diff": ctr_diff,
-                "p1_position": p1_row.get("position", 0),
-                "p2_position": p2_row.get("position", 0),
-                "pos_diff": pos_diff
-            })
-        
-        # Sort by absolute click difference (can change to other metrics)
-        comparison_data.sort(key=lambda x: abs(x["click_diff"]), reverse=True)
-        
-        # Format results
-        result_lines = [f"Search analytics comparison for {site_url}:"]
-        result_lines.append(f"Period 1: {period1_start} to {period1_end}")
-        result_lines.append(f"Period 2: {period2_start} to {period2_end}")
-        result_lines.append(f"Dimension(s): {dimensions}")
-        result_lines.append(f"Top {min(limit, len(comparison_data))} results by change in clicks:")
-        result_lines.append("\n" + "-" * 100 + "\n")
-        
-        # Create header
-        dim_header = " | ".join([d.capitalize() for d in dimension_list])
-        result_lines.append(f"{dim_header} | P1 Clicks | P2 Clicks | Change | % | P1 Pos | P2 Pos | Pos Δ")
-        result_lines.append("-" * 100)
-        
-        # Add data rows (limited to requested number)
-        for item in comparison_data[:limit]:
-            key_str = " | ".join([str(k)[:100] for k in item["key"]])
-            
-            # Format the click change with color indicators
-            click_change = item["click_diff"]
-            click_pct = item["click_pct"] if item["click_pct"] != float('inf') else "N/A"
-            click_pct_str = f"{click_pct:.1f}%" if click_pct != "N/A" else "N/A"
-            
-            # Format position change (positive is good - moving up in rankings)
-            pos_change = item["pos_diff"]
-            
-            result_lines.append(
-                f"{key_str} | {item['p1_clicks']} | {item['p2_clicks']} | "
-                f"{click_change:+d} | {click_pct_str} | "
-                f"{item['p1_position']:.1f} | {item['p2_position']:.1f} | {pos_change:+.1f}"
-            )
-        
+        row_limit = min(row_limit, 25000)
+        base_request = {"dimensions": dimension_list, "rowLimit": row_limit, "searchType": search_type.upper()}
+        if filters:
+            try:
+                base_request["dimensionFilterGroups"] = compile_api_filters(filters)
+            except ValueError as e:
+                return f"Invalid filters: {str(e)}"
+
+        async def fetch(start: date, end: date) -> AnalyticsRows:
+            request = dict(base_request, startDate=start.strftime("%Y-%m-%d"), endDate=end.strftime("%Y-%m-%d"))
+            return await asyncio.to_thread(fetch_analytics_rows, service, site_url, request, use_cache=not force_refresh)
+
+        period_rows = await asyncio.gather(*(fetch(start, end) for _, start, end in period_list))
+
+        # Align every period on one key table: strings are re-interned into a shared table so
+        # keys compare as tuples of ints, and each period becomes one column of the matrix
+        string_ids: Dict[str, int] = {}
+        key_ids: Dict[tuple, int] = {}
+        columns = []
+        for rows in period_rows:
+            translate = [string_ids.setdefault(value, len(string_ids)) for value in rows.strings]
+            period_keys = zip(*(map(translate.__getitem__, column) for column in rows.key_columns))
+            placed = [key_ids.setdefault(key, len(key_ids)) for key in period_keys]
+            columns.append((placed, getattr(rows, metric), rows.position))
+        if not key_ids:
+            return f"No data found for any period for {site_url}."
+
+        strings = list(string_ids)
+        keys = list(key_ids)
+        size = len(keys)
+        matrix = []
+        positions = []
+        for placed, values, position in columns:
+            column = array("d", bytes(8 * size))
+            column_position = array("d", bytes(8 * size))
+            for key_id, value, pos in zip(placed, values, position):
+                column[key_id] = value
+                column_position[key_id] = pos
+            matrix.append(column)
+            positions.append(column_position)
+
+        # Least-squares slope of each key over period index t: sum((t - mean) * y_t) / sum((t - mean)^2)
+        count = len(matrix)
+        mean_t = (count - 1) / 2
+        denominator = sum((t - mean_t) ** 2 for t in range(count))
+        slopes = array("d", bytes(8 * size))
+        for t, column in enumerate(matrix):
+            weight = (t - mean_t) / denominator
+            slopes = array("d", map(lambda s, y: s + weight * y, slopes, column))
+        deltas = array("d", map(lambda last, first: last - first, matrix[-1], matrix[0]))
+
+        def ranks(column: array) -> Dict[int, int]:
+            ordered = sorted((key_id for key_id in range(size) if column[key_id] > 0), key=column.__getitem__, reverse=True)
+            return {key_id: rank for rank, key_id in enumerate(ordered, 1)}
+
+        first_ranks, last_ranks = ranks(matrix[0]), ranks(matrix[-1])
+        risers = heapq.nlargest(limit, (k for k in range(size) if slopes[k] > 0), key=lambda k: (slopes[k], deltas[k]))
+        decliners = heapq.nsmallest(limit, (k for k in range(size) if slopes[k] < 0), key=lambda k: (slopes[k], deltas[k]))
+
+        result_lines = [f"Multi-period comparison for {site_url} ({count} periods, by {metric}):"]
+        for index, (label, start, end) in enumerate(period_list, 1):
+            result_lines.append(f"P{index}: {label} ({start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}), "
+                                f"{len(period_rows[index - 1])} rows, {sum(matrix[index - 1]):,.0f} {metric}")
+        result_lines.append(f"Dimension(s): {dimensions} | {size} distinct keys")
+        if filters:
+            result_lines.append(f"Filters: {filters}")
+
+        dim_header = " | ".join(d.capitalize() for d in dimension_list)
+        period_header = " | ".join(f"P{index}" for index in range(1, count + 1))
+
+        def rank_str(key_id: int) -> str:
+            first, last = first_ranks.get(key_id), last_ranks.get(key_id)
+            return f"{first or '-'}→{last or '-'}" + (f" ({first - last:+d})" if first and last else "")
+
+        for title, movers in (("Top risers", risers), ("Top decliners", decliners)):
+            result_lines.append(f"\n{title} (by slope per period):")
+            if not movers:
+                result_lines.append("None")
+                continue
+            result_lines.append(f"{dim_header} | {period_header} | Δ | Slope | Rank | Pos First→Last")
+            result_lines.append("-" * 100)
+            for key_id in movers:
+                key_str = " | ".join(strings[string_id][:100] for string_id in keys[key_id])
+                series = " | ".join(f"{column[key_id]:.0f}" for column in matrix)
+                first_pos, last_pos = positions[0][key_id], positions[-1][key_id]
+                pos_str = f"{first_pos:.1f}→{last_pos:.1f}" if first_pos and last_pos else "-"
+                result_lines.append(
+                    f"{key_str} | {series} | {deltas[key_id]:+.0f} | {slopes[key_id]:+.2f} | {rank_str(key_id)} | {pos_str}"
+                )
+
         return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        return f"Error comparing search periods: {str(e)}"
+        return f"Error comparing multiple periods: {str(e)}"
+
+# Words ignored when comparing queries
+CLUSTER_STOPWORDS = frozenset(("a", "an", "and", "are", "at", "by", "for", "from", "in", "is", "of", "on", "or", "the", "to", "with"))
+# MinHash signature length; the hash functions are the 32-bit words of one SHAKE-128 digest per word
+MINHASH_SIZE = 24
+# Cluster heads kept per LSH bucket; caps the candidates checked per query
+LSH_BUCKET_HEADS = 4
+
+def lsh_bands(threshold: float, size: int = MINHASH_SIZE) -> int:
+    """
+    Returns how many bands to split a signature into for a Jaccard similarity threshold.
+
+    Picks the divisor b of `size` with the highest LSH threshold (1/b)^(b/size) that is still at
+    or below `threshold`, so pairs above it usually share a band and false candidates are
+    removed by the exact check afterwards.
+    """
+    divisors = [b for b in range(1, size + 1) if size % b == 0]
+    below = [b for b in divisors if (1 / b) ** (b / size) <= threshold]
+    return min(below, key=lambda b: threshold - (1 / b) ** (b / size)) if below else size
+
+def minhash_clusters(queries: List[str], order: List[int], threshold: float) -> tuple:
+    """
+    Groups queries whose word sets have a Jaccard similarity of at least `threshold`.
+
+    Queries are visited in `order` (most clicks first). Each one joins the most similar
+    existing cluster head among its LSH candidates, or becomes a new head. Only heads are
+    stored in the band tables, so time and memory grow linearly with the number of queries
+    and clusters cannot chain into unrelated topics. Word signatures are computed once per
+    distinct word; a query's signature is the element-wise minimum of its words' signatures.
+
+    Returns (cluster id per query as array('I'), query index of each cluster head).
+    """
+    unpack = struct.Struct(f"<{MINHASH_SIZE}I").unpack
+    bands = lsh_bands(threshold)
+    width = MINHASH_SIZE // bands
+    tables = [{} for _ in range(bands)]
+    words: Dict[str, Optional[str]] = {}
+    signatures: Dict[str, tuple] = {}
+    head_words: List[frozenset] = []
+    heads: List[int] = []
+    cluster_of = array("I", bytes(4 * len(queries)))
+
+    find_words = TOKEN_PATTERN.findall
+    for done, index in enumerate(order):
+        if done % 50000 == 0:
+            report_progress(done=done, total=len(order), message=f"Clustered {done} queries")
+        tokens = set()
+        for token in find_words(queries[index].lower()):
+            word = words.get(token, "")
+            if word == "":
+                # Fold simple plurals so "shoe" and "shoes" count as the same word
+                word = None if token in CLUSTER_STOPWORDS else token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+                words[token] = word
+            if word is not None:
+                tokens.add(word)
+        if not tokens:
+            tokens.add(queries[index])
+
+        signature = None
+        for word in tokens:
+            word_signature = signatures.get(word)
+            if word_signature is None:
+                word_signature = signatures[word] = unpack(hashlib.shake_128(word.encode("utf-8")).digest(4 * MINHASH_SIZE))
+            # A comprehension is several times faster than map(min, ...) for these short rows
+            signature = word_signature if signature is None else [x if x < y else y for x, y in zip(signature, word_signature)]
+        band_keys = list(zip(*[iter(signature)] * width))
+
+        best, best_similarity = None, threshold
+        candidates = set()
+        for bucket in map(dict.get, tables, band_keys):
+            if bucket is not None:
+                candidates.update(bucket)
+        size = len(tokens)
+        for candidate in candidates:
+            other = head_words[candidate]
+            shared = len(tokens & other)
+            similarity = shared / (size + len(other) - shared)
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is None:
+            best = len(heads)
+            heads.append(index)
+            head_words.append(frozenset(tokens))
+            for table, band_key in zip(tables, band_keys):
+                bucket = table.setdefault(band_key, [])
+                if len(bucket) < LSH_BUCKET_HEADS:
+                    bucket.append(best)
+        cluster_of[index] = best
+    return cluster_of, heads
 
 @mcp.tool()
-async def get_search_by_page_query(
+async def cluster_queries(
     site_url: str,
-    page_url: str,
-    days: int = 28
+    days: int = 28,
+    similarity: float = 0.5,
+    min_size: int = 2,
+    limit: int = 25,
+    max_queries: int = 500000,
+    search_type: str = "WEB",
+    filters: str = None,
+    force_refresh: bool = False
 ) -> str:
     """
-    Get search analytics data for a specific page, broken down by query.
-    
+    Group the site's queries into topics of near-duplicate and related queries, with totals per topic.
+
+    Fetches the complete query list (up to max_queries) and clusters it with MinHash/LSH over each
+    query's words, ignoring word order, common stop words and plural endings. Every cluster is
+    led by its query with the most clicks. Runs in roughly linear time, so several hundred
+    thousand queries take seconds once fetched.
+
     Args:
         site_url: The URL of the site in Search Console (must be exact match)
-        page_url: The specific page URL to analyze
         days: Number of days to look back (default: 28)
+        similarity: Minimum share of words (Jaccard similarity, 0-1) a query must have in common with a cluster's
+                    lead query to join it (default: 0.5)
+        min_size: Smallest cluster listed, in queries (default: 2)
+        limit: Number of clusters to list, largest by clicks first (default: 25)
+        max_queries: Maximum number of queries to fetch (default: 500000)
+        search_type: Type of search results (WEB, IMAGE, VIDEO, NEWS, DISCOVER)
+        filters: Filters applied by the API before queries are fetched, e.g. page~"/blog/"; country=usa (same
+                 syntax as get_advanced_search_analytics)
+        force_refresh: Ignore cached analytics results and query the API again (default: false)
     """
     try:
+        if not 0 < similarity <= 1:
+            return "Invalid similarity: use a value between 0 and 1, e.g. 0.5"
+
         service = get_gsc_service()
-        
-        # Calculate date range
+
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days)
-        
-        # Build request with page filter
         request = {
             "startDate": start_date.strftime("%Y-%m-%d"),
             "endDate": end_date.strftime("%Y-%m-%d"),
             "dimensions": ["query"],
-            "dimensionFilterGroups": [{
-                "filters": [{
-                    "dimension": "page",
-                    "operator": "equals",
-                    "expression": page_url
-                }]
-            }],
-            "rowLimit": 20,  # Top 20 queries for this page
-            "orderBy": [{"metric": "CLICK_COUNT", "direction": "descending"}]
+            "searchType": search_type.upper()
         }
-        
-        # Execute request
-        response = service.searchanalytics().query(siteUrl=site_url, body=request).execute()
-        
-        if not response.get("rows"):
-            return f"No search data found for page {page_url} in the last {days} days."
-        
-        # Format results
-        result_lines = [f"Search queries for page {page_url} (last {days} days):"]
-        result_lines.append("\n" + "-" * 80 + "\n")
-        
-        # Create header
-        result_lines.append("Query | Clicks | Impressions | CTR | Position")
-        result_lines.append("-" * 80)
-        
-        # Add data rows
-        for row in response.get("rows", []):
-            query = row.get("keys", ["Unknown"])[0]
-            clicks = row.get("clicks", 0)
-            impressions = row.get("impressions", 0)
-            ctr = row.get("ctr", 0) * 100
-            position = row.get("position", 0)
-            
-            result_lines.append(f"{query[:100]} | {clicks} | {impressions} | {ctr:.2f}% | {position:.1f}")
-        
-        # Add total metrics
-        total_clicks = sum(row.get("clicks", 0) for row in response.get("rows", []))
-        total_impressions = sum(row.get("impressions", 0) for row in response.get("rows", []))
-        avg_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
-        
-        result_lines.append("-" * 80)
-        result_lines.append(f"TOTAL | {total_clicks} | {total_impressions} | {avg_ctr:.2f}% | -")
-        
+        if filters:
+            try:
+                request["dimensionFilterGroups"] = compile_api_filters(filters)
+            except ValueError as e:
+                return f"Invalid filters: {str(e)}"
+        # Fetching and clustering run on worker threads so the event loop keeps serving other requests
+        rows = await asyncio.to_thread(
+            fetch_analytics_rows, service, site_url, request, max_rows=max_queries, use_cache=not force_refresh
+        )
+        if not rows:
+            return f"No query data found for {site_url} in the last {days} days."
+
+        strings = rows.strings
+        queries = [strings[string_id] for string_id in rows.key_columns[0]]
+        order = sorted(range(len(rows)), key=rows.clicks.__getitem__, reverse=True)
+        started = time.perf_counter()
+        cluster_of, heads = await asyncio.to_thread(minhash_clusters, queries, order, similarity)
+        elapsed = time.perf_counter() - started
+
+        # Cluster totals; CTR and position are recomputed from the summed clicks and impressions
+        count = len(heads)
+        sizes = array("I", bytes(4 * count))
+        clicks = array("q", bytes(8 * count))
+        impressions = array("q", bytes(8 * count))
+        weighted_position = array("d", bytes(8 * count))
+        samples: Dict[int, List[int]] = {}
+        for index in order:
+            cluster = cluster_of[index]
+            sizes[cluster] += 1
+            clicks[cluster] += rows.clicks[index]
+            impressions[cluster] += rows.impressions[index]
+            weighted_position[cluster] += rows.position[index] * rows.impressions[index]
+            members = samples.setdefault(cluster, [])
+            if len(members) < 4:
+                members.append(index)
+
+        listed = [cluster for cluster in range(count) if sizes[cluster] >= min_size]
+        top = heapq.nlargest(limit, listed, key=lambda cluster: (clicks[cluster], impressions[cluster]))
+        clustered_queries = sum(sizes[cluster] for cluster in listed)
+
+        result_lines = [f"Query clusters for {site_url} (last {days} days, similarity ≥ {similarity:g}):"]
+        result_lines.append(
+            f"{len(rows):,} queries in {count:,} clusters; {len(listed):,} clusters with at least {min_size} queries "
+            f"cover {clustered_queries:,} queries (clustered in {elapsed:.1f}s)"
+        )
+        if filters:
+            result_lines.append(f"Filters: {filters}")
+        if not top:
+            result_lines.append("No clusters of that size found.")
+            return "\n".join(result_lines)
+
+        result_lines.append("-" * 100)
+        result_lines.append("Cluster | Queries | Clicks | Impressions | CTR | Position | Other queries")
+        result_lines.append("-" * 100)
+        for cluster in top:
+            ctr = clicks[cluster] / impressions[cluster] * 100 if impressions[cluster] else 0.0
+            position = weighted_position[cluster] / impressions[cluster] if impressions[cluster] else 0.0
+            others = ", ".join(queries[index][:60] for index in samples[cluster][1:])
+            more = sizes[cluster] - len(samples[cluster])
+            if more > 0:
+                others += f" (+{more:,} more)"
+            result_lines.append(
+                f"{queries[heads[cluster]][:100]} | {sizes[cluster]:,} | {clicks[cluster]:,} | {impressions[cluster]:,} | "
+                f"{ctr:.2f}% | {position:.1f} | {others}"
+            )
         return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        return f"Error retrieving page query data: {str(e)}"
+        return f"Error clustering queries: {str(e)}"
 
 @mcp.tool()
 async def list_sitemaps_enhanced(site_url: str, sitemap_index: str = None) -> str:
@@ -1401,10 +5468,10 @@ async def list_sitemaps_enhanced(site_url: str, sitemap_index: str = None) -> st
         
         # Get sitemaps list
         if sitemap_index:
-            sitemaps = service.sitemaps().list(siteUrl=site_url, sitemapIndex=sitemap_index).execute()
+            sitemaps = await QUOTA.run("sitemaps", lambda: service.sitemaps().list(siteUrl=site_url, sitemapIndex=sitemap_index).execute())
             source = f"child sitemaps from index: {sitemap_index}"
         else:
-            sitemaps = service.sitemaps().list(siteUrl=site_url).execute()
+            sitemaps = await QUOTA.run("sitemaps", lambda: service.sitemaps().list(siteUrl=site_url).execute())
             source = "all submitted sitemaps"
         
         if not sitemaps.get("sitemap"):
@@ -1462,9 +5529,69 @@ async def list_sitemaps_enhanced(site_url: str, sitemap_index: str = None) -> st
             result_lines.append(f"\nNote: {pending_count} sitemaps are still pending processing by Google.")
         
         return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
         return f"Error retrieving sitemaps: {str(e)}"
 
+@mcp.tool()
+async def crawl_sitemap(sitemap_url: str, max_urls: int = 50000, concurrency: int = 8, timeout: int = 30,
+                        batch_size: int = INSPECTION_BATCH_LIMIT) -> str:
+    """
+    Download a sitemap or sitemap index and list every page URL it contains.
+    
+    Child sitemaps of an index are fetched in parallel and parsed as a stream, so very large
+    sitemaps are never loaded fully into memory. URLs are listed in numbered batches of
+    batch_size, one URL per line; the lines of a single batch can be passed as the urls of
+    batch_url_inspection or check_indexing_issues.
+    
+    Args:
+        sitemap_url: The full URL of the sitemap or sitemap index (.xml or .xml.gz)
+        max_urls: Maximum number of unique URLs to collect (default: 50000)
+        concurrency: Number of child sitemaps fetched in parallel (default: 8)
+        timeout: Per-request timeout in seconds (default: 30)
+        batch_size: URLs per batch in the output, 0 for one unbroken list (default: 10, the inspection tools' limit)
+    """
+    try:
+        result = await asyncio.to_thread(crawl_sitemaps, sitemap_url, max_urls, max(1, concurrency), timeout)
+        
+        if not result["sitemaps"]:
+            error = result["errors"].get(sitemap_url, "no sitemap could be fetched")
+            return f"Error crawling sitemap {sitemap_url}: {error}"
+        
+        # Format the results
+        result_lines = [f"Sitemap crawl for {sitemap_url}:"]
+        result_lines.append("-" * 80)
+        result_lines.append(f"Sitemaps fetched: {len(result['sitemaps'])}")
+        result_lines.append(f"Unique URLs: {len(result['urls'])}" + (f" (stopped at max_urls={max_urls})" if result["truncated"] else ""))
+        
+        if result["errors"]:
+            result_lines.append(f"\nSitemaps with errors ({len(result['errors'])}):")
+            for url, error in result["errors"].items():
+                result_lines.append(f"- {url}: {error}")
+        
+        if result["skipped_sitemaps"]:
+            result_lines.append(f"\nNested sitemaps not fetched (depth limit {SITEMAP_MAX_DEPTH}): {len(result['skipped_sitemaps'])}")
+        
+        urls = result["urls"]
+        if batch_size <= 0 or len(urls) <= batch_size:
+            result_lines.append("\nURLs:")
+            result_lines.append("-" * 80)
+            result_lines.extend(urls)
+        else:
+            batches = (len(urls) + batch_size - 1) // batch_size
+            result_lines.append(f"\nURLs in {batches} batches of up to {batch_size}:")
+            result_lines.append("-" * 80)
+            for number, start in enumerate(range(0, len(urls), batch_size), 1):
+                result_lines.append(f"\nBatch {number}/{batches}:")
+                result_lines.extend(urls[start:start + batch_size])
+        
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error crawling sitemap: {str(e)}"
+
 @mcp.tool()
 async def get_sitemap_details(site_url: str, sitemap_url: str) -> str:
     """
@@ -1478,7 +5605,7 @@ async def get_sitemap_details(site_url: str, sitemap_url: str) -> str:
         service = get_gsc_service()
         
         # Get sitemap details
-        details = service.sitemaps().get(siteUrl=site_url, feedpath=sitemap_url).execute()
+        details = await QUOTA.run("sitemaps", lambda: service.sitemaps().get(siteUrl=site_url, feedpath=sitemap_url).execute())
         
         if not details:
             return f"No details found for sitemap {sitemap_url}."
@@ -1530,6 +5657,8 @@ async def get_sitemap_details(site_url: str, sitemap_url: str) -> str:
             result_lines.append(f"list_sitemaps_enhanced with sitemap_index={sitemap_url}")
         
         return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
         return f"Error retrieving sitemap details: {str(e)}"
 
@@ -1546,11 +5675,11 @@ async def submit_sitemap(site_url: str, sitemap_url: str) -> str:
         service = get_gsc_service()
         
         # Submit the sitemap
-        service.sitemaps().submit(siteUrl=site_url, feedpath=sitemap_url).execute()
+        await QUOTA.run("sitemaps", lambda: service.sitemaps().submit(siteUrl=site_url, feedpath=sitemap_url).execute())
         
         # Verify submission by getting details
         try:
-            details = service.sitemaps().get(siteUrl=site_url, feedpath=sitemap_url).execute()
+            details = await QUOTA.run("sitemaps", lambda: service.sitemaps().get(siteUrl=site_url, feedpath=sitemap_url).execute())
             
             # Format response
             result_lines = [f"Successfully submitted sitemap: {sitemap_url}"]
@@ -1571,10 +5700,14 @@ async def submit_sitemap(site_url: str, sitemap_url: str) -> str:
             result_lines.append("\nNote: Google may take some time to process the sitemap. Check back later for full details.")
             
             return "\n".join(result_lines)
-        except:
+        except (DeadlineExceeded, RequestCancelled):
+            raise
+        except Exception:
             # If we can't get details, just return basic success message
             return f"Successfully submitted sitemap: {sitemap_url}\n\nGoogle will queue it for processing."
     
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
         return f"Error submitting sitemap: {str(e)}"
 
@@ -1592,7 +5725,7 @@ async def delete_sitemap(site_url: str, sitemap_url: str) -> str:
         
         # First check if the sitemap exists
         try:
-            service.sitemaps().get(siteUrl=site_url, feedpath=sitemap_url).execute()
+            await QUOTA.run("sitemaps", lambda: service.sitemaps().get(siteUrl=site_url, feedpath=sitemap_url).execute())
         except Exception as e:
             if "404" in str(e):
                 return f"Sitemap not found: {sitemap_url}. It may have already been deleted or was never submitted."
@@ -1600,10 +5733,12 @@ async def delete_sitemap(site_url: str, sitemap_url: str) -> str:
                 raise e
         
         # Delete the sitemap
-        service.sitemaps().delete(siteUrl=site_url, feedpath=sitemap_url).execute()
+        await QUOTA.run("sitemaps", lambda: service.sitemaps().delete(siteUrl=site_url, feedpath=sitemap_url).execute())
         
         return f"Successfully deleted sitemap: {sitemap_url}\n\nNote: This only removes the sitemap from Search Console. Any URLs already indexed will remain in Google's index."
     
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
         return f"Error deleting sitemap: {str(e)}"
 
@@ -1639,9 +5774,157 @@ async def manage_sitemaps(site_url: str, action: str, sitemap_url: str = None, s
         elif action == "delete":
             return await delete_sitemap(site_url, sitemap_url)
     
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
         return f"Error managing sitemaps: {str(e)}"
 
+# Last successful submission per (property, sitemap), used to make bulk submits idempotent
+SITEMAP_SUBMISSIONS = make_cache("sitemap_submissions", 7 * 86400, 100000, local=False)
+
+def parse_sitemap_pairs(sitemaps: str, site_url: Optional[str]) -> List[tuple]:
+    """
+    Parses "property sitemap" lines (space or comma separated) into unique pairs.
+    Lines holding only a sitemap URL use `site_url` as the property.
+    """
+    pairs = {}
+    for line_number, line in enumerate(sitemaps.splitlines(), start=1):
+        parts = [part for part in re.split(r"[\s,]+", line.strip()) if part]
+        if not parts:
+            continue
+        if len(parts) == 1:
+            if not site_url:
+                raise ValueError(f"Line {line_number} has no property and no default site_url was given")
+            parts = [site_url, parts[0]]
+        if len(parts) != 2:
+            raise ValueError(f"Line {line_number} should contain a property and a sitemap URL: {line.strip()}")
+        pairs.setdefault((parts[0], parts[1]), None)
+    return list(pairs)
+
+@mcp.tool()
+async def bulk_submit_sitemaps(
+    sitemaps: str,
+    site_url: str = None,
+    poll: bool = True,
+    poll_timeout: int = 120,
+    resubmit_after_minutes: int = 60
+) -> str:
+    """
+    Submit many sitemaps across one or more properties concurrently and report their processing status.
+
+    Submissions run in parallel within the API quota. A sitemap submitted successfully within the last
+    resubmit_after_minutes is not submitted again, so the same list can safely be re-run.
+
+    Args:
+        sitemaps: One entry per line, either "property sitemap_url" (space or comma separated) or just a sitemap_url when site_url is given
+        site_url: Default property for lines that only contain a sitemap URL
+        poll: Poll processing status after submitting until nothing is pending or poll_timeout is reached (default: true)
+        poll_timeout: Maximum number of seconds to spend polling (default: 120)
+        resubmit_after_minutes: Skip sitemaps submitted successfully within this many minutes (default: 60, use 0 to always submit)
+    """
+    try:
+        try:
+            pairs = parse_sitemap_pairs(sitemaps, site_url)
+        except ValueError as e:
+            return f"Invalid sitemaps list: {str(e)}"
+
+        if not pairs:
+            return "No sitemaps provided for submission."
+
+        report = {pair: {"submit": None, "details": None, "error": None} for pair in pairs}
+
+        def submit(pair):
+            get_gsc_service().sitemaps().submit(siteUrl=pair[0], feedpath=pair[1]).execute()
+
+        def get_details(pair):
+            return get_gsc_service().sitemaps().get(siteUrl=pair[0], feedpath=pair[1]).execute()
+
+        async def submit_one(pair):
+            last_submitted = SITEMAP_SUBMISSIONS.get(pair)
+            if last_submitted and resubmit_after_minutes > 0 and time.time() - last_submitted < resubmit_after_minutes * 60:
+                report[pair]["submit"] = "skipped (submitted recently)"
+                return
+            try:
+                await QUOTA.run("sitemaps", submit, pair)
+                SITEMAP_SUBMISSIONS.set(pair, time.time())
+                report[pair]["submit"] = "submitted"
+            except (DeadlineExceeded, RequestCancelled):
+                raise
+            except Exception as e:
+                report[pair]["submit"] = "failed"
+                report[pair]["error"] = str(e)
+            report_progress(
+                done=sum(1 for item in report.values() if item["submit"]), total=len(pairs),
+                partial=f"{pair[0]} {pair[1]}: {report[pair]['submit']}"
+            )
+
+        await asyncio.gather(*(submit_one(pair) for pair in pairs))
+
+        # Poll processing status with adaptive backoff until nothing is pending
+        pending = [pair for pair in pairs if report[pair]["error"] is None]
+        deadline = time.monotonic() + max(poll_timeout, 0)
+        delay = 2.0
+        while pending:
+            async def refresh(pair):
+                try:
+                    report[pair]["details"] = await QUOTA.run("sitemaps", get_details, pair)
+                except (DeadlineExceeded, RequestCancelled):
+                    raise
+                except Exception as e:
+                    report[pair]["error"] = str(e)
+
+            await asyncio.gather(*(refresh(pair) for pair in pending))
+            pending = [
+                pair for pair in pending
+                if report[pair]["error"] is None and report[pair]["details"].get("isPending", False)
+            ]
+            report_progress(message=f"{len(pending)} sitemaps still pending")
+            if not poll or not pending or time.monotonic() + delay > deadline:
+                break
+            await asyncio.sleep(delay * (0.8 + 0.4 * random.random()))
+            delay = min(delay * 2, 60.0)
+
+        # Format results
+        submitted = sum(1 for item in report.values() if item["submit"] == "submitted")
+        skipped = sum(1 for item in report.values() if item["submit"] and item["submit"].startswith("skipped"))
+        failed = sum(1 for item in report.values() if item["error"])
+
+        result_lines = ["Bulk Sitemap Submission Report:"]
+        result_lines.append("-" * 100)
+        result_lines.append(f"Sitemaps: {len(pairs)} | Submitted: {submitted} | Skipped: {skipped} | Failed: {failed} | Still pending: {len(pending)}")
+        result_lines.append("-" * 100)
+        result_lines.append("Property | Sitemap | Submit | Status | URLs | Errors | Warnings")
+        result_lines.append("-" * 100)
+
+        for (property_url, sitemap_url), item in report.items():
+            details = item["details"] or {}
+            if item["error"]:
+                status = f"Error: {item['error']}"
+            elif not details:
+                status = "Unknown"
+            else:
+                status = "Pending processing" if details.get("isPending", False) else "Processed"
+
+            url_count = "N/A"
+            for content in details.get("contents", []):
+                if content.get("type") == "web":
+                    url_count = content.get("submitted", "0")
+                    break
+
+            result_lines.append(
+                f"{property_url} | {sitemap_url} | {item['submit']} | {status} | {url_count} | "
+                f"{details.get('errors', 0)} | {details.get('warnings', 0)}"
+            )
+
+        if pending:
+            result_lines.append(f"\nNote: {len(pending)} sitemaps were still pending when polling stopped. Check back later with get_sitemap_details.")
+
+        return "\n".join(result_lines)
+    except (DeadlineExceeded, RequestCancelled):
+        raise
+    except Exception as e:
+        return f"Error submitting sitemaps in bulk: {str(e)}"
+
 @mcp.tool()
 async def get_creator_info() -> str:
     """
@@ -1675,20 +5958,109 @@ Amin combines technical SEO knowledge with programming skills to create innovati
 """
     return creator_info
 
+def serve_prefork(app, host: str, port: int, workers: int):
+    """
+    Serves a WSGI app from `workers` forked processes accepting on one shared socket.
+
+    Workers share caches and quota buckets through SHARED_STATE. Crashed workers are
+    restarted; SIGTERM or SIGINT stops all of them. Only the first worker warms the cache.
+    """
+    import signal
+    import socket
+    from werkzeug.serving import make_server
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(128)
+    listener.set_inheritable(True)
+
+    children = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid:
+            children[pid] = index
+            return
+        status = 1
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            if index == 0 and WARM_PROPERTIES:
+                CACHE_WARMER.start()
+            JOBS.start()
+            print(f"Worker {index} (pid {os.getpid()}) serving on port {port}", file=sys.stderr)
+            make_server(host, port, app, threaded=True, fd=listener.fileno()).serve_forever()
+            status = 0
+        finally:
+            os._exit(status)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for index in range(workers):
+        spawn(index)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"Worker {index} (pid {pid}) exited with status {status}, restarting", file=sys.stderr)
+            time.sleep(1)
+            spawn(index)
+    listener.close()
+
 if __name__ == "__main__":
     import os
+    import socket
     import sys
 
     use_flask = os.getenv("USE_FLASK", "").strip().lower() in ("1", "true", "yes")
     print("gsc_server.py STARTED", file=sys.stderr)
     print(f"USE_FLASK detected as: {use_flask}", file=sys.stderr)
+
+    # Forked workers start their own warmer; threads do not survive fork()
+    prefork = use_flask and WORKERS > 1 and hasattr(os, "fork")
+    if WARM_PROPERTIES:
+        print(f"Warming cache for: {', '.join(WARM_PROPERTIES)}", file=sys.stderr)
+        if not prefork:
+            CACHE_WARMER.start()
+    # Resume jobs interrupted by the last shutdown; forked workers start their own job threads
+    if not prefork:
+        JOBS.start()
     
     if use_flask:
         from flask import Flask, request, jsonify
         import asyncio
+        import select
 
         app = Flask(__name__)
 
+        def watch_disconnect(sock, scope, finished):
+            """Cancels the request once its client closes the connection."""
+            # The request body has been read, so a readable socket with no data means EOF
+            while not finished.wait(0.5):
+                try:
+                    readable, _, _ = select.select([sock], [], [], 0)
+                    if readable and not sock.recv(1, socket.MSG_PEEK):
+                        scope.cancel("Client disconnected")
+                        return
+                except (OSError, ValueError):
+                    scope.cancel("Client disconnected")
+                    return
+
         @app.route("/", methods=["GET", "POST"])
         def handle_mcp():
             if request.method == "GET":
@@ -1698,7 +6070,15 @@ if __name__ == "__main__":
                 # Debug-Ausgabe hinzufügen
                 print(f"Received request: {json.dumps(data)}", file=sys.stderr)
                 
-                result = asyncio.run(mcp.handle(data))
+                scope = RequestScope()
+                finished = threading.Event()
+                sock = request.environ.get("werkzeug.socket")
+                if sock is not None:
+                    threading.Thread(target=watch_disconnect, args=(sock, scope, finished), daemon=True).start()
+                try:
+                    result = asyncio.run(mcp.handle(data, scope))
+                finally:
+                    finished.set()
                 
                 # Debug-Ausgabe hinzufügen
                 print(f"Sending response: {json.dumps(result)}", file=sys.stderr)
@@ -1711,7 +6091,11 @@ if __name__ == "__main__":
         
         port = int(os.environ.get("PORT", 3000))
         print(f"Starting Flask server on port {port}", file=sys.stderr)
-        app.run(host="0.0.0.0", port=port)
+        if prefork:
+            print(f"Running {WORKERS} workers sharing state in {SHARED_STATE_PATH}", file=sys.stderr)
+            serve_prefork(app, "0.0.0.0", port, WORKERS)
+        else:
+            app.run(host="0.0.0.0", port=port)
     else:
         print("Starting in stdio mode...", file=sys.stderr)
         mcp.run(transport="stdio")
@@ -0,0 +1,91 @@
+"""
+Shared fixtures. Tools run against stub clients or benchmarks/fake_backend.py, so no Google
+credentials or network access are needed.
+"""
+import os
+import sys
+import tempfile
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+# Never fall through to interactive OAuth, and keep caches and jobs out of the checkout
+STATE_DIR = tempfile.mkdtemp(prefix="gsc-tests-")
+os.environ["GSC_SKIP_OAUTH"] = "true"
+os.environ["GSC_INSPECTION_CACHE_DIR"] = os.path.join(STATE_DIR, "inspection")
+os.environ["GSC_JOBS_DIR"] = os.path.join(STATE_DIR, "jobs")
+for name in ("GSC_CACHE_BACKEND", "GSC_CACHE_SECRET", "GSC_SHARED_STATE", "GSC_CREDENTIALS_POOL",
+             "GSC_WORKERS", "GSC_PROFILE", "GSC_API_BASE_URL"):
+    os.environ.pop(name, None)
+
+import pytest  # noqa: E402
+
+import gsc_server  # noqa: E402
+from fake_backend import FakeSearchConsoleHttp, SyntheticDataset  # noqa: E402
+
+
+class Executable:
+    """An API request whose execute() returns a fixed response."""
+
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class StubAnalytics:
+    """Service stand-in whose searchanalytics().query() pages through a fixed list of rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.bodies = []
+
+    def searchanalytics(self):
+        return self
+
+    def query(self, siteUrl, body):
+        self.bodies.append(body)
+        start = body.get("startRow", 0)
+        page = self.rows[start:start + body["rowLimit"]]
+        return Executable({"rows": page} if page else {})
+
+
+@pytest.fixture
+def analytics_stub(monkeypatch):
+    """Installs a StubAnalytics serving the given rows as the default service."""
+    def install(rows):
+        service = StubAnalytics(rows)
+        monkeypatch.setattr(gsc_server, "get_gsc_service", lambda: service)
+        return service
+
+    return install
+
+
+@pytest.fixture
+def dataset():
+    return SyntheticDataset(queries=200, pages=20, days=14)
+
+
+@pytest.fixture
+def fake_http(dataset):
+    return FakeSearchConsoleHttp(dataset)
+
+
+@pytest.fixture
+def service(fake_http, monkeypatch):
+    """A real searchconsole v1 service object answered by the fake backend, with cold caches."""
+    from googleapiclient.discovery import build
+
+    service = build("searchconsole", "v1", http=fake_http)
+    monkeypatch.setattr(gsc_server, "get_gsc_service", lambda: service)
+    # Quota pacing would only slow the tests down
+    monkeypatch.setattr(gsc_server, "QUOTA", gsc_server.QuotaScheduler(
+        {name: 10 ** 9 for name in gsc_server.QUOTA_LIMITS}, gsc_server.MAX_CONCURRENCY
+    ))
+    gsc_server.ANALYTICS_CACHE.clear()
+    gsc_server.DAILY_ROLLUPS.clear()
+    gsc_server.SEARCH_INDEXES.clear()
+    return service
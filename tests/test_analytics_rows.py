@@ -0,0 +1,63 @@
+import pytest
+
+import gsc_server
+from gsc_server import AnalyticsRows, fetch_analytics_rows
+
+API_ROWS = [
+    {"keys": ["red shoes", "https://shop.example/red"], "clicks": 12, "impressions": 340, "ctr": 0.035, "position": 3.2},
+    {"keys": ["red shoes", "https://shop.example/sale"], "clicks": 4, "impressions": 90, "ctr": 0.044, "position": 7.5},
+    {"keys": ["blue shoes", "https://shop.example/red"], "clicks": 0, "impressions": 15, "ctr": 0.0, "position": 21.0},
+]
+
+
+def test_rows_intern_repeated_dimension_values():
+    rows = AnalyticsRows(["query", "page"])
+    rows.extend(API_ROWS)
+    assert len(rows) == 3
+    assert rows.strings == ["red shoes", "https://shop.example/red", "https://shop.example/sale", "blue shoes"]
+    assert rows.key(1) == ["red shoes", "https://shop.example/sale"]
+    assert rows.key_ids(2) == (3, 1)
+    assert list(rows.clicks) == [12, 4, 0]
+    assert rows.nbytes() == 3 * (2 * 4 + 4 * 8)
+
+
+def test_row_views_behave_like_api_dicts():
+    rows = AnalyticsRows(["query", "page"])
+    rows.extend(API_ROWS)
+    for row, api_row in zip(rows, API_ROWS):
+        for field in ("keys", "clicks", "impressions", "ctr", "position"):
+            assert row[field] == api_row[field]
+            assert row.get(field) == api_row[field]
+        assert "clicks" in row
+        assert row.get("missing", "default") == "default"
+    assert rows[-1]["keys"] == ["blue shoes", "https://shop.example/red"]
+    with pytest.raises(IndexError):
+        rows[3]
+    with pytest.raises(KeyError):
+        rows[0]["missing"]
+
+
+def test_empty_rows():
+    rows = AnalyticsRows()
+    assert not rows
+    assert list(rows) == []
+    rows.append([], clicks=5, impressions=50)
+    assert rows and rows[0]["keys"] == []
+
+
+def test_fetch_pages_until_a_short_page(analytics_stub, monkeypatch):
+    monkeypatch.setattr(gsc_server, "SEARCH_ANALYTICS_PAGE_SIZE", 2)
+    service = analytics_stub(API_ROWS * 3)
+    rows = fetch_analytics_rows(service, "https://paging.example/", {"dimensions": ["query", "page"]}, max_rows=100)
+    assert len(rows) == 9
+    assert [body["startRow"] for body in service.bodies] == [0, 2, 4, 6, 8]
+    assert rows.key(8) == API_ROWS[2]["keys"]
+
+
+def test_fetch_stops_at_max_rows_and_row_limit(analytics_stub, monkeypatch):
+    monkeypatch.setattr(gsc_server, "SEARCH_ANALYTICS_PAGE_SIZE", 2)
+    service = analytics_stub(API_ROWS * 3)
+    assert len(fetch_analytics_rows(service, "https://limits.example/", {"dimensions": ["query", "page"]}, max_rows=5)) == 5
+    assert service.bodies[-1]["rowLimit"] == 1
+    # Without max_rows the request's own rowLimit caps the result, as for a plain query
+    assert len(fetch_analytics_rows(service, "https://limits.example/", {"dimensions": ["query", "page"], "rowLimit": 3})) == 3
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+import gsc_server
+from gsc_server import rolling_zscores
+
+
+def daily_rows(page, values, last_day):
+    first_day = last_day - timedelta(days=len(values) - 1)
+    return [{"keys": [page, (first_day + timedelta(days=i)).isoformat()], "clicks": value, "impressions": value * 10}
+            for i, value in enumerate(values)]
+
+
+def test_rolling_zscores_scores_recent_days_against_trailing_baseline():
+    assert rolling_zscores([10.0] * 35, 28, 7) == [0.0] * 7
+    drop = rolling_zscores([10.0] * 28 + [0.0] * 7, 28, 7)
+    assert len(drop) == 7
+    assert drop[0] == pytest.approx(-10 / 10 ** 0.5)
+    assert all(score < 0 for score in drop)
+    # The noise floor keeps a flat, sparse baseline from turning one click into a huge score
+    assert rolling_zscores([0.0] * 28 + [1.0], 28, 1) == [1.0]
+
+
+def test_rolling_zscores_short_series():
+    assert rolling_zscores([5.0] * 10, 28, 7) == []
+
+
+def test_detect_performance_anomalies_ranks_drops_and_spikes(analytics_stub, monkeypatch):
+    last_day = date.today() - timedelta(days=3)
+    rows = (daily_rows("/drop", [20] * 28 + [2] * 7, last_day)
+            + daily_rows("/spike", [20] * 28 + [80] * 7, last_day)
+            + daily_rows("/steady", [20] * 35, last_day)
+            + daily_rows("/tiny", [1] * 35, last_day))
+    service = analytics_stub(rows)
+    monkeypatch.setattr(gsc_server, "SEARCH_ANALYTICS_PAGE_SIZE", 50)
+    output = asyncio.run(gsc_server.detect_performance_anomalies("https://anomalies.example/"))
+
+    # 140 rows arrive in three pages
+    assert len(service.bodies) == 3
+    assert "Series scanned: 4, scored: 3 (from 140 rows)" in output
+    regressions, spikes = output.split("Top Regressions:")[1].split("Top Spikes:")
+    assert "/drop |" in regressions and "/spike" not in regressions
+    assert "/spike |" in spikes and "/drop" not in spikes
+    assert "/steady" not in output and "/tiny" not in output
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"dimension": "country"}, "Invalid dimension"),
+    ({"metric": "ctr"}, "Invalid metric"),
+    ({"days": 20}, "must cover baseline_days + recent_days"),
+])
+def test_detect_performance_anomalies_rejects_bad_arguments(kwargs, message):
+    output = asyncio.run(gsc_server.detect_performance_anomalies("https://anomalies.example/", **kwargs))
+    assert message in output
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+import gsc_server
+from gsc_server import parse_sitemap_pairs
+
+SITE_URL = "https://bulk.example/"
+
+
+class Executable:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class StubSitemaps:
+    """Service stand-in for sitemaps().submit/get; each sitemap stays pending for `pending_polls` gets."""
+
+    def __init__(self, pending_polls=0):
+        self.pending_polls = pending_polls
+        self.submitted = []
+        self.polls = {}
+
+    def sitemaps(self):
+        return self
+
+    def submit(self, siteUrl, feedpath):
+        self.submitted.append((siteUrl, feedpath))
+        return Executable({})
+
+    def get(self, siteUrl, feedpath):
+        polls = self.polls[feedpath] = self.polls.get(feedpath, 0) + 1
+        return Executable({
+            "path": feedpath,
+            "isPending": polls <= self.pending_polls,
+            "errors": 0,
+            "warnings": 1,
+            "contents": [{"type": "web", "submitted": "42"}],
+        })
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    def install(pending_polls=0):
+        service = StubSitemaps(pending_polls)
+        monkeypatch.setattr(gsc_server, "get_gsc_service", lambda: service)
+        monkeypatch.setattr(gsc_server, "SITEMAP_SUBMISSIONS", gsc_server.TTLCache(3600, 100))
+        # Quota pacing would only slow the polling down
+        monkeypatch.setattr(gsc_server, "QUOTA", gsc_server.QuotaScheduler(
+            {name: 10 ** 9 for name in gsc_server.QUOTA_LIMITS}, gsc_server.MAX_CONCURRENCY
+        ))
+        return service
+
+    return install
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda delay, *args, **kwargs: real_sleep(0, *args, **kwargs))
+
+
+SITEMAPS = f"{SITE_URL}a.xml\n{SITE_URL}b.xml\nhttps://other.example/ https://other.example/sitemap.xml"
+
+
+def test_parse_sitemap_pairs():
+    assert parse_sitemap_pairs(f"{SITEMAPS}\n\n{SITE_URL}a.xml", SITE_URL) == [
+        (SITE_URL, f"{SITE_URL}a.xml"),
+        (SITE_URL, f"{SITE_URL}b.xml"),
+        ("https://other.example/", "https://other.example/sitemap.xml"),
+    ]
+    with pytest.raises(ValueError, match="no default site_url"):
+        parse_sitemap_pairs(f"{SITE_URL}a.xml", None)
+    with pytest.raises(ValueError, match="Line 2"):
+        parse_sitemap_pairs(f"{SITE_URL}a.xml\na b c", SITE_URL)
+
+
+def test_rerun_skips_recent_submissions(stub):
+    service = stub()
+    first = asyncio.run(gsc_server.bulk_submit_sitemaps(SITEMAPS, SITE_URL))
+    assert "Sitemaps: 3 | Submitted: 3 | Skipped: 0 | Failed: 0 | Still pending: 0" in first
+    assert f"{SITE_URL} | {SITE_URL}a.xml | submitted | Processed | 42 | 0 | 1" in first
+
+    second = asyncio.run(gsc_server.bulk_submit_sitemaps(SITEMAPS, SITE_URL))
+    assert "Submitted: 0 | Skipped: 3" in second
+    assert "skipped (submitted recently)" in second
+    assert len(service.submitted) == 3
+
+    asyncio.run(gsc_server.bulk_submit_sitemaps(SITEMAPS, SITE_URL, resubmit_after_minutes=0))
+    assert len(service.submitted) == 6
+
+
+def test_polls_until_processed(stub, no_backoff):
+    service = stub(pending_polls=2)
+    output = asyncio.run(gsc_server.bulk_submit_sitemaps(SITEMAPS, SITE_URL))
+    assert "Still pending: 0" in output
+    assert output.count("| Processed |") == 3
+    assert set(service.polls.values()) == {3}
+
+
+def test_stops_polling_at_timeout(stub, no_backoff):
+    stub(pending_polls=100)
+    output = asyncio.run(gsc_server.bulk_submit_sitemaps(SITEMAPS, SITE_URL, poll_timeout=0))
+    assert "Still pending: 3" in output
+    assert "were still pending when polling stopped" in output
+
+
+def test_invalid_list(stub):
+    assert asyncio.run(gsc_server.bulk_submit_sitemaps("a b c")).startswith("Invalid sitemaps list")
+    assert asyncio.run(gsc_server.bulk_submit_sitemaps("\n")) == "No sitemaps provided for submission."
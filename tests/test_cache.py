@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+import gsc_server
+from gsc_server import AnalyticsRows, decode_cache_entry, encode_cache_entry
+
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setattr(gsc_server, "CACHE_SECRET", b"test-secret")
+
+
+def sample_rows(count: int = 50) -> AnalyticsRows:
+    rows = AnalyticsRows(["query"])
+    for i in range(count):
+        rows.append([f"query {i}"], clicks=i, impressions=10 * i, ctr=0.1, position=2.5)
+    return rows
+
+
+@pytest.mark.parametrize("count", [1, 500])
+def test_round_trip(count):
+    expires_at = time.time() + 60
+    decoded_expiry, rows = decode_cache_entry(encode_cache_entry(sample_rows(count), expires_at))
+    assert decoded_expiry == expires_at
+    assert len(rows) == count
+    assert rows.key(count - 1) == [f"query {count - 1}"]
+
+
+def test_large_entries_are_compressed():
+    blob = encode_cache_entry(sample_rows(500), time.time() + 60)
+    assert blob[4] & gsc_server.CACHE_FLAG_COMPRESSED
+
+
+def test_signed_round_trip(secret):
+    blob = encode_cache_entry({"value": 1}, time.time() + 60)
+    assert blob[4] & gsc_server.CACHE_FLAG_SIGNED
+    assert decode_cache_entry(blob)[1] == {"value": 1}
+
+
+def test_tampered_entry_is_a_miss(secret):
+    blob = bytearray(encode_cache_entry(sample_rows(500), time.time() + 60))
+    blob[20] ^= 1
+    assert decode_cache_entry(bytes(blob)) is None
+
+
+def test_tampered_expiry_is_a_miss(secret):
+    blob = bytearray(encode_cache_entry({"value": 1}, time.time() + 60))
+    blob[5:13] = gsc_server.struct.pack(">d", time.time() + 86400)
+    assert decode_cache_entry(bytes(blob)) is None
+
+
+def test_unsigned_entry_is_a_miss_with_secret(monkeypatch):
+    blob = encode_cache_entry({"value": 1}, time.time() + 60)
+    monkeypatch.setattr(gsc_server, "CACHE_SECRET", b"test-secret")
+    assert decode_cache_entry(blob) is None
+
+
+def test_entry_signed_with_another_secret_is_a_miss(secret, monkeypatch):
+    blob = encode_cache_entry({"value": 1}, time.time() + 60)
+    monkeypatch.setattr(gsc_server, "CACHE_SECRET", b"other-secret")
+    assert decode_cache_entry(blob) is None
+
+
+def test_expired_foreign_and_outdated_entries_are_misses(monkeypatch):
+    assert decode_cache_entry(encode_cache_entry({"value": 1}, time.time() - 1)) is None
+    assert decode_cache_entry(b"not a cache entry at all") is None
+    assert decode_cache_entry(b"GSC") is None
+    blob = encode_cache_entry({"value": 1}, time.time() + 60)
+    monkeypatch.setattr(gsc_server, "CACHE_SCHEMA_VERSION", gsc_server.CACHE_SCHEMA_VERSION + 1)
+    assert decode_cache_entry(blob) is None
+
+
+def test_redis_backend_requires_secret(monkeypatch):
+    monkeypatch.setattr(gsc_server, "CACHE_SECRET", b"")
+    with pytest.raises(ValueError, match="GSC_CACHE_SECRET"):
+        gsc_server.open_cache_backend("redis://127.0.0.1:6379/0")
+
+
+def test_cache_backend_is_abstract():
+    class Incomplete(gsc_server.CacheBackend):
+        def get(self, namespace, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+
+import gsc_server
+from gsc_server import CacheWarmer
+
+
+def test_warmed_reports_are_served_from_cache(service, fake_http, dataset):
+    warmer = CacheWarmer([dataset.site_url], days=[7])
+    round_result = asyncio.run(warmer.warm(600))
+    assert round_result["failures"] == []
+    assert fake_http.requests > 0
+
+    fake_http.reset_counters()
+    overview = asyncio.run(gsc_server.get_performance_overview(dataset.site_url, days=7))
+    queries = asyncio.run(gsc_server.get_search_analytics(dataset.site_url, days=7, dimensions="query"))
+    assert overview.startswith(f"Performance Overview for {dataset.site_url}")
+    assert not queries.startswith("Error")
+    assert fake_http.requests == 0
+
+    # Other reports are not warmed
+    asyncio.run(gsc_server.get_search_analytics(dataset.site_url, days=7, dimensions="country"))
+    assert fake_http.requests > 0
+
+
+def test_warming_replaces_cached_results(service, fake_http, dataset):
+    asyncio.run(gsc_server.get_performance_overview(dataset.site_url, days=7))
+    fake_http.reset_counters()
+    asyncio.run(CacheWarmer([dataset.site_url], days=[7]).warm(600))
+    # The warmer skips the cache lookup, so every report is fetched again
+    assert fake_http.requests >= len(CacheWarmer([dataset.site_url], days=[7]).calls(dataset.site_url))
+
+
+def test_next_run_at_fixed_times():
+    warmer = CacheWarmer([], times=["14:00", "06:30"])
+    assert warmer.next_run(datetime(2026, 3, 1, 5, 0)) == datetime(2026, 3, 1, 6, 30)
+    assert warmer.next_run(datetime(2026, 3, 1, 6, 30)) == datetime(2026, 3, 1, 14, 0)
+    assert warmer.next_run(datetime(2026, 3, 1, 20, 0)) == datetime(2026, 3, 2, 6, 30)
+
+
+def test_next_run_at_interval():
+    warmer = CacheWarmer([], interval=900)
+    assert warmer.next_run(datetime(2026, 3, 1, 23, 50)) == datetime(2026, 3, 2, 0, 5)
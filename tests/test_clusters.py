@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+import gsc_server
+from gsc_server import lsh_bands, minhash_clusters
+
+QUERIES = [
+    "red running shoes",
+    "running shoes red",
+    "red running shoe",
+    "leather boots",
+    "boots leather",
+    "the leather boots",
+    "cheap flights to paris",
+]
+
+
+def test_minhash_clusters_groups_reordered_and_plural_queries():
+    cluster_of, heads = minhash_clusters(QUERIES, list(range(len(QUERIES))), 0.5)
+    assert list(cluster_of) == [0, 0, 0, 1, 1, 1, 2]
+    assert heads == [0, 3, 6]
+
+
+def test_minhash_clusters_heads_follow_order():
+    # The first query visited leads its cluster, so callers pass queries by clicks
+    order = [4, 3, 5, 2, 1, 0, 6]
+    cluster_of, heads = minhash_clusters(QUERIES, order, 0.5)
+    assert [QUERIES[head] for head in heads] == ["boots leather", "red running shoe", "cheap flights to paris"]
+    assert cluster_of[3] == cluster_of[5] == 0
+
+
+def test_minhash_clusters_strict_threshold_keeps_distinct_queries_apart():
+    queries = ["red running shoes", "red running shoes sale", "blue running shoes"]
+    cluster_of, heads = minhash_clusters(queries, [0, 1, 2], 1.0)
+    assert len(heads) == 3
+
+
+def test_minhash_clusters_empty():
+    cluster_of, heads = minhash_clusters([], [], 0.5)
+    assert list(cluster_of) == []
+    assert heads == []
+
+
+@pytest.mark.parametrize("threshold", [0.01, 0.3, 0.5, 0.8, 1.0])
+def test_lsh_bands_divide_signature(threshold):
+    bands = lsh_bands(threshold)
+    assert gsc_server.MINHASH_SIZE % bands == 0
+    assert (1 / bands) ** (bands / gsc_server.MINHASH_SIZE) <= threshold or bands == gsc_server.MINHASH_SIZE
+
+
+def test_cluster_queries_tool(service, dataset):
+    output = asyncio.run(gsc_server.cluster_queries(dataset.site_url, days=7, min_size=1, limit=3))
+    assert output.startswith(f"Query clusters for {dataset.site_url}")
+    assert f"{len(dataset.queries):,} queries in" in output
+
+
+def test_cluster_queries_rejects_similarity(service, dataset):
+    assert asyncio.run(gsc_server.cluster_queries(dataset.site_url, similarity=0)).startswith("Invalid similarity")
@@ -0,0 +1,76 @@
+import asyncio
+import random
+
+import pytest
+
+import gsc_server
+from gsc_server import SortedRuns, merge_join
+
+
+def records(*keys):
+    return iter([((key,), 1, 10, 2.0) for key in keys])
+
+
+def test_merge_join_full_outer_join():
+    joined = [(keys, left is not None, right is not None)
+              for keys, left, right in merge_join(records("a", "c", "d"), records("b", "c", "e"))]
+    assert joined == [
+        (("a",), True, False),
+        (("b",), False, True),
+        (("c",), True, True),
+        (("d",), True, False),
+        (("e",), False, True),
+    ]
+    assert list(merge_join(records(), records())) == []
+    assert [keys for keys, _, _ in merge_join(records(), records("x"))] == [("x",)]
+
+
+def test_sorted_runs_in_memory():
+    runs = SortedRuns(10 ** 9)
+    for key in ("b", "c", "a"):
+        runs.add((key,), 1, 10, 2.0)
+    assert [record[0] for record in runs] == [("a",), ("b",), ("c",)]
+    assert runs.spilled == 0
+    runs.close()
+
+
+def test_sorted_runs_spill_and_cap_open_runs(monkeypatch, tmp_path):
+    monkeypatch.setattr(gsc_server, "SPILL_MIN_BYTES", 0)
+    monkeypatch.setattr(gsc_server, "SPILL_MAX_OPEN_RUNS", 4)
+    monkeypatch.setattr(gsc_server, "SPILL_BLOCK_ROWS", 7)
+    keys = [(f"query {i:05d}",) for i in range(2000)]
+    random.Random(1).shuffle(keys)
+    runs = SortedRuns(2000, str(tmp_path))
+    for i, key in enumerate(keys):
+        runs.add(key, i, 10 * i, 1.0)
+        assert len(runs.runs) < 4
+    assert runs.spilled > 4
+    assert runs.rows == 2000
+    merged = list(runs)
+    assert [record[0] for record in merged] == sorted(keys)
+    assert sum(record[1] for record in merged) == sum(range(2000))
+    runs.close()
+
+
+def test_sorted_runs_minimum_buffer():
+    assert SortedRuns(0).memory_bytes == gsc_server.SPILL_MIN_BYTES
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_stream_period_comparison_without_limit(service, dataset, limit):
+    requests = [
+        {"startDate": dataset.dates[0], "endDate": dataset.dates[6], "dimensions": ["query"], "rowLimit": 1000},
+        {"startDate": dataset.dates[7], "endDate": dataset.dates[-1], "dimensions": ["query"], "rowLimit": 1000},
+    ]
+    top, stats = gsc_server.stream_period_comparison(service, dataset.site_url, requests, limit)
+    assert top == []
+    assert stats["keys"] == len(dataset.queries)
+
+
+def test_compare_search_periods_streaming(service, dataset):
+    output = asyncio.run(gsc_server.compare_search_periods(
+        dataset.site_url, dataset.dates[0], dataset.dates[6], dataset.dates[7], dataset.dates[-1],
+        limit=5, streaming=True
+    ))
+    assert not output.startswith("Error")
+    assert f"Streamed {len(dataset.queries)} + {len(dataset.queries)} rows" in output
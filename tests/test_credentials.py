@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import gsc_server
+from gsc_server import CredentialManager
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class FakeCredentials:
+    """Credentials whose token lasts `lifetime` seconds; refresh() fails `failures` times first."""
+
+    def __init__(self, lifetime, valid=True, failures=0):
+        self.lifetime = lifetime
+        self.valid = valid
+        self.failures = failures
+        self.expiry = utcnow() + timedelta(seconds=lifetime)
+        self.refreshes = 0
+        self.refreshed = threading.Event()
+
+    def refresh(self, request):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("token endpoint unavailable")
+        self.refreshes += 1
+        self.valid = True
+        self.expiry = utcnow() + timedelta(seconds=self.lifetime)
+        self.refreshed.set()
+
+
+@pytest.fixture
+def managers():
+    created = []
+
+    def make(creds, refresh_margin):
+        loads = []
+
+        def loader():
+            loads.append(1)
+            time.sleep(0.05)
+            return creds, "service_account"
+
+        manager = CredentialManager(refresh_margin=refresh_margin, loader=loader)
+        manager.loads = loads
+        created.append(manager)
+        return manager
+
+    yield make
+    # Stop the refresh threads
+    for manager in created:
+        manager._credentials = None
+        manager._wakeup.set()
+
+
+def test_concurrent_first_use_loads_once(managers):
+    creds = FakeCredentials(3600, valid=False)
+    manager = managers(creds, refresh_margin=300)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [creds] * 8
+    assert len(manager.loads) == 1
+    # Loaded with an expired token: refreshed once up front, not again by the background thread
+    assert creds.refreshes == 1
+    assert 3000 < manager.seconds_until_refresh() <= 3300
+
+
+def test_token_is_refreshed_before_it_expires(managers):
+    creds = FakeCredentials(3600)
+    creds.expiry = utcnow() + timedelta(seconds=300.2)
+    manager = managers(creds, refresh_margin=300)
+    manager.get()
+    assert creds.refreshes == 0
+    assert creds.refreshed.wait(5)
+    assert creds.refreshes == 1
+    assert creds.expiry > utcnow() + timedelta(seconds=3000)
+
+
+def test_failed_background_refresh_is_retried(managers, monkeypatch):
+    monkeypatch.setattr(gsc_server, "TOKEN_REFRESH_RETRY", 0.05)
+    creds = FakeCredentials(3600, failures=2)
+    creds.expiry = utcnow()
+    manager = managers(creds, refresh_margin=300)
+    manager.get()
+    assert creds.refreshed.wait(5)
+    assert creds.failures == 0
+    assert creds.refreshes == 1
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+
+import gsc_server
+
+
+@pytest.fixture
+def slow_server():
+    server = gsc_server.MCP("test")
+
+    @server.tool()
+    async def slow_tool() -> str:
+        await asyncio.sleep(5)
+        return "finished"
+
+    @server.tool()
+    async def report_tool() -> str:
+        return "Error rates are down 5%"
+
+    return server
+
+
+def execute(request_id, timeout=10, name="slow_tool"):
+    return {"jsonrpc": "2.0", "id": request_id, "method": "execute",
+            "params": {"name": name, "parameters": {}, "timeout": timeout}}
+
+
+def test_cancel_request(slow_server):
+    async def scenario():
+        call = asyncio.ensure_future(slow_server.handle(execute("req-1")))
+        await asyncio.sleep(0.1)
+        assert slow_server.cancel("req-1") == "cancelled"
+        return await call
+
+    response = asyncio.run(scenario())
+    assert response["error"]["code"] == -32800
+    assert slow_server.cancel("req-1") == "not running"
+
+
+def test_cancel_forwarded_to_other_worker(slow_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(gsc_server, "WORKERS", 2)
+    monkeypatch.setattr(gsc_server, "SHARED_STATE", gsc_server.SharedState(str(tmp_path / "shared.sqlite3")))
+    monkeypatch.setattr(gsc_server, "SHARED_CANCEL_POLL", 0.05)
+    other_worker = gsc_server.MCP("other")
+
+    async def scenario():
+        call = asyncio.ensure_future(slow_server.handle(execute("req-2")))
+        await asyncio.sleep(0.1)
+        assert other_worker.cancel("req-2", "Stopped elsewhere") == "forwarded"
+        started = time.monotonic()
+        response = await call
+        return response, time.monotonic() - started
+
+    response, elapsed = asyncio.run(scenario())
+    assert response["error"]["code"] == -32800
+    assert "Stopped elsewhere" in response["error"]["message"]
+    assert elapsed < 2
+
+
+def test_deadline(slow_server):
+    response = asyncio.run(slow_server.handle(execute("req-3", timeout=0.1)))
+    assert response["error"]["code"] == -32001
+
+
+def test_deadline_inside_a_tool_is_a_timeout_error(service, dataset, monkeypatch):
+    # One token per minute, already taken: the next sites call would have to wait past the deadline
+    quota = gsc_server.QuotaScheduler({name: 1 for name in gsc_server.QUOTA_LIMITS}, gsc_server.MAX_CONCURRENCY)
+    quota.buckets["sites"].try_acquire()
+    monkeypatch.setattr(gsc_server, "QUOTA", quota)
+    response = asyncio.run(gsc_server.mcp.handle({
+        "jsonrpc": "2.0", "id": "req-4", "method": "execute",
+        "params": {"name": "get_site_details", "parameters": {"site_url": dataset.site_url}, "timeout": 5}
+    }))
+    assert response["error"]["code"] == -32001
+
+
+def test_tool_output_is_a_result_whatever_its_text(slow_server):
+    response = asyncio.run(slow_server.handle(execute("req-5", name="report_tool")))
+    assert "error" not in response
+    assert "Error rates are down 5%" in str(response["result"])
@@ -0,0 +1,40 @@
+import asyncio
+
+import gsc_server
+
+
+def delta(dataset, watch_id, **kwargs):
+    return asyncio.run(gsc_server.get_search_analytics_delta(dataset.site_url, watch_id=watch_id, days=7, **kwargs))
+
+
+def test_reports_only_changes_since_last_call(service, dataset):
+    first = delta(dataset, "changes")
+    assert f"Initial sync: {len(dataset.queries)} rows tracked" in first
+    assert f"Added: {len(dataset.queries)} | Changed: 0 | Removed: 0" in first
+
+    assert "No changes since last sync." in delta(dataset, "changes")
+
+    old_query = dataset.queries[0]
+    dataset.queries[0] = "renamed query"
+    output = delta(dataset, "changes")
+    assert "Added: 1 | Changed: 0 | Removed: 1" in output
+    assert output.index("renamed query") < output.index("Removed (no longer in the top 1000 rows):") < output.index(old_query)
+    assert "No changes since last sync." in delta(dataset, "changes")
+
+
+def test_changes_cut_off_by_limit_are_reported_next(service, dataset):
+    delta(dataset, "limited")
+    for i in range(3):
+        dataset.queries[i] = f"renamed query {i}"
+    output = delta(dataset, "limited", limit=1)
+    assert "Added: 3 | Changed: 0 | Removed: 3" in output
+    assert "4 more changes will be reported on the next call." in output
+    assert "Added: 2 | Changed: 0 | Removed: 2" in delta(dataset, "limited")
+    assert "No changes since last sync." in delta(dataset, "limited")
+
+
+def test_watches_and_reset_are_independent(service, dataset):
+    delta(dataset, "first watch")
+    assert "Initial sync" in delta(dataset, "second watch")
+    assert "Initial sync" in delta(dataset, "first watch", reset=True)
+    assert "No changes since last sync." in delta(dataset, "first watch")
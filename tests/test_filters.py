@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+import gsc_server
+from gsc_server import compile_api_filters, parse_api_filters
+
+
+def test_parse_api_filters_plain_clauses():
+    assert parse_api_filters('query~shoes; page="https://example.com/" AND device=mobile; country=USA') == (
+        ("query", "contains", "shoes"),
+        ("page", "equals", "https://example.com/"),
+        ("device", "equals", "MOBILE"),
+        ("country", "equals", "usa"),
+    )
+
+
+def test_parse_api_filters_quoted_path_is_text():
+    assert parse_api_filters('page~"/blog/"; country=usa') == (
+        ("page", "contains", "/blog/"),
+        ("country", "equals", "usa"),
+    )
+
+
+def test_parse_api_filters_alternatives_and_regex():
+    # contains is case-insensitive, so its alternatives are too
+    assert parse_api_filters("query~shoes|boots") == (("query", "includingRegex", "(?i)(?:shoes)|(?:boots)"),)
+    assert parse_api_filters("query!=a.b|c") == (("query", "excludingRegex", r"^(?:(?:a\.b)|(?:c))$"),)
+    assert parse_api_filters(r"page~/\/blog\/[0-9]{4}\//") == (("page", "includingRegex", "/blog/[0-9]{4}/"),)
+
+
+@pytest.mark.parametrize("pattern", [r"\pL+", r"foo\z", r"[+]+", r"a\++", r"(?P<name>x)", r"\\1"])
+def test_parse_api_filters_accepts_re2_syntax(pattern):
+    assert parse_api_filters(f"page~/{pattern}/")[0][1] == "includingRegex"
+
+
+@pytest.mark.parametrize("pattern", [r"(?=x)", r"(?<!x)y", r"(a)\1", r"(?>a)b", r"a*+", r"a{2}+"])
+def test_parse_api_filters_rejects_constructs_re2_lacks(pattern):
+    with pytest.raises(ValueError, match="RE2"):
+        parse_api_filters(f"page~/{pattern}/")
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("color=red", "Unknown filter dimension"),
+    ("device=watch", "Invalid device"),
+    ("country=us", "Invalid country"),
+    ("device~MOBILE", "only support = and !="),
+    ("query~", "Missing value"),
+    ("   ", "Empty filter expression"),
+])
+def test_parse_api_filters_errors(expression, message):
+    with pytest.raises(ValueError, match=message):
+        parse_api_filters(expression)
+
+
+def test_compile_api_filters_groups_by_dimension():
+    groups = compile_api_filters("query~shoes; device=MOBILE; query!~cheap", [("page", "equals", "https://example.com/")])
+    assert groups == [
+        {"groupType": "and", "filters": [{"dimension": "page", "operator": "equals", "expression": "https://example.com/"}]},
+        {"groupType": "and", "filters": [
+            {"dimension": "query", "operator": "contains", "expression": "shoes"},
+            {"dimension": "query", "operator": "notContains", "expression": "cheap"},
+        ]},
+        {"groupType": "and", "filters": [{"dimension": "device", "operator": "equals", "expression": "MOBILE"}]},
+    ]
+    assert compile_api_filters(None) == []
+    assert compile_api_filters("  ") == []
+
+
+def test_filter_search_analytics_with_api_filters(service, fake_http, dataset):
+    output = asyncio.run(gsc_server.filter_search_analytics(dataset.site_url, "shoes", filters='page~"/p/1"'))
+    assert not output.startswith("Error")
+    assert fake_http.requests >= 1
@@ -0,0 +1,84 @@
+import asyncio
+import os
+
+import gsc_server
+from gsc_server import InspectionCache
+
+SITE_URL = "https://inspection.example/"
+
+
+class Executable:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class StubInspection:
+    """Service stand-in answering urlInspection().index().inspect() and counting the calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def urlInspection(self):
+        return self
+
+    def index(self):
+        return self
+
+    def inspect(self, body):
+        self.calls += 1
+        verdict = "PASS" if self.calls == 1 else "FAIL"
+        return Executable({"inspectionResult": {"indexStatusResult": {"verdict": verdict}}})
+
+
+def test_entries_round_trip_and_expire(tmp_path):
+    cache = InspectionCache(str(tmp_path), 60)
+    cache.set(SITE_URL, f"{SITE_URL}a", {"verdict": "PASS"})
+    entry = cache.get(SITE_URL, f"{SITE_URL}a")
+    assert entry["inspectionResult"] == {"verdict": "PASS"}
+    assert entry["expiresAt"] - entry["inspectedAt"] == 60
+    assert cache.get(SITE_URL, f"{SITE_URL}b") is None
+    assert cache.get("https://other.example/", f"{SITE_URL}a") is None
+
+    cache.set(SITE_URL, f"{SITE_URL}b", {"verdict": "PASS"}, ttl=-1)
+    assert cache.get(SITE_URL, f"{SITE_URL}b") is None
+
+
+def test_ttl_change_only_affects_new_entries(tmp_path):
+    InspectionCache(str(tmp_path), 3600).set(SITE_URL, f"{SITE_URL}a", {"verdict": "PASS"})
+    shorter = InspectionCache(str(tmp_path), -1)
+    assert shorter.get(SITE_URL, f"{SITE_URL}a") is not None
+    shorter.set(SITE_URL, f"{SITE_URL}b", {"verdict": "PASS"})
+    assert shorter.get(SITE_URL, f"{SITE_URL}b") is None
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = InspectionCache(str(tmp_path), 60)
+    cache.set(SITE_URL, f"{SITE_URL}a", {"verdict": "PASS"})
+    path = cache._path(SITE_URL, f"{SITE_URL}a")
+    assert os.path.exists(path)
+    with open(path, "w") as f:
+        f.write("{not json")
+    assert cache.get(SITE_URL, f"{SITE_URL}a") is None
+
+
+def test_inspect_url_enhanced_serves_cached_results(tmp_path, monkeypatch):
+    service = StubInspection()
+    monkeypatch.setattr(gsc_server, "get_gsc_service", lambda: service)
+    monkeypatch.setattr(gsc_server, "INSPECTION_CACHE", InspectionCache(str(tmp_path), 60))
+    page_url = f"{SITE_URL}page"
+
+    first = asyncio.run(gsc_server.inspect_url_enhanced(SITE_URL, page_url))
+    assert "Indexing Status: PASS" in first
+    assert "Cached result from" not in first
+
+    second = asyncio.run(gsc_server.inspect_url_enhanced(SITE_URL, page_url))
+    assert "Indexing Status: PASS" in second
+    assert "(Cached result from" in second
+    assert service.calls == 1
+
+    refreshed = asyncio.run(gsc_server.inspect_url_enhanced(SITE_URL, page_url, force_refresh=True))
+    assert "Indexing Status: FAIL" in refreshed
+    assert service.calls == 2
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+
+import gsc_server
+from gsc_server import JobManager
+
+
+def wait_for(manager, job_id, states=gsc_server.JOB_FINAL_STATES, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in states:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} is still {job['status']}")
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def write_job(directory, tool, parameters, status, attempts):
+    """Writes a job record as left behind by a worker that stopped while running it."""
+    job = {
+        "id": uuid.uuid4().hex,
+        "tool": tool,
+        "parameters": parameters,
+        "status": status,
+        "owner": dead_pid(),
+        "createdAt": time.time(),
+        "startedAt": time.time() if attempts else None,
+        "finishedAt": None,
+        "attempts": attempts,
+        "cancelRequested": False,
+        "progress": {"done": None, "total": None, "message": None},
+        "partial": [],
+        "result": None,
+        "error": None,
+    }
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{job['id']}.json"), "w") as f:
+        json.dump(job, f)
+    return job["id"]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return JobManager(str(tmp_path / "jobs"), 2, 3600)
+
+
+def test_restore_resumes_only_read_only_tools(service, dataset, manager):
+    site = dataset.site_url
+    interrupted_write = write_job(manager.directory, "submit_sitemap",
+                                  {"site_url": site, "sitemap_url": f"{site}sitemap.xml"}, "running", 1)
+    interrupted_read = write_job(manager.directory, "get_search_analytics", {"site_url": site}, "running", 1)
+    never_started = write_job(manager.directory, "delete_site", {"site_url": site}, "queued", 0)
+
+    manager.start()
+
+    failed = wait_for(manager, interrupted_write)
+    assert failed["status"] == "failed"
+    assert "Interrupted by a server restart" in failed["error"]
+    resumed = wait_for(manager, interrupted_read)
+    assert resumed["status"] == "succeeded"
+    assert resumed["attempts"] == 2
+    assert wait_for(manager, never_started)["status"] == "succeeded"
+
+
+def test_cancel_running_job(manager, monkeypatch):
+    async def sleepy_tool() -> str:
+        for step in range(500):
+            gsc_server.report_progress(done=step, total=500)
+            await asyncio.sleep(0.01)
+        return "finished"
+
+    monkeypatch.setitem(gsc_server.mcp.tools, "sleepy_tool", sleepy_tool)
+    job_id = manager.submit("sleepy_tool", {})["id"]
+    wait_for(manager, job_id, states=("running",))
+    assert manager.cancel(job_id)["cancelRequested"]
+    job = wait_for(manager, job_id)
+    assert job["status"] == "cancelled"
+    assert job["result"] is None
+
+
+def test_unknown_job_tool(manager):
+    with pytest.raises(ValueError):
+        manager.submit("no_such_tool", {})
+
+
+@pytest.mark.parametrize("since", ["soon", -1, None])
+def test_job_status_rejects_invalid_since(since):
+    response = asyncio.run(gsc_server.mcp.handle({
+        "jsonrpc": "2.0", "id": 1, "method": "jobs/status", "params": {"jobId": "0", "since": since}
+    }))
+    assert response["error"]["code"] == -32602
+    assert "Invalid since" in response["error"]["message"]
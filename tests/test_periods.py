@@ -0,0 +1,93 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+import gsc_server
+from gsc_server import parse_periods
+
+
+def test_parse_periods_counted_weeks():
+    today = date(2026, 3, 18)  # a Wednesday; the latest complete day is Sunday the 15th
+    periods = parse_periods("3 weeks", today)
+    assert [(start, end) for _, start, end in periods] == [
+        (date(2026, 2, 23), date(2026, 3, 1)),
+        (date(2026, 3, 2), date(2026, 3, 8)),
+        (date(2026, 3, 9), date(2026, 3, 15)),
+    ]
+
+
+def test_parse_periods_skips_incomplete_month():
+    # Data for the last DATA_DELAY_DAYS days is not final yet, so February is incomplete on March 2nd
+    periods = parse_periods("2 months", date(2026, 3, 2))
+    assert [(start, end) for _, start, end in periods] == [
+        (date(2025, 12, 1), date(2025, 12, 31)),
+        (date(2026, 1, 1), date(2026, 1, 31)),
+    ]
+    assert parse_periods("1 month", date(2026, 3, 4))[0][1:] == (date(2026, 2, 1), date(2026, 2, 28))
+
+
+def test_parse_periods_explicit_ranges():
+    periods = parse_periods("2026-01-01..2026-01-31, 2025-12-01..2025-12-31\n2026-02-01 .. 2026-02-07", date(2026, 3, 1))
+    assert periods == [
+        ("2026-01-01..2026-01-31", date(2026, 1, 1), date(2026, 1, 31)),
+        ("2025-12-01..2025-12-31", date(2025, 12, 1), date(2025, 12, 31)),
+        ("2026-02-01..2026-02-07", date(2026, 2, 1), date(2026, 2, 7)),
+    ]
+
+
+@pytest.mark.parametrize("spec", ["2026-01-01", "2026-02-01..2026-01-01", "2026-13-01..2026-12-31", "yesterday"])
+def test_parse_periods_errors(spec):
+    with pytest.raises(ValueError):
+        parse_periods(spec, date(2026, 3, 1))
+
+
+class Executable:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class TrendingAnalytics:
+    """Service stand-in whose query clicks depend on the requested week of January 2026."""
+
+    def searchanalytics(self):
+        return self
+
+    def query(self, siteUrl, body):
+        week = (date.fromisoformat(body["startDate"]) - date(2026, 1, 1)).days // 7
+        rows = [
+            {"keys": ["rising"], "clicks": 10 + 20 * week, "impressions": 100, "ctr": 0.1, "position": 5.0 - week},
+            {"keys": ["falling"], "clicks": 90 - 30 * week, "impressions": 100, "ctr": 0.1, "position": 2.0},
+            {"keys": ["steady"], "clicks": 50, "impressions": 100, "ctr": 0.1, "position": 3.0},
+        ]
+        if week == 2:
+            rows.append({"keys": ["new"], "clicks": 5, "impressions": 10, "ctr": 0.5, "position": 8.0})
+        return Executable({"rows": rows} if body.get("startRow", 0) == 0 else {})
+
+
+def test_compare_multiple_periods_ranks_trends(monkeypatch):
+    monkeypatch.setattr(gsc_server, "get_gsc_service", lambda: TrendingAnalytics())
+    output = asyncio.run(gsc_server.compare_multiple_periods(
+        "https://periods.example/", "2026-01-01..2026-01-07, 2026-01-08..2026-01-14, 2026-01-15..2026-01-21",
+        limit=5
+    ))
+    assert "(3 periods, by clicks)" in output
+    assert "P1: 2026-01-01..2026-01-07 (2026-01-01 to 2026-01-07), 3 rows, 150 clicks" in output
+    assert "4 distinct keys" in output
+    risers, decliners = output.split("Top decliners")
+    assert "rising | 10 | 30 | 50 | +40 | +20.00 | 3→1 (+2) | 5.0→3.0" in risers
+    assert "new | 0 | 0 | 5 | +5 | +2.50 | -→4" in risers
+    assert "falling | 90 | 60 | 30 | -60 | -30.00 | 1→3 (-2) | 2.0→2.0" in decliners
+    assert "steady" not in output
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"metric": "ctr"}, "Invalid metric"),
+    ({"periods": "1 week"}, "Provide at least two periods"),
+    ({"periods": "soon"}, "Invalid periods"),
+])
+def test_compare_multiple_periods_rejects_arguments(kwargs, message):
+    assert asyncio.run(gsc_server.compare_multiple_periods("https://periods.example/", **kwargs)).startswith(message)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+import httplib2
+import pytest
+
+import gsc_server
+from gsc_server import CredentialPool, PooledCredential, SharedState
+
+
+class FailingHttp:
+    """Answers URL inspection calls with `status` a given number of times, then passes them on."""
+
+    def __init__(self, http, status, failures=float("inf")):
+        self.http = http
+        self.status = status
+        self.failures = failures
+        self.inspections = 0
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        if "urlInspection" in uri:
+            self.inspections += 1
+            if self.inspections <= self.failures:
+                error = {"error": {"code": self.status, "errors": [{"reason": "rateLimitExceeded"}]}}
+                return httplib2.Response({"status": self.status}), json.dumps(error).encode("utf-8")
+        return self.http.request(uri, method, body, headers, **kwargs)
+
+
+class FakeManager:
+    def __init__(self, service):
+        self._service = service
+
+    def service(self):
+        return self._service
+
+
+@pytest.fixture
+def pool(service, tmp_path, monkeypatch):
+    state = SharedState(str(tmp_path / "shared.sqlite3"))
+    monkeypatch.setattr(gsc_server, "POOL_INSPECTION_QPD", 3)
+    pool = CredentialPool([PooledCredential(name, FakeManager(service), state) for name in ("a", "b")])
+    monkeypatch.setattr(gsc_server, "CREDENTIAL_POOL", pool)
+    return pool
+
+
+def test_pool_spreads_daily_quota_and_persists_usage(pool, service, dataset):
+    async def inspect_all():
+        outcomes = []
+        for page_url in dataset.pages[:7]:
+            try:
+                inspection, _ = await gsc_server.inspect_url(service, dataset.site_url, page_url, force_refresh=True)
+                outcomes.append(inspection["indexStatusResult"]["verdict"] in ("PASS", "NEUTRAL"))
+            except PermissionError:
+                outcomes.append(None)
+        return outcomes
+
+    assert asyncio.run(inspect_all()) == [True] * 6 + [None]
+    assert [member.used_today("inspection", dataset.site_url) for member in pool.members] == [3, 3]
+    assert pool.members[0].sites == {dataset.site_url}
+
+    # A new process with the same shared state sees the same usage
+    again = PooledCredential("a", FakeManager(service), pool.members[0].state)
+    assert again.used_today("inspection", dataset.site_url) == 3
+
+
+def test_pool_skips_members_without_access(pool, service, dataset):
+    pool.members[0].sites = {"https://other.example/"}
+    pool.members[0].sites_checked = float("inf")
+    asyncio.run(gsc_server.inspect_url(service, dataset.site_url, dataset.pages[0], force_refresh=True))
+    assert pool.members[0].used_today("inspection", dataset.site_url) == 0
+    assert pool.members[1].used_today("inspection", dataset.site_url) == 1
+
+
+def test_try_use_without_shared_state(service):
+    member = PooledCredential("local", FakeManager(service))
+    assert member.try_use("inspection", "sc-domain:example.com", 2)
+    assert member.try_use("inspection", "sc-domain:example.com", 2)
+    assert not member.try_use("inspection", "sc-domain:example.com", 2)
+    assert member.used_today("inspection", "sc-domain:example.com") == 2
+
+
+def pool_only(monkeypatch):
+    def no_default_credentials():
+        raise FileNotFoundError("No credentials outside the pool")
+
+    monkeypatch.setattr(gsc_server, "get_gsc_service", no_default_credentials)
+
+
+def test_batch_inspection_with_pool_only(pool, dataset, monkeypatch):
+    monkeypatch.setattr(gsc_server, "POOL_INSPECTION_QPD", 10)
+    pool_only(monkeypatch)
+    urls = "\n".join(dataset.pages[:15])
+
+    output = asyncio.run(gsc_server.batch_url_inspection(dataset.site_url, urls, force_refresh=True))
+    assert "Error" not in output
+    assert output.count("Status: ") == 15
+    assert sum(member.used_today("inspection", dataset.site_url) for member in pool.members) == 15
+
+    too_many = asyncio.run(gsc_server.check_indexing_issues(dataset.site_url, "\n".join(dataset.pages[:20])))
+    assert too_many.startswith("Too many URLs provided (20). Please limit to 10 URLs")
+
+
+def test_check_indexing_issues_with_pool_only(pool, dataset, monkeypatch):
+    pool_only(monkeypatch)
+    output = asyncio.run(gsc_server.check_indexing_issues(dataset.site_url, "\n".join(dataset.pages[:4])))
+    assert "Total URLs checked: 4" in output
+    assert "Error" not in output
+
+
+def test_rate_limited_member_rests_and_the_next_takes_over(pool, service, fake_http, dataset):
+    from googleapiclient.discovery import build
+
+    failing = FailingHttp(fake_http, 429)
+    pool.members[0].manager = FakeManager(build("searchconsole", "v1", http=failing))
+    pool.members[0].sites = pool.members[1].sites = {dataset.site_url}
+    pool.members[0].sites_checked = pool.members[1].sites_checked = float("inf")
+
+    async def inspect_two():
+        for page_url in dataset.pages[:2]:
+            await gsc_server.inspect_url(None, dataset.site_url, page_url, force_refresh=True)
+
+    asyncio.run(inspect_two())
+    # Not retried on the same credential: one 429, then the member rests for the property
+    assert failing.inspections == 1
+    assert pool.members[0].blocked_until[dataset.site_url] > 0
+    assert pool.members[1].used_today("inspection", dataset.site_url) == 2
+
+
+def test_server_errors_are_retried_through_quota(pool, fake_http, dataset, monkeypatch):
+    from googleapiclient.discovery import build
+
+    # Skip the backoff sleeps
+    monkeypatch.setattr(gsc_server.QuotaScheduler, "_checked_wait", staticmethod(lambda wait: 0))
+    failing = FailingHttp(fake_http, 503, failures=2)
+    for member in pool.members:
+        member.manager = FakeManager(build("searchconsole", "v1", http=failing))
+
+    inspection, _ = asyncio.run(gsc_server.inspect_url(None, dataset.site_url, dataset.pages[0], force_refresh=True))
+    assert inspection["indexStatusResult"]["verdict"]
+    assert failing.inspections == 3
+    assert sum(member.used_today("inspection", dataset.site_url) for member in pool.members) == 1
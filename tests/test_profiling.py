@@ -0,0 +1,84 @@
+import asyncio
+import os
+import pstats
+
+import pytest
+
+import gsc_server
+from gsc_server import resolve_profile_mode
+
+
+@pytest.fixture
+def profiling(tmp_path, monkeypatch):
+    def configure(mode="", requests=False):
+        monkeypatch.setattr(gsc_server, "PROFILE_MODE", mode)
+        monkeypatch.setattr(gsc_server, "PROFILE_REQUESTS", requests)
+        monkeypatch.setattr(gsc_server, "PROFILE_DIR", str(tmp_path))
+
+    return configure
+
+
+@pytest.fixture
+def server():
+    server = gsc_server.MCP("test")
+
+    @server.tool()
+    async def busy_tool(seconds: float = 0.05) -> str:
+        await asyncio.to_thread(sum, range(10000))
+        await asyncio.sleep(seconds)
+        return "finished"
+
+    return server
+
+
+def execute(server, profile=None, timeout=10, seconds=0.05):
+    params = {"name": "busy_tool", "parameters": {"seconds": seconds}, "timeout": timeout}
+    if profile is not None:
+        params["profile"] = profile
+    return asyncio.run(server.handle({"jsonrpc": "2.0", "id": 1, "method": "execute", "params": params}))
+
+
+def test_resolve_profile_mode(profiling):
+    profiling()
+    assert resolve_profile_mode() == ""
+    assert resolve_profile_mode(False) == ""
+    with pytest.raises(ValueError, match="Profiling is disabled"):
+        resolve_profile_mode("sample")
+
+    profiling(requests=True)
+    assert resolve_profile_mode() == ""
+    assert resolve_profile_mode(True) == "cprofile"
+    assert resolve_profile_mode("sample") == "sample"
+    with pytest.raises(ValueError, match="Unknown profile mode"):
+        resolve_profile_mode("perf")
+
+    profiling(mode="sample")
+    assert resolve_profile_mode() == "sample"
+    assert resolve_profile_mode(True) == "sample"
+    assert resolve_profile_mode(False) == ""
+
+
+def test_profile_request_refused_when_disabled(profiling, server):
+    profiling()
+    response = execute(server, profile=True)
+    assert response["error"]["code"] == -32602
+    assert "profile" not in execute(server)["result"]
+
+
+def test_cprofile_result_is_attached(profiling, server):
+    profiling(requests=True)
+    profile = execute(server, profile="cprofile")["result"]["profile"]
+    assert profile["mode"] == "cprofile"
+    assert profile["path"].endswith(".pstats")
+    assert profile["seconds"] >= 0.05
+    functions = {name for _, _, name in pstats.Stats(profile["path"]).stats}
+    assert "busy_tool" in functions
+
+
+def test_sample_profile_of_a_timed_out_call(profiling, server):
+    profiling(mode="sample")
+    response = execute(server, timeout=0.2, seconds=5)
+    assert response["error"]["code"] == -32001
+    profile = response["error"]["data"]["profile"]
+    assert profile["mode"] == "sample"
+    assert os.path.exists(profile["path"]) and profile["path"].endswith(".folded")
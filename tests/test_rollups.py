@@ -0,0 +1,52 @@
+import asyncio
+from datetime import date, timedelta
+
+import gsc_server
+
+
+def daily_rows(days, clicks):
+    rows = gsc_server.AnalyticsRows(["date"])
+    for day in days:
+        rows.append([day.isoformat()], clicks, clicks * 10, 0.1, 2.0)
+    return rows
+
+
+def test_daily_rollup_merge_keeps_days_the_refresh_missed():
+    days = [date(2026, 1, 1) + timedelta(days=i) for i in range(10)]
+    stored = gsc_server.DailyRollup()
+    stored.merge(daily_rows(days, 10), days[0])
+
+    empty = stored.copy()
+    empty.merge(daily_rows([], 10), days[5])
+    assert list(empty.clicks) == [10] * 10
+
+    partial = stored.copy()
+    partial.merge(daily_rows(days[5:8], 20), days[5])
+    assert list(partial.clicks) == [10] * 5 + [20] * 3 + [10] * 2
+    assert partial.totals(days[0], days[-1])[:2] == (130, 1300)
+    # The stored rollup is untouched by merges into its copies
+    assert list(stored.clicks) == [10] * 10
+
+
+def test_get_performance_rollup_answers_from_stored_days(service, fake_http, dataset):
+    output = asyncio.run(gsc_server.get_performance_rollup(dataset.site_url, granularity="day", periods=3))
+    assert f"Stored daily data: {dataset.dates[0]} to {dataset.dates[-1]}" in output
+    for index in range(len(dataset.dates) - 3, len(dataset.dates)):
+        row = dataset.row(["date"], index)
+        assert f"{dataset.dates[index]} | 1 | {row['clicks']:,} | {row['impressions']:,} |" in output
+    assert fake_http.requests == 1
+
+    weekly = asyncio.run(gsc_server.get_performance_rollup(dataset.site_url, granularity="week", compare="none"))
+    total_clicks = sum(dataset.row(["date"], index)["clicks"] for index in range(len(dataset.dates)))
+    assert f"Total: {total_clicks:,} clicks" in weekly
+    assert fake_http.requests == 1
+
+    asyncio.run(gsc_server.get_performance_rollup(dataset.site_url, refresh=True))
+    assert fake_http.requests == 2
+
+
+def test_get_performance_rollup_rejects_arguments(service, dataset):
+    assert asyncio.run(gsc_server.get_performance_rollup(dataset.site_url, granularity="year")).startswith(
+        "Invalid granularity")
+    assert asyncio.run(gsc_server.get_performance_rollup(dataset.site_url, compare="last")).startswith(
+        "Invalid compare")
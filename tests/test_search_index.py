@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+import gsc_server
+from gsc_server import AnalyticsRows, SearchIndex
+
+
+@pytest.fixture
+def index():
+    rows = AnalyticsRows(["query", "page"])
+    for keys in (
+        ["red running shoes", "https://example.com/shoes/red"],
+        ["cheap shoes near me", "https://example.com/shoes"],
+        ["leather boots", "https://example.com/blog/boots"],
+        ["t-shirt sale", "https://example.com/shirts"],
+    ):
+        rows.append(keys, clicks=1, impressions=10)
+    return SearchIndex(rows)
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("shoes", {0, 1}),
+    ("shoes AND NOT cheap", {0}),
+    ("shoes -cheap", {0}),
+    ('boots OR "shirt"', {2, 3}),
+    ("t-shirt", {3}),
+    ('"unn"', {0}),
+    ("/^(red|leather) /", {0, 2}),
+    ("page:/blog/", {2}),
+    ('page:"/shoes"', {0, 1}),
+    ("(shoes OR boots) AND page:blog", {2}),
+])
+def test_search_index(index, expression, expected):
+    assert index.search(expression, "query") == expected
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("(shoes", "Missing closing parenthesis"),
+    ("shoes OR", "ends unexpectedly"),
+    ("/(/", "Invalid regex"),
+    ("", "Empty filter expression"),
+])
+def test_search_index_errors(index, expression, message):
+    with pytest.raises(ValueError, match=message):
+        index.search(expression, "query")
+
+
+def test_search_index_unknown_prefix_is_a_word(index):
+    # Only loaded dimensions act as prefixes; anything else is searched as a word
+    assert index.search("country:usa", "query") == set()
+    with pytest.raises(ValueError, match="not part of the loaded data"):
+        index.search("usa", "country")
+
+
+def test_search_index_reused_per_fetch(index):
+    rows = index.rows
+    rows.fetch_id = "fetch-1"
+    first = gsc_server.get_search_index(rows)
+    assert gsc_server.get_search_index(rows) is first
+    rows.fetch_id = None
+    assert gsc_server.get_search_index(rows) is not first
+
+
+def test_filter_search_analytics_reuses_fetched_rows(analytics_stub):
+    service = analytics_stub([
+        {"keys": ["red running shoes", "https://filter.example/shoes/red"], "clicks": 5, "impressions": 50,
+         "ctr": 0.1, "position": 2.0},
+        {"keys": ["cheap shoes", "https://filter.example/shoes"], "clicks": 9, "impressions": 90,
+         "ctr": 0.1, "position": 4.0},
+        {"keys": ["leather boots", "https://filter.example/boots"], "clicks": 7, "impressions": 70,
+         "ctr": 0.1, "position": 3.0},
+    ])
+    site_url = "https://filter.example/"
+    dates = {"start_date": "2026-01-01", "end_date": "2026-01-28"}
+
+    output = asyncio.run(gsc_server.filter_search_analytics(site_url, "shoes", **dates))
+    assert "Matched 2 of 3 rows" in output
+    assert output.index("cheap shoes") < output.index("red running shoes")
+    assert "leather boots" not in output
+
+    calls = len(service.bodies)
+    output = asyncio.run(gsc_server.filter_search_analytics(site_url, "page:boots", **dates))
+    assert "Matched 1 of 3 rows" in output
+    assert len(service.bodies) == calls
+
+    assert asyncio.run(gsc_server.filter_search_analytics(site_url, "(shoes", **dates)).startswith(
+        "Invalid filter expression")
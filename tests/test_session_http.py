@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+import gsc_server
+from fake_gsc_server import FakeGSCServer
+from gsc_server import RequestCancelled, RequestScope, build_service
+
+
+@pytest.fixture
+def api_service(dataset, monkeypatch):
+    """A service built like the production one, talking HTTP to a local fake API server."""
+    from google.auth.credentials import AnonymousCredentials
+
+    server = FakeGSCServer(dataset, latency="fixed:0.005")
+    monkeypatch.setattr(gsc_server, "API_BASE_URL", server.start())
+    yield server, build_service(AnonymousCredentials())
+    server.stop()
+
+
+def query_body(dataset, start_row):
+    return {"startDate": dataset.dates[0], "endDate": dataset.dates[-1], "dimensions": ["query"],
+            "startRow": start_row, "rowLimit": 5}
+
+
+def test_one_service_serves_many_threads(api_service, dataset):
+    server, service = api_service
+    results = {}
+    errors = []
+
+    def run(start_row):
+        try:
+            response = service.searchanalytics().query(siteUrl=dataset.site_url, body=query_body(dataset, start_row)).execute()
+            results[start_row] = [row["keys"][0] for row in response["rows"]]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(start_row,)) for start_row in range(0, 80, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert results == {start_row: dataset.queries[start_row:start_row + 5] for start_row in range(0, 80, 5)}
+    assert server.stats()["searchanalytics"]["requests"] == 16
+
+
+def test_cancelled_request_makes_no_call(api_service, dataset):
+    server, service = api_service
+    scope = RequestScope()
+    scope.cancel("Stopped by the client")
+    token = gsc_server.REQUEST_SCOPE.set(scope)
+    try:
+        with pytest.raises(RequestCancelled):
+            service.searchanalytics().query(siteUrl=dataset.site_url, body=query_body(dataset, 0)).execute()
+    finally:
+        gsc_server.REQUEST_SCOPE.reset(token)
+    assert server.stats()["searchanalytics"]["requests"] == 0
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+import gsc_server
+from gsc_server import SharedState, SharedTokenBucket, state_lock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "shared.sqlite3")
+
+
+def test_token_bucket_is_shared_between_workers(path):
+    # Two SharedState instances on one file stand in for two worker processes
+    first = SharedTokenBucket(SharedState(path), "sites", 60, capacity=2)
+    second = SharedTokenBucket(SharedState(path), "sites", 60, capacity=2)
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert 0 < first.try_acquire() <= 1
+    second.refund()
+    assert first.try_acquire() == 0
+
+
+def test_shared_lock_excludes_other_workers(path):
+    held = threading.Event()
+    released = []
+
+    def hold():
+        with SharedState(path).lock("entry"):
+            held.set()
+            time.sleep(0.2)
+            released.append(time.monotonic())
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    assert held.wait(5)
+    with SharedState(path).lock("entry"):
+        acquired = time.monotonic()
+    thread.join()
+    assert acquired >= released[0]
+
+
+def test_cancellations_are_visible_to_other_workers(path):
+    since = time.time()
+    SharedState(path).request_cancel("req-1", "Stopped elsewhere")
+    other = SharedState(path)
+    assert other.cancel_reason("req-1", since) == "Stopped elsewhere"
+    assert other.cancel_reason("req-1", time.time() + 1) is None
+    assert other.cancel_reason("req-2", since) is None
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_state_lock_serializes_read_modify_write(path, monkeypatch, shared):
+    monkeypatch.setattr(gsc_server, "SHARED_STATE", SharedState(path) if shared else None)
+    counter = {"value": 0}
+
+    def increment():
+        for _ in range(20):
+            with state_lock("counter", ("site", 1)):
+                value = counter["value"]
+                time.sleep(0.0005)
+                counter["value"] = value + 1
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter["value"] == 80
+
+
+def test_state_locks_do_not_grow_with_keys():
+    for i in range(1000):
+        with state_lock("many", i):
+            pass
+    assert len(gsc_server._STATE_LOCKS) == gsc_server.STATE_LOCK_STRIPES
@@ -0,0 +1,90 @@
+import asyncio
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import gsc_server
+from gsc_server import crawl_sitemaps
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(*locs):
+    return f'<?xml version="1.0"?><urlset {NS}>' + "".join(
+        f"<url><loc>{loc}</loc><lastmod>2026-01-01</lastmod></url>" for loc in locs
+    ) + "</urlset>"
+
+
+def sitemap_index(*locs):
+    return f'<?xml version="1.0"?><sitemapindex {NS}>' + "".join(
+        f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs
+    ) + "</sitemapindex>"
+
+
+@pytest.fixture
+def sitemap_server():
+    """Serves a sitemap index with a plain, a gzipped, a missing and a repeated child sitemap."""
+    files = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = files.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    pages = [f"https://crawl.example/page/{i}" for i in range(7)]
+    files["/sitemap.xml"] = sitemap_index(
+        f"{base}/posts.xml", f"{base}/products.xml.gz", f"{base}/missing.xml", f"{base}/posts.xml"
+    ).encode()
+    files["/posts.xml"] = urlset(*pages[:4]).encode()
+    files["/products.xml.gz"] = gzip.compress(urlset(*pages[3:]).encode())
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield base, pages
+    server.shutdown()
+    server.server_close()
+
+
+def test_crawl_sitemaps_follows_index(sitemap_server):
+    base, pages = sitemap_server
+    result = crawl_sitemaps(f"{base}/sitemap.xml", concurrency=3, timeout=5)
+    assert sorted(result["urls"]) == pages
+    assert sorted(result["sitemaps"]) == sorted([f"{base}/sitemap.xml", f"{base}/posts.xml", f"{base}/products.xml.gz"])
+    assert list(result["errors"]) == [f"{base}/missing.xml"]
+    assert "404" in result["errors"][f"{base}/missing.xml"]
+    assert not result["truncated"]
+
+
+def test_crawl_sitemaps_stops_at_max_urls(sitemap_server):
+    base, pages = sitemap_server
+    result = crawl_sitemaps(f"{base}/posts.xml", max_urls=2, timeout=5)
+    assert result["urls"] == pages[:2]
+    assert result["truncated"]
+
+
+def test_crawl_sitemap_tool_lists_urls_in_batches(sitemap_server):
+    base, pages = sitemap_server
+    output = asyncio.run(gsc_server.crawl_sitemap(f"{base}/sitemap.xml", timeout=5, batch_size=3))
+    assert "Unique URLs: 7" in output
+    assert "URLs in 3 batches of up to 3:" in output
+    batches = output.split("\nBatch ")[1:]
+    assert [batch.splitlines()[0] for batch in batches] == ["1/3:", "2/3:", "3/3:"]
+    assert sorted(url for batch in batches for url in batch.splitlines()[1:] if url) == pages
+
+
+def test_crawl_sitemap_tool_reports_unreachable_sitemap(sitemap_server):
+    base, _ = sitemap_server
+    output = asyncio.run(gsc_server.crawl_sitemap(f"{base}/gone.xml", timeout=5))
+    assert output.startswith(f"Error crawling sitemap {base}/gone.xml")